@@ -0,0 +1,219 @@
+"""
+管理用 API エンドポイント
+
+このモジュールは以下の管理用エンドポイントを提供します：
+- データ保持ポリシーの確認と手動実行
+- アーカイブ台帳の一覧
+- アーカイブ済みデータの期間指定エクスポート（NDJSON / CSV）
+- Blob 操作ログの書き込み状況（溢れ・破棄件数）
+- DB 再試行の集計
+- DB 接続プールのスナップショット
+- オンラインマイグレーションの進捗
+"""
+
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import retention
+from blob_log_writer import blob_log_writer
+from database import get_db
+from db_retry import retry_metrics
+from pool_metrics import pool_metrics
+from db_crud import RetentionArchiveCRUD
+from online_migration import STATE_TABLE, with_percent
+from export_endpoints import (
+    CSV_BOM,
+    MEDIA_TYPES,
+    encode_csv,
+    encode_ndjson,
+    gzip_chunks,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def get_policy(table: str) -> dict:
+    """保持ポリシーを取得（対象外のテーブルは404）"""
+    policy = retention.RETENTION_POLICIES.get(table)
+    if policy is None:
+        raise HTTPException(
+            status_code=404, detail=f"保持ポリシーのないテーブルです: {table}"
+        )
+    return policy
+
+
+# ==============================================================================
+# データ保持（リテンション）
+# ==============================================================================
+
+
+@router.get("/retention/policies")
+def get_retention_policies():
+    """保持ポリシーの一覧"""
+    return {
+        table: {"time_column": policy["time_column"], "days": policy["days"]}
+        for table, policy in retention.RETENTION_POLICIES.items()
+    }
+
+
+@router.post("/retention/run")
+async def run_retention(
+    table: Optional[str] = Query(None, description="対象テーブル（省略時は全て）"),
+    max_batches: Optional[int] = Query(
+        None, ge=1, description="最大バッチ数（省略時は期限切れの行がなくなるまで）"
+    ),
+):
+    """保持ポリシーを適用（期限切れの行をアーカイブして削除）"""
+    if table is not None:
+        get_policy(table)
+    try:
+        return {"results": await retention.run_retention(table, max_batches)}
+    except Exception as e:
+        logger.error(f"リテンション実行エラー: {e}")
+        raise HTTPException(status_code=500, detail="リテンション実行に失敗しました")
+
+
+@router.get("/retention/archives")
+async def list_archives(
+    table: Optional[str] = Query(None, description="元テーブル名"),
+    start: Optional[datetime] = Query(None, description="期間の開始（含む）"),
+    end: Optional[datetime] = Query(None, description="期間の終了（含まない）"),
+    db: AsyncSession = Depends(get_db),
+):
+    """アーカイブ台帳の一覧（期間と重なるアーカイブ）"""
+    try:
+        archives = await RetentionArchiveCRUD.get_archives(db, table, start, end)
+        return [
+            {
+                "id": archive.id,
+                "table_name": archive.table_name,
+                "storage": archive.storage,
+                "location": archive.location,
+                "first_id": archive.first_id,
+                "last_id": archive.last_id,
+                "row_count": archive.row_count,
+                "min_time": archive.min_time,
+                "max_time": archive.max_time,
+                "created_at": archive.created_at,
+            }
+            for archive in archives
+        ]
+    except Exception as e:
+        logger.error(f"アーカイブ一覧取得エラー: {e}")
+        raise HTTPException(status_code=500, detail="アーカイブ一覧取得に失敗しました")
+
+
+async def stream_archives(
+    archives: List[Any],
+    time_column: str,
+    column_names: List[str],
+    export_format: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> AsyncIterator[bytes]:
+    """アーカイブを1ファイルずつ読み出し、期間内の行をエンコードして返す"""
+    if export_format == "csv":
+        yield CSV_BOM + encode_csv([column_names])
+
+    for archive in archives:
+        rows = [
+            row
+            for row in await retention.read_archive(archive.storage, archive.location)
+            if (start is None or row[time_column] >= start)
+            and (end is None or row[time_column] < end)
+        ]
+        if not rows:
+            continue
+        if export_format == "csv":
+            yield encode_csv([[row.get(name) for name in column_names] for row in rows])
+        else:
+            yield encode_ndjson(rows)
+
+
+@router.get("/retention/archives/{table}/export")
+async def export_archives(
+    table: str,
+    request: Request,
+    start: Optional[datetime] = Query(None, description="期間の開始（含む）"),
+    end: Optional[datetime] = Query(None, description="期間の終了（含まない）"),
+    format: str = Query(
+        "ndjson", pattern="^(ndjson|csv)$", description="出力形式（ndjson / csv）"
+    ),
+    gzip: bool = Query(True, description="クライアントが対応していれば gzip 圧縮する"),
+    db: AsyncSession = Depends(get_db),
+):
+    """アーカイブ済みデータを期間指定でストリーミングエクスポート"""
+    policy = get_policy(table)
+    archives = await RetentionArchiveCRUD.get_archives(db, table, start, end)
+    column_names = [column.name for column in policy["model"].__table__.columns]
+
+    chunks = stream_archives(
+        archives, policy["time_column"], column_names, format, start, end
+    )
+    headers = {
+        "Content-Disposition": f'attachment; filename="{table}_archive.{format}"',
+    }
+    if gzip and "gzip" in request.headers.get("accept-encoding", ""):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
+
+
+# ==============================================================================
+# Blob 操作ログ
+# ==============================================================================
+
+
+@router.get("/blob-logs/writer")
+def get_blob_log_writer_stats():
+    """Blob操作ログのバッファ付き書き込みの状況"""
+    return blob_log_writer.stats()
+
+
+# ==============================================================================
+# DB 再試行
+# ==============================================================================
+
+
+@router.get("/db-retry")
+def get_db_retry_stats():
+    """一時的なDBエラーによる再試行の集計"""
+    return retry_metrics.stats()
+
+
+# ==============================================================================
+# DB 接続プール
+# ==============================================================================
+
+
+@router.get("/pool")
+def get_pool_snapshot():
+    """DB接続プールの利用状況（取得待ち時間・保持時間の p50 / p95 / p99 を含む）"""
+    return pool_metrics.snapshot()
+
+
+# ==============================================================================
+# オンラインマイグレーション
+# ==============================================================================
+
+
+@router.get("/migrations")
+async def get_migration_progress(db: AsyncSession = Depends(get_db)):
+    """オンラインマイグレーションの進捗（未実行の場合は空）"""
+    try:
+        result = await db.execute(text(f"SELECT * FROM {STATE_TABLE} ORDER BY name"))
+    except (OperationalError, ProgrammingError):
+        # 進捗テーブルはオンラインマイグレーションの初回実行時に作成される
+        return []
+    return [with_percent(dict(row)) for row in result.mappings()]
@@ -0,0 +1,40 @@
+"""Add data_versions table for read API ETags
+
+Revision ID: 1e5c8a3f9d26
+Revises: 4d8b2f6a1c73
+Create Date: 2025-07-28 09:12:44.301562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1e5c8a3f9d26'
+down_revision: Union[str, Sequence[str], None] = '4d8b2f6a1c73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 初期行を作成するデータセット（db_crud.DATASETS と同じ）
+DATASETS = ['assign', 'histogram', 'project', 'user']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    data_versions = op.create_table('data_versions',
+    sa.Column('dataset', sa.String(length=50), nullable=False, comment='データセット名'),
+    sa.Column('version', sa.Integer(), nullable=False, comment='バージョン'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新日時'),
+    sa.PrimaryKeyConstraint('dataset')
+    )
+    op.bulk_insert(
+        data_versions,
+        [{'dataset': dataset, 'version': 1} for dataset in DATASETS],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('data_versions')
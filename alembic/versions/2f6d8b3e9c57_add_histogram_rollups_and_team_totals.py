@@ -0,0 +1,116 @@
+"""Add histogram_rollups and team_assign_totals aggregate tables
+
+Revision ID: 2f6d8b3e9c57
+Revises: 9a3c6e1f7b42
+Create Date: 2025-07-26 10:12:40.336018
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6d8b3e9c57'
+down_revision: Union[str, Sequence[str], None] = '9a3c6e1f7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CATEGORY_COLUMNS = [
+    ('assin_execution', '実行合計'),
+    ('assin_maintenance', '保守合計'),
+    ('assin_prospect', '見込み合計'),
+    ('assin_common_cost', '共通費合計'),
+    ('assin_most_com_ps', '最も共通PS合計'),
+    ('assin_sales_mane', '営業管理合計'),
+    ('assin_investigation', '調査合計'),
+    ('assin_directly', '直接合計'),
+    ('assin_common', '共通合計'),
+    ('assin_sales_sup', '営業支援合計'),
+]
+
+# 年度は4月始まり
+FISCAL_YEAR = "year - CASE WHEN month < 4 THEN 1 ELSE 0 END"
+GRAINS = {
+    'month': ("year", "month"),
+    'quarter': (
+        FISCAL_YEAR,
+        "CASE WHEN month >= 10 THEN 3 WHEN month >= 7 THEN 2 WHEN month >= 4 THEN 1 ELSE 4 END",
+    ),
+    'fiscal_year': (FISCAL_YEAR, "0"),
+}
+DIMENSIONS = {
+    'total': "''",
+    'ac_code': "ac_code",
+    'pj_br_num': "pj_br_num",
+    'contract_form': "COALESCE(contract_form, '')",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('histogram_month_values', sa.Column('contract_form', sa.String(length=30), nullable=True, comment='PJ契約形態'))
+    op.execute(
+        "UPDATE histogram_month_values v JOIN histogram_data d "
+        "ON d.histogram_pj_br_num = v.pj_br_num AND d.histogram_ac_code = v.ac_code "
+        "AND d.histogram_year = v.year "
+        "SET v.contract_form = d.histogram_pj_contract_form"
+    )
+
+    op.create_table('histogram_rollups',
+    sa.Column('grain', sa.String(length=12), nullable=False, comment='粒度'),
+    sa.Column('dimension', sa.String(length=20), nullable=False, comment='集計軸'),
+    sa.Column('period_year', sa.Integer(), nullable=False, comment='年（四半期・年度は年度）'),
+    sa.Column('period_index', sa.Integer(), nullable=False, comment='月・四半期（年度は0）'),
+    sa.Column('dimension_value', sa.String(length=100), nullable=False, comment='集計軸の値'),
+    sa.Column('total_value', sa.DECIMAL(precision=14, scale=2), nullable=True, comment='合計値'),
+    sa.Column('row_count', sa.Integer(), nullable=True, comment='集計元の行数'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='集計日時'),
+    sa.PrimaryKeyConstraint('grain', 'dimension', 'period_year', 'period_index', 'dimension_value')
+    )
+    op.create_index('ix_histogram_rollups_value', 'histogram_rollups', ['dimension', 'dimension_value', 'grain', 'period_year', 'period_index', 'total_value'], unique=False)
+
+    op.create_table('team_assign_totals',
+    sa.Column('team', sa.String(length=30), nullable=False, comment='所属チーム'),
+    *[
+        sa.Column(f'{column}_total', sa.DECIMAL(precision=14, scale=2), nullable=True, comment=comment)
+        for column, comment in CATEGORY_COLUMNS
+    ],
+    sa.Column('user_count', sa.Integer(), nullable=True, comment='ユーザー数'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='集計日時'),
+    sa.PrimaryKeyConstraint('team')
+    )
+
+    # 既存の histogram_month_values から事前集計を作成
+    for grain, (period_year, period_index) in GRAINS.items():
+        for dimension, dimension_value in DIMENSIONS.items():
+            op.execute(
+                "INSERT INTO histogram_rollups (grain, dimension, period_year, period_index, "
+                "dimension_value, total_value, row_count, updated_at) "
+                f"SELECT '{grain}', '{dimension}', p.period_year, p.period_index, p.dimension_value, "
+                "COALESCE(SUM(p.value), 0), COUNT(*), NOW() FROM ("
+                f"SELECT {period_year} AS period_year, {period_index} AS period_index, "
+                f"{dimension_value} AS dimension_value, value FROM histogram_month_values"
+                ") p GROUP BY p.period_year, p.period_index, p.dimension_value"
+            )
+
+    # 既存の assign_user_totals からチーム別集計を作成
+    total_columns = ", ".join(f"{column}_total" for column, _ in CATEGORY_COLUMNS)
+    sums = ", ".join(f"COALESCE(SUM(t.{column}_total), 0)" for column, _ in CATEGORY_COLUMNS)
+    op.execute(
+        f"INSERT INTO team_assign_totals (team, {total_columns}, user_count, updated_at) "
+        f"SELECT COALESCE(u.user_team, '未所属'), {sums}, COUNT(*), NOW() "
+        "FROM assign_user_totals t LEFT JOIN ("
+        "SELECT user_name, MIN(user_team) AS user_team FROM user_data GROUP BY user_name"
+        ") u ON u.user_name = t.user_name "
+        "GROUP BY COALESCE(u.user_team, '未所属')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('team_assign_totals')
+    op.drop_index('ix_histogram_rollups_value', table_name='histogram_rollups')
+    op.drop_table('histogram_rollups')
+    op.drop_column('histogram_month_values', 'contract_form')
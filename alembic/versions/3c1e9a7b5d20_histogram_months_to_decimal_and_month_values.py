@@ -0,0 +1,72 @@
+"""Convert histogram month columns to DECIMAL and add histogram_month_values
+
+Revision ID: 3c1e9a7b5d20
+Revises: 2af443aa5eb0
+Create Date: 2025-07-24 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1e9a7b5d20'
+down_revision: Union[str, Sequence[str], None] = '2af443aa5eb0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS = range(1, 13)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 空文字はDECIMALに変換できないため0に揃える
+    for month in MONTHS:
+        op.execute(
+            f"UPDATE histogram_data SET histogram_{month}month = '0.00' "
+            f"WHERE histogram_{month}month = ''"
+        )
+    for month in MONTHS:
+        op.alter_column('histogram_data', f'histogram_{month}month',
+                   existing_type=sa.String(length=10),
+                   type_=sa.DECIMAL(precision=10, scale=2),
+                   existing_comment=f'{month}月',
+                   existing_nullable=True)
+
+    op.create_table('histogram_month_values',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('pj_br_num', sa.String(length=30), nullable=False, comment='PJ枝番'),
+    sa.Column('ac_code', sa.String(length=30), nullable=False, comment='ACコード'),
+    sa.Column('year', sa.Integer(), nullable=False, comment='年'),
+    sa.Column('month', sa.Integer(), nullable=False, comment='月'),
+    sa.Column('value', sa.DECIMAL(precision=10, scale=2), nullable=False, comment='値'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_histogram_month_values_period', 'histogram_month_values', ['year', 'month', 'pj_br_num', 'ac_code', 'value'], unique=False)
+    op.create_index('ix_histogram_month_values_pj', 'histogram_month_values', ['pj_br_num', 'ac_code', 'year', 'month'], unique=False)
+
+    # 既存データを縦持ちに展開
+    selects = " UNION ALL ".join(
+        f"SELECT histogram_pj_br_num, histogram_ac_code, histogram_year, {month}, "
+        f"COALESCE(histogram_{month}month, 0) FROM histogram_data"
+        for month in MONTHS
+    )
+    op.execute(
+        "INSERT INTO histogram_month_values (pj_br_num, ac_code, year, month, value) "
+        + selects
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_histogram_month_values_pj', table_name='histogram_month_values')
+    op.drop_index('ix_histogram_month_values_period', table_name='histogram_month_values')
+    op.drop_table('histogram_month_values')
+    for month in MONTHS:
+        op.alter_column('histogram_data', f'histogram_{month}month',
+                   existing_type=sa.DECIMAL(precision=10, scale=2),
+                   type_=sa.String(length=10),
+                   existing_comment=f'{month}月',
+                   existing_nullable=True)
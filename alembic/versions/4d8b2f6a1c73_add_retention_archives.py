@@ -0,0 +1,42 @@
+"""Add retention_archives manifest table
+
+Revision ID: 4d8b2f6a1c73
+Revises: 7e1a4c9d2b65
+Create Date: 2025-07-26 10:21:38.640917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8b2f6a1c73'
+down_revision: Union[str, Sequence[str], None] = '7e1a4c9d2b65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('retention_archives',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False, comment='元テーブル名'),
+    sa.Column('storage', sa.String(length=10), nullable=False, comment='保存先（blob / local）'),
+    sa.Column('location', sa.String(length=500), nullable=False, comment='保存パス'),
+    sa.Column('first_id', sa.Integer(), nullable=False, comment='先頭行のID'),
+    sa.Column('last_id', sa.Integer(), nullable=False, comment='末尾行のID'),
+    sa.Column('row_count', sa.Integer(), nullable=False, comment='行数'),
+    sa.Column('min_time', sa.DateTime(), nullable=False, comment='最古の日時'),
+    sa.Column('max_time', sa.DateTime(), nullable=False, comment='最新の日時'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='作成日時'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_retention_archives_range', 'retention_archives', ['table_name', 'min_time', 'max_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_retention_archives_range', table_name='retention_archives')
+    op.drop_table('retention_archives')
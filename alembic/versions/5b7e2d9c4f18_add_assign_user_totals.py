@@ -0,0 +1,65 @@
+"""Add assign_user_totals aggregate table
+
+Revision ID: 5b7e2d9c4f18
+Revises: 8d4f2b6c1a93
+Create Date: 2025-07-25 14:02:55.817304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2d9c4f18'
+down_revision: Union[str, Sequence[str], None] = '8d4f2b6c1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CATEGORY_COLUMNS = [
+    ('assin_execution', '実行合計'),
+    ('assin_maintenance', '保守合計'),
+    ('assin_prospect', '見込み合計'),
+    ('assin_common_cost', '共通費合計'),
+    ('assin_most_com_ps', '最も共通PS合計'),
+    ('assin_sales_mane', '営業管理合計'),
+    ('assin_investigation', '調査合計'),
+    ('assin_directly', '直接合計'),
+    ('assin_common', '共通合計'),
+    ('assin_sales_sup', '営業支援合計'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_assign_data_user_name', 'assign_data', ['user_name'], unique=False)
+
+    op.create_table('assign_user_totals',
+    sa.Column('user_name', sa.String(length=100), nullable=False, comment='ユーザー名'),
+    *[
+        sa.Column(f'{column}_total', sa.DECIMAL(precision=12, scale=2), nullable=True, comment=comment)
+        for column, comment in CATEGORY_COLUMNS
+    ],
+    sa.Column('projects', sa.JSON(), nullable=True, comment='プロジェクト別内訳'),
+    sa.Column('row_count', sa.Integer(), nullable=True, comment='集計元の行数'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='集計日時'),
+    sa.PrimaryKeyConstraint('user_name')
+    )
+
+    # 既存の assign_data から集計行を作成
+    total_columns = ", ".join(f"{column}_total" for column, _ in CATEGORY_COLUMNS)
+    sums = ", ".join(f"COALESCE(SUM({column}), 0)" for column, _ in CATEGORY_COLUMNS)
+    op.execute(
+        f"INSERT INTO assign_user_totals (user_name, {total_columns}, projects, row_count, updated_at) "
+        f"SELECT user_name, {sums}, "
+        "JSON_ARRAYAGG(JSON_OBJECT('assin_project_code', assin_project_code, "
+        "'assin_execution', assin_execution, 'assin_directly', assin_directly)), "
+        "COUNT(*), NOW() FROM assign_data GROUP BY user_name"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('assign_user_totals')
+    op.drop_index('ix_assign_data_user_name', table_name='assign_data')
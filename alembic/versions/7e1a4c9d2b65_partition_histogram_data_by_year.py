@@ -0,0 +1,48 @@
+"""Partition histogram_data by histogram_year
+
+Revision ID: 7e1a4c9d2b65
+Revises: 2f6d8b3e9c57
+Create Date: 2025-07-26 15:38:21.904127
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e1a4c9d2b65'
+down_revision: Union[str, Sequence[str], None] = '2f6d8b3e9c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # パーティション列は全ての一意キーに含める必要がある
+    op.execute("ALTER TABLE histogram_data DROP PRIMARY KEY, ADD PRIMARY KEY (id, histogram_year)")
+
+    # 既存データの年から翌年までを年単位のパーティションにする
+    current_year = datetime.now().year
+    min_year, max_year = op.get_bind().execute(
+        sa.text("SELECT MIN(histogram_year), MAX(histogram_year) FROM histogram_data")
+    ).one()
+    first_year = min(min_year or current_year, current_year)
+    last_year = max(max_year or current_year, current_year + 1)
+    partitions = ", ".join(
+        f"PARTITION p{year} VALUES LESS THAN ({year + 1})"
+        for year in range(first_year, last_year + 1)
+    )
+    op.execute(
+        "ALTER TABLE histogram_data PARTITION BY RANGE (histogram_year) ("
+        f"PARTITION p_min VALUES LESS THAN ({first_year}), {partitions}, "
+        "PARTITION p_max VALUES LESS THAN MAXVALUE)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE histogram_data REMOVE PARTITIONING")
+    op.execute("ALTER TABLE histogram_data DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
@@ -0,0 +1,41 @@
+"""Add (created_at, id) indexes for keyset pagination
+
+Revision ID: 8d4f2b6c1a93
+Revises: 3c1e9a7b5d20
+Create Date: 2025-07-25 09:31:07.218460
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f2b6c1a93'
+down_revision: Union[str, Sequence[str], None] = '3c1e9a7b5d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_projects_created_at_id', 'projects', ['created_at', 'id'], unique=False)
+    op.create_index('ix_assignments_created_at_id', 'assignments', ['created_at', 'id'], unique=False)
+    op.create_index('ix_notices_created_at_id', 'notices', ['created_at', 'id'], unique=False)
+    op.create_index('ix_notices_unread', 'notices', ['is_read', 'created_at', 'id'], unique=False)
+    op.create_index('ix_blob_logs_operation_time_id', 'blob_logs', ['operation_time', 'id'], unique=False)
+    op.create_index('ix_histograms_created_at_id', 'histograms', ['created_at', 'id'], unique=False)
+    op.create_index('ix_assign_data_created_at_id', 'assign_data', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_assign_data_created_at_id', table_name='assign_data')
+    op.drop_index('ix_histograms_created_at_id', table_name='histograms')
+    op.drop_index('ix_blob_logs_operation_time_id', table_name='blob_logs')
+    op.drop_index('ix_notices_unread', table_name='notices')
+    op.drop_index('ix_notices_created_at_id', table_name='notices')
+    op.drop_index('ix_assignments_created_at_id', table_name='assignments')
+    op.drop_index('ix_projects_created_at_id', table_name='projects')
+    op.drop_index('ix_users_created_at_id', table_name='users')
@@ -0,0 +1,27 @@
+"""Add (resource_type, resource_id) index to histograms
+
+Revision ID: 9a3c6e1f7b42
+Revises: 5b7e2d9c4f18
+Create Date: 2025-07-25 16:47:12.509381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3c6e1f7b42'
+down_revision: Union[str, Sequence[str], None] = '5b7e2d9c4f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_histograms_resource', 'histograms', ['resource_type', 'resource_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_histograms_resource', table_name='histograms')
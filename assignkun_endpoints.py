@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Query, HTTPException, Depends
+from fastapi import APIRouter, Query, HTTPException, Depends, Request
 from fastapi.responses import HTMLResponse
 import logging
-from typing import Optional, List, Dict, Any
+from datetime import datetime
+from typing import Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from models import (
     HistogramResponse,
     ProjectResponse,
     UserResponse,
 )
-from database import get_db
-from db_crud import AssignDataCRUD
-from db_models import AssignData
+from database import get_db, transaction
+from db_crud import (
+    ASSIGN_CATEGORY_COLUMNS,
+    AssignDataCRUD,
+    AssignUserTotalCRUD,
+    HistogramRollupCRUD,
+    TeamAssignTotalCRUD,
+    shift_month,
+)
+from json_response import FastJSONResponse
+from static_assets import static_page
 
 # ログ設定
 logger = logging.getLogger(__name__)
@@ -19,11 +28,46 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+MONTH_WINDOWS = ["previous_month", "current_month", "next_month"]
+
+
+def assign_user_total_to_dict(total: Any, with_month: bool = False) -> Dict[str, Any]:
+    """ユーザー別集計行を /assigns のレスポンス形式に変換"""
+    assign = {"user_name": total.user_name}
+    for column in ASSIGN_CATEGORY_COLUMNS:
+        assign[f"{column}_total"] = float(getattr(total, f"{column}_total") or 0)
+    # 基準月の指定がない場合、月別合計は集計しない
+    assign["month_totals"] = {
+        window: (
+            {
+                "month": getattr(total, f"{window}_month"),
+                "total_assin": float(getattr(total, f"{window}_total_assin") or 0),
+            }
+            if with_month
+            else {"month": 0, "total_assin": 0.0}
+        )
+        for window in MONTH_WINDOWS
+    }
+    # プロジェクトごとの詳細
+    assign["projects"] = [
+        {
+            "assin_project_code": project["assin_project_code"],
+            "assin_execution": float(project["assin_execution"] or 0),
+            "assin_directly": float(project["assin_directly"] or 0),
+        }
+        for project in total.projects or []
+    ]
+    return assign
+
+
 @router.get("/assigns")
 async def get_assign_data(
     month: Optional[int] = Query(
         None, description="基準月（指定月の前後1ヶ月分のデータを取得）", ge=1, le=12
     ),
+    year: Optional[int] = Query(
+        None, description="基準年（省略時は当年）", ge=2000, le=2100
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -34,11 +78,14 @@ async def get_assign_data(
     logger.info(f"Assign data requested for month: {month}")
 
     try:
-        # データベースからアサインデータを取得
-        assign_data_list = await AssignDataCRUD.get_all_assign_data(db)
+        # 集計済みのユーザー別アサインを取得
+        user_totals = await AssignUserTotalCRUD.get_all(db)
+        has_assign_data = bool(user_totals) or bool(
+            await AssignDataCRUD.get_all_assign_data(db, limit=1)
+        )
 
         # データがなければデモデータを使用して初期化
-        if not assign_data_list:
+        if not has_assign_data:
             logger.info("No assign data found in database, initializing with demo data")
             # デモ用のサンプルアサインデータ
             demo_assigns = [
@@ -82,106 +129,62 @@ async def get_assign_data(
                 },
             ]
 
-            # デモデータをデータベースに保存
-            for assign in demo_assigns:
-                # JSON形式の月別データを作成
-                month_data = {
-                    "previous_month": assign["month_totals"]["previous_month"],
-                    "current_month": assign["month_totals"]["current_month"],
-                    "next_month": assign["month_totals"]["next_month"],
-                }
-
-                # データベースに保存
-                await AssignDataCRUD.create_assign_data(
-                    db,
-                    user_name=assign["user_name"],
-                    assin_execution=assign["assin_execution"],
-                    assin_maintenance=assign["assin_maintenance"],
-                    assin_prospect=assign["assin_prospect"],
-                    assin_common_cost=assign["assin_common_cost"],
-                    assin_most_com_ps=assign["assin_most_com_ps"],
-                    assin_sales_mane=assign["assin_sales_mane"],
-                    assin_investigation=assign["assin_investigation"],
-                    assin_project_code=assign["assin_project_code"],
-                    assin_directly=assign["assin_directly"],
-                    assin_common=assign["assin_common"],
-                    assin_sales_sup=assign["assin_sales_sup"],
-                    month_data=month_data,
-                )
-
-            # 保存後に再取得
-            assign_data_list = await AssignDataCRUD.get_all_assign_data(db)
-
-        # データベースから取得したデータをdict形式に変換
-        assigns = []
-        for data in assign_data_list:
-            assign = {
-                "user_name": data.user_name,
-                "assin_execution": float(data.assin_execution),
-                "assin_maintenance": float(data.assin_maintenance),
-                "assin_prospect": float(data.assin_prospect),
-                "assin_common_cost": float(data.assin_common_cost),
-                "assin_most_com_ps": float(data.assin_most_com_ps),
-                "assin_sales_mane": float(data.assin_sales_mane),
-                "assin_investigation": float(data.assin_investigation),
-                "assin_project_code": data.assin_project_code,
-                "assin_directly": float(data.assin_directly),
-                "assin_common": float(data.assin_common),
-                "assin_sales_sup": float(data.assin_sales_sup),
-                "month_totals": data.month_data,
-            }
-            assigns.append(assign)
-
-        # ユーザー名でグループ化して集計
-        user_totals = {}
-        for assign in assigns:
-            user_name = assign["user_name"]
-            if user_name not in user_totals:
-                user_totals[user_name] = {
-                    "user_name": user_name,
-                    "assin_execution_total": 0.0,
-                    "assin_maintenance_total": 0.0,
-                    "assin_prospect_total": 0.0,
-                    "assin_common_cost_total": 0.0,
-                    "assin_most_com_ps_total": 0.0,
-                    "assin_sales_mane_total": 0.0,
-                    "assin_investigation_total": 0.0,
-                    "assin_directly_total": 0.0,
-                    "assin_common_total": 0.0,
-                    "assin_sales_sup_total": 0.0,
-                    "month_totals": {
-                        "previous_month": {"month": 0, "total_assin": 0.0},
-                        "current_month": {"month": 0, "total_assin": 0.0},
-                        "next_month": {"month": 0, "total_assin": 0.0},
-                    },
-                    "projects": [],  # プロジェクトごとの詳細を保存
-                }
-
-            totals = user_totals[user_name]
-            totals["assin_execution_total"] += assign["assin_execution"]
-            totals["assin_maintenance_total"] += assign["assin_maintenance"]
-            totals["assin_prospect_total"] += assign["assin_prospect"]
-            totals["assin_common_cost_total"] += assign["assin_common_cost"]
-            totals["assin_most_com_ps_total"] += assign["assin_most_com_ps"]
-            totals["assin_sales_mane_total"] += assign["assin_sales_mane"]
-            totals["assin_investigation_total"] += assign["assin_investigation"]
-            totals["assin_directly_total"] += assign["assin_directly"]
-            totals["assin_common_total"] += assign["assin_common"]
-            totals["assin_sales_sup_total"] += assign["assin_sales_sup"]
-
-            # プロジェクトごとの詳細を保存
-            totals["projects"].append(
+            # デモデータをデータベースに保存（1トランザクションでまとめてコミット）
+            async with transaction(db):
+                for assign in demo_assigns:
+                    # JSON形式の月別データを作成
+                    month_data = {
+                        "previous_month": assign["month_totals"]["previous_month"],
+                        "current_month": assign["month_totals"]["current_month"],
+                        "next_month": assign["month_totals"]["next_month"],
+                    }
+
+                    # データベースに保存
+                    await AssignDataCRUD.create_assign_data(
+                        db,
+                        commit=False,
+                        user_name=assign["user_name"],
+                        assin_execution=assign["assin_execution"],
+                        assin_maintenance=assign["assin_maintenance"],
+                        assin_prospect=assign["assin_prospect"],
+                        assin_common_cost=assign["assin_common_cost"],
+                        assin_most_com_ps=assign["assin_most_com_ps"],
+                        assin_sales_mane=assign["assin_sales_mane"],
+                        assin_investigation=assign["assin_investigation"],
+                        assin_project_code=assign["assin_project_code"],
+                        assin_directly=assign["assin_directly"],
+                        assin_common=assign["assin_common"],
+                        assin_sales_sup=assign["assin_sales_sup"],
+                        month_data=month_data,
+                    )
+
+        if month is not None:
+            # 前月・当月・翌月の合計は month_data から SQL で集計する
+            base_year = year or datetime.now().year
+            rows = await AssignUserTotalCRUD.get_month_window(db, base_year, month)
+            aggregated_assigns = [
+                assign_user_total_to_dict(row, with_month=True) for row in rows
+            ]
+            return FastJSONResponse(
                 {
-                    "assin_project_code": assign["assin_project_code"],
-                    "assin_execution": assign["assin_execution"],
-                    "assin_directly": assign["assin_directly"],
+                    "assigns": aggregated_assigns,
+                    "total_users": len(aggregated_assigns),
                 }
             )
 
-        # 集計結果をリストに変換
-        aggregated_assigns = list(user_totals.values())
+        if not user_totals:
+            if has_assign_data:
+                # 集計が未作成の場合は assign_data から作成
+                await AssignUserTotalCRUD.rebuild(db)
+            user_totals = await AssignUserTotalCRUD.get_all(db)
 
-        return {"assigns": aggregated_assigns, "total_users": len(aggregated_assigns)}
+        # 集計済みの行をレスポンス形式に変換
+        aggregated_assigns = [assign_user_total_to_dict(total) for total in user_totals]
+
+        # 件数が多いため jsonable_encoder を通さずに直接 JSON にする
+        return FastJSONResponse(
+            {"assigns": aggregated_assigns, "total_users": len(aggregated_assigns)}
+        )
 
     except Exception as e:
         logger.error(f"Error retrieving assign data: {str(e)}")
@@ -392,56 +395,64 @@ def get_users():
 
 
 @router.get("/informations")
-def get_information(
+async def get_information(
     month: int = Query(
         ..., description="基準月（前後1ヶ月分の合計値を取得）", ge=1, le=12
     ),
     year: Optional[int] = Query(None, description="対象年", ge=1900, le=2100),
+    team: Optional[str] = Query(None, description="所属チーム（省略時は全チーム）"),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     情報表示画面API
-    総計情報を取得します
+    総計情報を取得します（事前集計テーブルから取得するため履歴の量に依存しません）
     """
     logger.info(f"Information data requested for month: {month}, year: {year}")
 
     try:
         if year is None:
-            year = 2025
-
-        # デモ用のサンプル総計データ
-        demo_data = {
-            "base_month": month,
-            "target_year": year,
-            "month_totals": {
-                "previous_month": {
-                    "month": month - 1 if month > 1 else 12,
-                    "total_amount": 1250.75,
-                },
-                "current_month": {"month": month, "total_amount": 1400.50},
-                "next_month": {
-                    "month": month + 1 if month < 12 else 1,
-                    "total_amount": 1325.25,
-                },
-            },
-            "totals": [
-                {
-                    "total_year": str(year),
-                    "total_month": month,
-                    "total_execution": 800.0,
-                    "total_maintenance": 150.0,
-                    "total_prospect": 100.0,
-                    "total_common_cost": 50.0,
-                    "total_most_com_ps": 30.0,
-                    "total_sales_mane": 20.0,
-                    "total_investigation": 10.0,
-                    "total_directly": 900.0,
-                    "total_common": 180.0,
-                    "total_sales_sup": 25.0,
-                }
-            ],
+            year = datetime.now().year
+
+        # 前月・当月・翌月のヒストグラム合計（年跨ぎ対応）
+        windows = {
+            "previous_month": shift_month(year, month, -1),
+            "current_month": (year, month),
+            "next_month": shift_month(year, month, 1),
         }
+        month_totals = await HistogramRollupCRUD.get_month_totals(
+            db, list(windows.values())
+        )
 
-        return demo_data
+        # カテゴリ別のアサイン合計（チーム別集計から）
+        # assign_data のカテゴリ列は年月を持たないため、期間で絞らない累計になる
+        category_totals = await TeamAssignTotalCRUD.get_totals(db, team)
+
+        return FastJSONResponse(
+            {
+                "base_month": month,
+                "target_year": year,
+                "month_totals": {
+                    window: {
+                        "month": period[1],
+                        "total_amount": float(month_totals.get(period, 0)),
+                    }
+                    for window, period in windows.items()
+                },
+                "totals": [
+                    {
+                        # 既存の画面向けに基準の年月も返す（集計の範囲ではない）
+                        "total_year": str(year),
+                        "total_month": month,
+                        "total_scope": "all",
+                        "team": team,
+                        **{
+                            column.replace("assin_", "total_"): float(value)
+                            for column, value in category_totals.items()
+                        },
+                    }
+                ],
+            }
+        )
 
     except Exception as e:
         logger.error(f"Error retrieving information data: {str(e)}")
@@ -450,6 +461,54 @@ def get_information(
         )
 
 
+@router.get("/rollups")
+async def get_rollups(
+    grain: str = Query(
+        "month",
+        pattern="^(month|quarter|fiscal_year)$",
+        description="粒度（month / quarter / fiscal_year、四半期・年度は4月始まり）",
+    ),
+    dimension: str = Query(
+        "total",
+        pattern="^(total|ac_code|pj_br_num|contract_form)$",
+        description="集計軸（total / ac_code / pj_br_num / contract_form）",
+    ),
+    year: Optional[int] = Query(None, description="年（四半期・年度は年度）"),
+    value: Optional[str] = Query(None, description="集計軸の値（例: PJ枝番）"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    ヒストグラム事前集計取得API
+    月・四半期・年度ごとの合計値を集計軸別に取得します
+    """
+    try:
+        rollups = await HistogramRollupCRUD.get_rollups(
+            db, grain, dimension, period_year=year, dimension_value=value
+        )
+        return FastJSONResponse(
+            {
+                "grain": grain,
+                "dimension": dimension,
+                "rollups": [
+                    {
+                        "period_year": rollup.period_year,
+                        "period_index": rollup.period_index,
+                        "value": rollup.dimension_value,
+                        "total": float(rollup.total_value or 0),
+                        "row_count": rollup.row_count,
+                    }
+                    for rollup in rollups
+                ],
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"Error retrieving rollup data: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to retrieve rollup data: {str(e)}"
+        )
+
+
 @router.get("/notices", response_model=dict)
 def get_notices(
     page: int = Query(1, description="ページ番号", ge=1),
@@ -513,66 +572,8 @@ def get_notices(
 
 
 @router.get("/", response_class=HTMLResponse)
-def get_home():
+def get_home(request: Request):
     """
     ホーム画面
     """
-    return """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Assign-Kun API</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 40px; }
-            .container { max-width: 800px; margin: 0 auto; }
-            h1 { color: #333; }
-            .endpoint { margin: 20px 0; padding: 15px; background: #f5f5f5; border-radius: 5px; }
-            .method { font-weight: bold; color: #007bff; }
-            .url { font-family: monospace; background: #fff; padding: 5px; border-radius: 3px; }
-            .description { margin-top: 10px; color: #666; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Assign-Kun API</h1>
-            <p>アサインメント管理システムのAPI</p>
-            
-            <div class="endpoint">
-                <div class="method">GET</div>
-                <div class="url">/assigns</div>
-                <div class="description">ホーム画面アサインデータ取得</div>
-            </div>
-            
-            <div class="endpoint">
-                <div class="method">GET</div>
-                <div class="url">/histograms</div>
-                <div class="description">ヒストグラムデータ取得</div>
-            </div>
-            
-            <div class="endpoint">
-                <div class="method">GET</div>
-                <div class="url">/projects</div>
-                <div class="description">プロジェクトデータ取得</div>
-            </div>
-            
-            <div class="endpoint">
-                <div class="method">GET</div>
-                <div class="url">/users</div>
-                <div class="description">ユーザーデータ取得</div>
-            </div>
-            
-            <div class="endpoint">
-                <div class="method">GET</div>
-                <div class="url">/notices</div>
-                <div class="description">通知一覧取得</div>
-            </div>
-            
-            <div class="endpoint">
-                <div class="method">GET</div>
-                <div class="url">/informations</div>
-                <div class="description">情報表示画面データ取得</div>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+    return static_page(request, "assign-kun/index.html")
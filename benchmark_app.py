@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+function_app のコールドスタート・定常状態のベンチマーク
+
+このスクリプトは以下を計測します：
+- コールドスタート: 新しいインタープリターで function_app を N 回起動し、
+  インタープリター起動・インポート・lifespan の各フェーズと、
+  各エンドポイントへの最初のリクエストの TTFB（最初のバイトまでの時間）
+- 定常状態: 起動済みのサーバーに同時接続で負荷をかけたときの p50 / p95 / p99
+
+外部サービスには接続しません。MySQL と Blob Storage は
+docker-compose.bench.yml のコンテナ（MySQL・Azurite）を使い、
+EventGrid への発行はこのスクリプト内のローカルの受け口に送ります。
+
+使い方:
+    docker compose -f docker-compose.bench.yml up -d --wait
+    python benchmark_app.py --runs 10 --requests 1000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+# 子プロセス（--serve）でも読み込まれるため、モジュールの先頭では標準ライブラリのみ使う
+
+# 現在のディレクトリをPythonパスに追加
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+# Azurite の既定のアカウント（公開されている開発用キー）
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/"
+    "K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+)
+
+# docker-compose.bench.yml のサービスに合わせた既定値（環境変数で上書き可能）
+BENCH_ENV_DEFAULTS = {
+    "DB_HOST": "127.0.0.1",
+    "DB_PORT": "3307",
+    "DB_NAME": "assignkun_db",
+    "DB_USER": "assignkun",
+    "DB_PASSWORD": "assign",
+    "DB_POOL_CLASS": "queue",
+    "AZURE_STORAGE_CONNECTION_STRING": AZURITE_CONNECTION_STRING,
+    "CSV_CONTAINER_NAME": "csv-uploads",
+}
+
+# ステータス確認用に登録する Blob
+BENCH_BLOB_NAME = "benchmark_users.csv"
+
+# 計測するエンドポイントと、最初のDBクエリの計測に使うエンドポイント
+BENCH_PATHS = (
+    "/health",
+    "/assign-kun/assigns",
+    f"/csv-blob/status/{BENCH_BLOB_NAME}",
+)
+FIRST_QUERY_PATH = "/assign-kun/assigns"
+
+# サーバーの起動待ちの上限（秒）
+SERVER_START_TIMEOUT = 60
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """ミリ秒のサンプルの要約"""
+    # 子プロセス（--serve）のインポート時間に含めないよう、ここで読み込む
+    from pool_metrics import percentile
+
+    def ms(value):
+        return None if value is None else round(value, 2)
+
+    return {
+        "count": len(samples),
+        "mean_ms": ms(sum(samples) / len(samples)) if samples else None,
+        "p50_ms": ms(percentile(samples, 50)),
+        "p95_ms": ms(percentile(samples, 95)),
+        "p99_ms": ms(percentile(samples, 99)),
+        "max_ms": ms(max(samples)) if samples else None,
+    }
+
+
+# ==============================================================================
+# 計測対象のサーバー（子プロセス）
+# ==============================================================================
+
+
+def serve(port: int):
+    """function_app を読み込んで起動し、各フェーズの時間を標準出力に1行で書く"""
+    started_at = time.time()
+
+    import_started = time.perf_counter()
+    import function_app
+
+    import_ms = (time.perf_counter() - import_started) * 1000
+
+    import uvicorn
+
+    async def main():
+        lifespan_started = time.perf_counter()
+        await function_app.startup_worker()
+        lifespan_ms = (time.perf_counter() - lifespan_started) * 1000
+
+        # lifespan は上で実行済みのため、uvicorn からの開始は何もしない
+        config = uvicorn.Config(
+            function_app.fastapi_app,
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+            access_log=False,
+        )
+        server = uvicorn.Server(config)
+        task = asyncio.create_task(server.serve())
+        while not server.started:
+            if task.done():
+                await task
+                return
+            await asyncio.sleep(0.001)
+
+        ready = {
+            "started_at": started_at,
+            "import_ms": round(import_ms, 2),
+            "lifespan_ms": round(lifespan_ms, 2),
+            "ready_at": time.time(),
+        }
+        print(json.dumps(ready), flush=True)
+        await task
+
+    asyncio.run(main())
+
+
+class BenchServer:
+    """計測対象のサーバープロセス"""
+
+    def __init__(self, port: int, env: Dict[str, str]):
+        self.port = port
+        self.env = env
+        self.process: Optional[subprocess.Popen] = None
+        self.spawned_at = 0.0
+        self.ready: Dict[str, Any] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> Dict[str, Any]:
+        self.spawned_at = time.time()
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", str(self.port)],
+            cwd=BASE_DIR,
+            env=self.env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        # 起動完了の行を待つ（タイムアウトは別スレッドでプロセスを止めて検出）
+        timer = threading.Timer(SERVER_START_TIMEOUT, self.process.kill)
+        timer.start()
+        try:
+            line = self.process.stdout.readline()
+        finally:
+            timer.cancel()
+        if not line:
+            raise RuntimeError("サーバーの起動に失敗しました")
+        self.ready = json.loads(line)
+        return self.ready
+
+    def stop(self):
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+
+# ==============================================================================
+# ローカルの代替サービス
+# ==============================================================================
+
+
+class EventGridSink(BaseHTTPRequestHandler):
+    """EventGrid トピックの代わりに、受け取ったイベントを捨てて 200 を返す"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_eventgrid_sink() -> ThreadingHTTPServer:
+    sink = ThreadingHTTPServer(("127.0.0.1", 0), EventGridSink)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    return sink
+
+
+def seed_blob(env: Dict[str, str]):
+    """ステータス確認用の CSV を Blob（Azurite）に登録"""
+    from azure.core.exceptions import ResourceExistsError
+    from azure.storage.blob import BlobServiceClient
+
+    service = BlobServiceClient.from_connection_string(
+        env["AZURE_STORAGE_CONNECTION_STRING"]
+    )
+    container = service.get_container_client(env["CSV_CONTAINER_NAME"])
+    try:
+        container.create_container()
+    except ResourceExistsError:
+        pass
+    with open(os.path.join(BASE_DIR, "sample_users.csv"), "rb") as f:
+        content = f.read()
+    container.upload_blob(
+        BENCH_BLOB_NAME,
+        content,
+        overwrite=True,
+        metadata={
+            "data_type": "user",
+            "original_filename": "sample_users.csv",
+            "processing_status": "completed",
+            "file_size": str(len(content)),
+        },
+    )
+
+
+# ==============================================================================
+# 計測
+# ==============================================================================
+
+
+def measure_ttfb(base_url: str, path: str) -> Dict[str, Any]:
+    """新しい接続で1回リクエストし、レスポンスヘッダー受信までの時間を計る"""
+    import httpx
+
+    started = time.perf_counter()
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        with client.stream("GET", path) as response:
+            ttfb_ms = (time.perf_counter() - started) * 1000
+            response.read()
+    return {"ttfb_ms": round(ttfb_ms, 2), "status": response.status_code}
+
+
+def cold_start(
+    env: Dict[str, str], port: int, runs: int, warmup: int, paths: Sequence[str]
+):
+    """新しいインタープリターでの起動と最初のリクエストを runs 回計測"""
+    results = []
+    for run in range(warmup + runs):
+        server = BenchServer(port, env)
+        try:
+            ready = server.start()
+            result = {
+                "interpreter_ms": round(
+                    (ready["started_at"] - server.spawned_at) * 1000, 2
+                ),
+                "import_ms": ready["import_ms"],
+                "lifespan_ms": ready["lifespan_ms"],
+                "ready_ms": round((ready["ready_at"] - server.spawned_at) * 1000, 2),
+                "first_requests": {
+                    path: measure_ttfb(server.base_url, path) for path in paths
+                },
+            }
+            # ルーターの読み込みと最初のDBクエリを含む、最初のリクエストの時間
+            result["first_query_ms"] = (
+                result["first_requests"].get(FIRST_QUERY_PATH, {}).get("ttfb_ms")
+            )
+        finally:
+            server.stop()
+        # 最初の数回はキャッシュ（バイトコード・OS・DBのデモデータ）を温めるため捨てる
+        if run >= warmup:
+            results.append(result)
+            print(
+                f"  cold #{run - warmup + 1}: ready {result['ready_ms']:.0f}ms "
+                f"(import {result['import_ms']:.0f}ms, "
+                f"lifespan {result['lifespan_ms']:.0f}ms)",
+                file=sys.stderr,
+            )
+
+    phases = {
+        phase: summarize(
+            [result[phase] for result in results if result[phase] is not None]
+        )
+        for phase in (
+            "interpreter_ms",
+            "import_ms",
+            "lifespan_ms",
+            "ready_ms",
+            "first_query_ms",
+        )
+    }
+    first_requests = {
+        path: {
+            **summarize([r["first_requests"][path]["ttfb_ms"] for r in results]),
+            "statuses": sorted({r["first_requests"][path]["status"] for r in results}),
+        }
+        for path in paths
+    }
+    return {"runs": results, "phases": phases, "first_requests": first_requests}
+
+
+async def drive_load(base_url: str, path: str, requests: int, concurrency: int):
+    """同時接続 concurrency で requests 回リクエストし、応答時間を集計"""
+    import httpx
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    remaining = requests
+
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] = (
+                    statuses.get(response.status_code, 0) + 1
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return {
+        **summarize(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "statuses": statuses,
+    }
+
+
+def steady_state(
+    env: Dict[str, str],
+    port: int,
+    requests: int,
+    concurrency: int,
+    paths: Sequence[str],
+):
+    """起動済みのサーバーで各エンドポイントの応答時間を計測"""
+    server = BenchServer(port, env)
+    try:
+        server.start()
+        # 遅延読み込みのルーターと接続プールを温める
+        for path in paths:
+            measure_ttfb(server.base_url, path)
+        results = {}
+        for path in paths:
+            results[path] = asyncio.run(
+                drive_load(server.base_url, path, requests, concurrency)
+            )
+            print(
+                f"  steady {path}: p50 {results[path]['p50_ms']:.1f}ms "
+                f"p95 {results[path]['p95_ms']:.1f}ms "
+                f"p99 {results[path]['p99_ms']:.1f}ms "
+                f"({results[path]['rps']} req/s)",
+                file=sys.stderr,
+            )
+        return results
+    finally:
+        server.stop()
+
+
+def blob_endpoint(connection_string: str) -> Optional[str]:
+    """接続文字列の BlobEndpoint（指定がない場合は None）"""
+    for part in connection_string.split(";"):
+        key, _, value = part.partition("=")
+        if key == "BlobEndpoint":
+            return value
+    return None
+
+
+def check_dependencies(env: Dict[str, str]) -> List[str]:
+    """MySQL と Blob Storage に接続できるか確認し、接続できない宛先を返す
+
+    Blob Storage に接続できないと SDK の再試行で1リクエストに1分以上かかり、
+    計測結果が意味を持たないため、計測前に確認する。
+    """
+    targets = [(env["DB_HOST"], int(env["DB_PORT"]))]
+    endpoint = blob_endpoint(env["AZURE_STORAGE_CONNECTION_STRING"])
+    if endpoint:
+        url = urlparse(endpoint)
+        targets.append((url.hostname, url.port or 443))
+    unreachable = []
+    for host, port in targets:
+        try:
+            socket.create_connection((host, port), timeout=2).close()
+        except OSError:
+            unreachable.append(f"{host}:{port}")
+    return unreachable
+
+
+def bench_env(eventgrid_url: str) -> Dict[str, str]:
+    """子プロセスの環境変数（未設定の項目はローカルのコンテナを指す）"""
+    env = dict(os.environ)
+    for key, value in BENCH_ENV_DEFAULTS.items():
+        env.setdefault(key, value)
+    env["EVENTGRID_TOPIC_ENDPOINT"] = eventgrid_url
+    env["EVENTGRID_ACCESS_KEY"] = "local"
+    return env
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--runs", type=int, default=5, help="コールドスタートの計測回数"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=1, help="計測前に捨てるコールドスタートの回数"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=500, help="エンドポイントごとのリクエスト数"
+    )
+    parser.add_argument("--concurrency", type=int, default=10, help="同時接続数")
+    parser.add_argument("--port", type=int, default=8790, help="サーバーのポート")
+    parser.add_argument(
+        "--path",
+        action="append",
+        dest="paths",
+        help="計測するエンドポイント（複数指定可、既定は全て）",
+    )
+    parser.add_argument("--skip-seed", action="store_true", help="Blob の登録を省略")
+    parser.add_argument("--output", help="結果を JSON で書き出すファイル")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return 0
+
+    paths = args.paths or list(BENCH_PATHS)
+    sink = start_eventgrid_sink()
+    env = bench_env(f"http://127.0.0.1:{sink.server_port}/api/events")
+    unreachable = check_dependencies(env)
+    if unreachable:
+        sink.shutdown()
+        print(
+            f"接続できません: {', '.join(unreachable)}\n"
+            "docker compose -f docker-compose.bench.yml up -d --wait "
+            "で依存サービスを起動してください",
+            file=sys.stderr,
+        )
+        return 2
+    try:
+        if not args.skip_seed:
+            try:
+                seed_blob(env)
+            except Exception as e:
+                print(f"Blob の登録に失敗しました（続行します）: {e}", file=sys.stderr)
+
+        print("コールドスタート計測中...", file=sys.stderr)
+        cold = cold_start(env, args.port, args.runs, args.warmup, paths)
+        print("定常状態計測中...", file=sys.stderr)
+        steady = steady_state(env, args.port, args.requests, args.concurrency, paths)
+    finally:
+        sink.shutdown()
+
+    report = {
+        "python": sys.version.split()[0],
+        "settings": {
+            "runs": args.runs,
+            "warmup": args.warmup,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "paths": paths,
+            "db_pool_class": env["DB_POOL_CLASS"],
+        },
+        "cold_start": cold,
+        "steady_state": steady,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+レスポンスのシリアライズ時間のベンチマーク
+
+一覧系エンドポイントと同じ形のデータを作り、変更前の経路（FastAPI の
+response_model の Union による検証、jsonable_encoder + json.dumps）と
+json_response の経路（1回だけの検証 + Pydantic の dump_json、orjson）の
+シリアライズ時間を比較します。データベースには接続しません。
+
+計測対象：
+- /mysql/histograms: ORM オブジェクトの一覧（response_model あり）
+- /mysql/histograms?fields=...: 絞り込んだ辞書の一覧
+- /assign-kun/assigns: ユーザー別集計の辞書（response_model なし）
+- /export/assign_data: DECIMAL・日時を含む行の NDJSON
+
+使い方:
+    python benchmark_serialization.py --rows 1000 --repeat 50
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Union
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from assignkun_endpoints import assign_user_total_to_dict
+from benchmark_app import summarize
+from db_crud import ASSIGN_CATEGORY_COLUMNS
+from db_models import Histogram
+from export_endpoints import encode_ndjson
+from fieldsets import to_dict
+from json_response import FastJSONResponse, json_default, response_adapter
+from mysql_endpoints import list_response
+from models import CursorPage, HistogramResponse
+
+HISTOGRAM_FIELDS = ["id", "resource_id", "bin_label", "count", "created_at"]
+
+
+def make_histograms(rows: int) -> List[Histogram]:
+    """/mysql/histograms と同じ ORM オブジェクト"""
+    base = datetime(2025, 4, 1, 9, 0)
+    return [
+        Histogram(
+            id=i,
+            resource_type="project",
+            resource_id=i % 50,
+            bin_label=f"{i % 10 * 10}-{i % 10 * 10 + 10}",
+            bin_value=i % 10,
+            count=i % 100,
+            percentage="12.5",
+            additional_data={"source": "csv", "month": i % 12 + 1},
+            created_at=base + timedelta(minutes=i),
+            updated_at=base + timedelta(minutes=i),
+        )
+        for i in range(1, rows + 1)
+    ]
+
+
+def make_user_totals(rows: int) -> List[SimpleNamespace]:
+    """assign_user_totals の行（DECIMAL 列は Decimal）"""
+    totals = []
+    for i in range(rows):
+        total = SimpleNamespace(user_name=f"ユーザー{i}")
+        for column in ASSIGN_CATEGORY_COLUMNS:
+            setattr(total, f"{column}_total", Decimal(f"{i % 200}.25"))
+        total.projects = [
+            {
+                "assin_project_code": code,
+                "assin_execution": Decimal("40.50"),
+                "assin_directly": Decimal("30.00"),
+            }
+            for code in range(3)
+        ]
+        totals.append(total)
+    return totals
+
+
+def make_assign_rows(rows: int) -> List[Dict[str, Any]]:
+    """assign_data のエクスポート行"""
+    base = datetime(2025, 4, 1, 9, 0)
+    return [
+        {
+            "id": i,
+            "user_name": f"ユーザー{i}",
+            **{column: Decimal(f"{i % 200}.25") for column in ASSIGN_CATEGORY_COLUMNS},
+            "assin_project_code": i % 20,
+            "month_data": {"current_month": {"month": 5, "total_assin": 160.0}},
+            "created_at": base + timedelta(minutes=i),
+            "updated_at": base + timedelta(minutes=i),
+        }
+        for i in range(rows)
+    ]
+
+
+# ==============================================================================
+# 変更前の経路
+# ==============================================================================
+
+
+def before_model_list(histograms: List[Histogram]) -> bytes:
+    """response_model（List と CursorPage の Union）で検証して JSON にする"""
+    adapter = response_adapter(
+        Union[List[HistogramResponse], CursorPage[HistogramResponse]]
+    )
+    return adapter.dump_json(adapter.validate_python(histograms, from_attributes=True))
+
+
+def before_dict(content: Any) -> bytes:
+    """jsonable_encoder で変換してから json.dumps する"""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def before_ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    """標準ライブラリの json で1行ずつ変換する"""
+    return "".join(
+        json.dumps(row, ensure_ascii=False, default=json_default) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+# ==============================================================================
+# 計測
+# ==============================================================================
+
+
+def measure(func: Callable[[], bytes], repeat: int, warmup: int = 3):
+    """func を repeat 回実行した時間（ミリ秒）と出力サイズ"""
+    for _ in range(warmup):
+        body = func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    summary = summarize(samples)
+    summary["bytes"] = len(body)
+    return summary
+
+
+def build_cases(rows: int) -> Dict[str, Dict[str, Callable[[], bytes]]]:
+    """計測する経路（変更前・変更後）"""
+    histograms = make_histograms(rows)
+    user_totals = make_user_totals(rows)
+    assign_rows = make_assign_rows(rows)
+
+    def assigns():
+        aggregated = [assign_user_total_to_dict(total) for total in user_totals]
+        return {"assigns": aggregated, "total_users": len(aggregated)}
+
+    def histogram_fields():
+        return [to_dict(item, HISTOGRAM_FIELDS, []) for item in histograms]
+
+    return {
+        "mysql_histograms": {
+            "before": lambda: before_model_list(histograms),
+            "after": lambda: list_response(
+                HistogramResponse, histograms, None, None, [], []
+            ).body,
+        },
+        "mysql_histograms_fields": {
+            "before": lambda: before_dict(histogram_fields()),
+            "after": lambda: list_response(
+                HistogramResponse, histograms, None, None, HISTOGRAM_FIELDS, []
+            ).body,
+        },
+        "assign_kun_assigns": {
+            "before": lambda: before_dict(assigns()),
+            "after": lambda: FastJSONResponse(assigns()).body,
+        },
+        "export_assign_data": {
+            "before": lambda: before_ndjson(assign_rows),
+            "after": lambda: encode_ndjson(assign_rows),
+        },
+    }
+
+
+def check_same_output(cases: Dict[str, Dict[str, Callable[[], bytes]]]):
+    """変更前後で JSON の内容が同じであることを確認"""
+    for name, paths in cases.items():
+        before = [json.loads(line) for line in paths["before"]().splitlines()]
+        after = [json.loads(line) for line in paths["after"]().splitlines()]
+        if before != after:
+            raise AssertionError(f"{name}: 変更前後で出力が異なります")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="1レスポンスの件数")
+    parser.add_argument("--repeat", type=int, default=50, help="計測回数")
+    parser.add_argument("--output", help="結果を JSON で書き出すファイル")
+    args = parser.parse_args()
+
+    cases = build_cases(args.rows)
+    check_same_output(cases)
+
+    results = {}
+    for name, paths in cases.items():
+        print(f"{name} 計測中...", file=sys.stderr)
+        before = measure(paths["before"], args.repeat)
+        after = measure(paths["after"], args.repeat)
+        results[name] = {
+            "before": before,
+            "after": after,
+            "speedup": round(before["mean_ms"] / after["mean_ms"], 2),
+        }
+
+    report = {
+        "python": sys.version.split()[0],
+        "settings": {"rows": args.rows, "repeat": args.repeat},
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
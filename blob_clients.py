@@ -0,0 +1,50 @@
+"""
+Azure Blob Storage クライアントの共有
+
+このモジュールは以下の機能を提供します：
+- 接続文字列ごとの BlobServiceClient の作成とワーカー内での再利用
+- アプリケーション終了時のクライアントのクローズ
+
+BlobServiceClient は内部に HTTP 接続プールを持つため、リクエストごとに
+作り直すと TLS 接続の確立が毎回発生します。Functions ホストでも uvicorn /
+gunicorn のワーカーでも、プロセス内で1つを使い回します。
+"""
+
+import threading
+from typing import Any, Dict
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 接続文字列ごとの作成済みクライアント
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_service_client(connection_string: str):
+    """接続文字列に対応する BlobServiceClient（プロセス内で共有）"""
+    client = _clients.get(connection_string)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(connection_string)
+        if client is None:
+            # Azure SDK は読み込みが重いため、初回使用時にインポート
+            from azure.storage.blob import BlobServiceClient
+
+            client = BlobServiceClient.from_connection_string(connection_string)
+            _clients[connection_string] = client
+    return client
+
+
+def close_clients():
+    """作成済みのクライアントを全て閉じる"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"BlobServiceClient のクローズに失敗しました: {e}")
@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import PlainTextResponse
 import logging
 import os
-from azure.storage.blob import BlobServiceClient
+from blob_clients import get_service_client
+from blob_log_writer import blob_log_writer
 from models import (
     BlobResponse,
     BlobListResponse,
@@ -23,12 +24,19 @@ CONTAINER_NAME = os.getenv("CONTAINER_NAME", "testcontainer")
 
 
 def get_blob_service_client():
-    """Blob Service Clientを取得"""
+    """Blob Service Clientを取得（ワーカー内で共有）"""
     if not AZURE_STORAGE_CONNECTION_STRING:
         raise HTTPException(
             status_code=500, detail="Azure Storage connection string not configured"
         )
-    return BlobServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
+    return get_service_client(AZURE_STORAGE_CONNECTION_STRING)
+
+
+def audit_blob_operation(
+    operation_type: str, blob_name: str, status: str = "success", **kwargs
+):
+    """Blob操作をログに記録（キューに登録するだけでDBは待たない）"""
+    blob_log_writer.log(operation_type, CONTAINER_NAME, blob_name, status, **kwargs)
 
 
 @router.get("/list", response_model=BlobListResponse)
@@ -55,11 +63,13 @@ def list_blobs():
                 }
             )
 
+        audit_blob_operation("list", "*")
         return BlobListResponse(
             container_name=CONTAINER_NAME, blob_count=len(blobs), blobs=blobs
         )
     except Exception as e:
         logger.error(f"Error listing blobs: {str(e)}")
+        audit_blob_operation("list", "*", "error", error_message=e)
         raise HTTPException(status_code=500, detail=f"Failed to list blobs: {str(e)}")
 
 
@@ -82,6 +92,12 @@ def read_blob(blob_name: str):
         # Blobのプロパティを取得
         properties = blob_client.get_blob_properties()
 
+        audit_blob_operation(
+            "read",
+            blob_name,
+            file_size=properties.size,
+            content_type=properties.content_settings.content_type,
+        )
         return BlobResponse(
             blob_name=blob_name,
             content=content.decode("utf-8"),
@@ -93,10 +109,13 @@ def read_blob(blob_name: str):
                 else None
             ),
         )
-    except HTTPException:
+    except HTTPException as e:
+        # 存在しない Blob（404）や接続設定の不備も操作ログに残す
+        audit_blob_operation("read", blob_name, "error", error_message=e.detail)
         raise
     except Exception as e:
         logger.error(f"Error reading blob {blob_name}: {str(e)}")
+        audit_blob_operation("read", blob_name, "error", error_message=e)
         raise HTTPException(status_code=500, detail=f"Failed to read blob: {str(e)}")
 
 
@@ -116,6 +135,12 @@ def upload_text(request: TextUploadRequest):
             content_settings={"content_type": "text/plain; charset=utf-8"},
         )
 
+        audit_blob_operation(
+            "upload",
+            request.blob_name,
+            file_size=len(request.content.encode("utf-8")),
+            content_type="text/plain; charset=utf-8",
+        )
         return UploadResponse(
             blob_name=request.blob_name,
             status="success",
@@ -124,6 +149,7 @@ def upload_text(request: TextUploadRequest):
         )
     except Exception as e:
         logger.error(f"Error uploading text to {request.blob_name}: {str(e)}")
+        audit_blob_operation("upload", request.blob_name, "error", error_message=e)
         raise HTTPException(status_code=500, detail=f"Failed to upload text: {str(e)}")
 
 
@@ -143,15 +169,18 @@ def delete_blob(blob_name: str):
         # Blobを削除
         blob_client.delete_blob()
 
+        audit_blob_operation("delete", blob_name)
         return DeleteResponse(
             blob_name=blob_name,
             status="success",
             message=f"Blob {blob_name} deleted successfully",
         )
-    except HTTPException:
+    except HTTPException as e:
+        audit_blob_operation("delete", blob_name, "error", error_message=e.detail)
         raise
     except Exception as e:
         logger.error(f"Error deleting blob {blob_name}: {str(e)}")
+        audit_blob_operation("delete", blob_name, "error", error_message=e)
         raise HTTPException(status_code=500, detail=f"Failed to delete blob: {str(e)}")
 
 
@@ -172,6 +201,12 @@ def download_blob(blob_name: str):
         content = blob_client.download_blob().readall()
         properties = blob_client.get_blob_properties()
 
+        audit_blob_operation(
+            "download",
+            blob_name,
+            file_size=properties.size,
+            content_type=properties.content_settings.content_type,
+        )
         return PlainTextResponse(
             content=content.decode("utf-8"),
             headers={
@@ -180,10 +215,12 @@ def download_blob(blob_name: str):
                 or "text/plain",
             },
         )
-    except HTTPException:
+    except HTTPException as e:
+        audit_blob_operation("download", blob_name, "error", error_message=e.detail)
         raise
     except Exception as e:
         logger.error(f"Error downloading blob {blob_name}: {str(e)}")
+        audit_blob_operation("download", blob_name, "error", error_message=e)
         raise HTTPException(
             status_code=500, detail=f"Failed to download blob: {str(e)}"
         )
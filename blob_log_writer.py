@@ -0,0 +1,230 @@
+"""
+Blob 操作ログのバッファ付き非同期書き込み
+
+このモジュールは以下の機能を提供します：
+- Blob 操作ログ（blob_logs）のキューへの登録（DBを待たずに即座に戻る）
+- バックグラウンドでのバッチ挿入（件数または経過時間でフラッシュ）
+- アプリケーション終了時の残りのログのフラッシュ
+- 登録・書き込み・溢れ・破棄の件数の集計
+
+キューが満杯の場合や書き込みに失敗した場合、ログは破棄して件数のみ記録します。
+監査ログの書き込みが Blob 操作自体を遅らせたり失敗させたりしないためです。
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from database import db_manager
+import logging
+
+logger = logging.getLogger(__name__)
+
+# キューの上限件数・1回の挿入件数・フラッシュ間隔（秒）
+BLOB_LOG_QUEUE_SIZE = int(os.getenv("BLOB_LOG_QUEUE_SIZE", "10000"))
+BLOB_LOG_BATCH_SIZE = int(os.getenv("BLOB_LOG_BATCH_SIZE", "200"))
+BLOB_LOG_FLUSH_INTERVAL = float(os.getenv("BLOB_LOG_FLUSH_INTERVAL", "1.0"))
+
+# 挿入時に全ての行で揃える列（executemany は全行で同じ列が必要）
+BLOB_LOG_FIELDS = (
+    "operation_type",
+    "container_name",
+    "blob_name",
+    "file_size",
+    "content_type",
+    "status",
+    "user_id",
+    "error_message",
+    "operation_time",
+)
+
+
+def blob_log_record(
+    operation_type: str,
+    container_name: str,
+    blob_name: str,
+    status: str = "success",
+    **kwargs,
+) -> Dict[str, Any]:
+    """blob_logs の1行を作成（操作日時は登録時点の時刻）"""
+    record = {field: kwargs.get(field) for field in BLOB_LOG_FIELDS}
+    record.update(
+        operation_type=operation_type,
+        container_name=container_name,
+        blob_name=blob_name,
+        status=status,
+    )
+    if record["operation_time"] is None:
+        record["operation_time"] = datetime.now()
+    if record["error_message"] is not None:
+        record["error_message"] = str(record["error_message"])
+    return record
+
+
+class BlobLogWriter:
+    """blob_logs のバッファ付き書き込み"""
+
+    def __init__(
+        self,
+        queue_size: int = BLOB_LOG_QUEUE_SIZE,
+        batch_size: int = BLOB_LOG_BATCH_SIZE,
+        flush_interval: float = BLOB_LOG_FLUSH_INTERVAL,
+    ):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.overflow = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.last_flush_time: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """フラッシュ用のバックグラウンドタスクを開始（イベントループ内で呼ぶ）"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._closing = False
+        self._task = self._loop.create_task(self._run())
+        logger.info("Blobログ書き込みを開始しました")
+
+    async def stop(self):
+        """受付を止め、キューに残ったログを全てフラッシュして終了"""
+        if self._task is None:
+            return
+        # 実行中の挿入は中断せず、キューが空になった時点でタスクが終了する
+        self._closing = True
+        await self._task
+        self._task = None
+        logger.info(f"Blobログ書き込みを終了しました: {self.written}件")
+
+    # ==========================================================================
+    # 登録
+    # ==========================================================================
+
+    def enqueue(self, record: Dict[str, Any]):
+        """ログをキューに登録（スレッドプールで動く同期エンドポイントからも呼べる）"""
+        if not self.running or self._closing:
+            self.dropped += 1
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._put(record)
+        else:
+            self._loop.call_soon_threadsafe(self._put, record)
+
+    def log(
+        self,
+        operation_type: str,
+        container_name: str,
+        blob_name: str,
+        status: str = "success",
+        **kwargs,
+    ):
+        """Blob 操作ログを作成してキューに登録"""
+        self.enqueue(
+            blob_log_record(operation_type, container_name, blob_name, status, **kwargs)
+        )
+
+    def _put(self, record: Dict[str, Any]):
+        # 他スレッドからの登録がタスク終了後に届いた場合は破棄
+        if not self.running:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait(record)
+            self.enqueued += 1
+        except asyncio.QueueFull:
+            self.overflow += 1
+
+    # ==========================================================================
+    # フラッシュ
+    # ==========================================================================
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """キューから最大 batch_size 件を取り出す"""
+        batch = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        """batch_size 件に達するか flush_interval が経過するまでログを集める"""
+        if self._closing:
+            return self._take_batch()
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        """終了指示を受けてキューが空になるまで、集めたログをフラッシュし続ける"""
+        while not (self._closing and self._queue.empty()):
+            await self._flush(await self._collect())
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        """1バッチを1トランザクションで挿入（失敗したバッチは破棄）"""
+        if not batch:
+            return
+        try:
+            # CRUD（モデル定義）はコールドスタートでは読み込まず、最初のフラッシュで読み込む
+            from db_crud import BlobLogCRUD
+
+            if not db_manager._initialized:
+                db_manager.initialize()
+            async with db_manager.async_session_maker() as db:
+                await BlobLogCRUD.bulk_create_blob_logs(db, batch)
+            self.written += len(batch)
+            self.batches += 1
+            self.last_flush_time = datetime.now()
+        except Exception as e:
+            self.dropped += len(batch)
+            self.failed_batches += 1
+            self.last_error = str(e)
+            logger.error(f"Blobログ書き込みエラー（{len(batch)}件破棄）: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """書き込み状況の集計"""
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "overflow": self.overflow,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+            "last_flush_time": self.last_flush_time,
+            "last_error": self.last_error,
+        }
+
+
+# アプリケーション全体で共有する書き込み
+blob_log_writer = BlobLogWriter()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+OpenAPI ドキュメント生成スクリプト（ビルド時に実行）
+
+全てのルーターを読み込んで openapi.json を書き出します。
+実行時の /openapi.json・/docs はこのファイルを返すため、
+初回アクセス時のスキーマ生成とルーターの読み込みが不要になります。
+"""
+
+import sys
+import logging
+
+# スクリプトのディレクトリは sys.path の先頭に入るため、同じディレクトリのモジュールを読める
+from function_app import fastapi_app, lazy_routers
+from lazy_routers import OPENAPI_FILE, write_openapi
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    path = sys.argv[1] if len(sys.argv) > 1 else OPENAPI_FILE
+    schema = write_openapi(fastapi_app, lazy_routers, path)
+    logger.info(f"✅ {path} を生成しました（{len(schema.get('paths', {}))}パス）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
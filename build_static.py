@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+静的ページの圧縮スクリプト（ビルド時に実行）
+
+static/ の HTML・CSS・JS ごとに、最大圧縮の .br（brotli がある場合）と
+.gz を作成します。実行時はこのファイルをそのまま返すため、
+リクエストごとの圧縮が不要になります。
+"""
+
+import os
+import sys
+import logging
+
+# スクリプトのディレクトリは sys.path の先頭に入るため、同じディレクトリのモジュールを読める
+from static_assets import MEDIA_TYPES, STATIC_DIR, STATIC_ENCODINGS, compress
+
+# ログ設定
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    directory = sys.argv[1] if len(sys.argv) > 1 else STATIC_DIR
+    count = 0
+    for root, _, file_names in os.walk(directory):
+        for file_name in sorted(file_names):
+            if os.path.splitext(file_name)[1] not in MEDIA_TYPES:
+                continue
+            path = os.path.join(root, file_name)
+            with open(path, "rb") as f:
+                data = f.read()
+            sizes = []
+            for encoding, suffix in STATIC_ENCODINGS:
+                body = compress(data, encoding)
+                if body is None:
+                    continue
+                with open(path + suffix, "wb") as f:
+                    f.write(body)
+                sizes.append(f"{encoding} {len(body)}")
+            count += 1
+            logger.info(
+                f"{os.path.relpath(path, directory)}: {len(data)} → {', '.join(sizes)}"
+            )
+    logger.info(f"✅ {count}ファイルを圧縮しました")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,542 @@
+"""
+MySQL 一括操作 API エンドポイント
+
+このモジュールは以下の一括操作エンドポイントを提供します：
+- Users / Projects / Assignments / Notices / Histograms の
+  一括作成・一括更新・一括削除・ID一覧での一括取得
+
+各バッチは1トランザクション内で複数行 INSERT / UPDATE ... CASE /
+DELETE ... IN として実行され、要素ごとの結果を返します。一意制約・外部キー
+に違反する要素を含むバッチは1件ずつ実行し直し、違反した要素のみ失敗にします。
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from db_crud import BulkCRUD
+from db_models import User, Project, Assignment, Notice, Histogram
+from models import (
+    BulkItemResult,
+    BulkResponse,
+    BulkDeleteRequest,
+    UserCreate,
+    UserResponse,
+    UserBulkUpdate,
+    ProjectCreate,
+    ProjectResponse,
+    ProjectBulkUpdate,
+    AssignmentCreate,
+    AssignmentResponse,
+    AssignmentBulkUpdate,
+    NoticeCreate,
+    NoticeResponse,
+    NoticeBulkUpdate,
+    HistogramCreate,
+    HistogramResponse,
+    HistogramBulkUpdate,
+)
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# 1リクエストで受け付ける最大件数
+MAX_BULK_ITEMS = 1000
+
+NOT_FOUND_ERROR = "対象が見つかりません"
+REFERENCED_ERROR = "他のデータから参照されているため削除できません"
+CONSTRAINT_ERROR = "一意制約または参照先の制約に違反しています"
+DUPLICATE_ID_ERROR = "同じIDが重複しています"
+
+
+# ==============================================================================
+# 共通処理
+# ==============================================================================
+
+
+def check_batch_size(items: List[Any]):
+    """バッチ件数をチェック"""
+    if not items:
+        raise HTTPException(status_code=400, detail="対象が指定されていません")
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"一度に処理できるのは {MAX_BULK_ITEMS} 件までです",
+        )
+
+
+def build_bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    """要素ごとの結果から一括操作レスポンスを作成"""
+    failed = sum(1 for result in results if not result.success)
+    return BulkResponse(
+        success=failed == 0,
+        succeeded=len(results) - failed,
+        failed=failed,
+        results=results,
+    )
+
+
+async def create_items(
+    db: AsyncSession,
+    model,
+    rows: List[Dict[str, Any]],
+    errors: Optional[Dict[int, str]] = None,
+) -> BulkResponse:
+    """エラーのない行をまとめて作成"""
+    errors = dict(errors or {})
+    indexes = [index for index in range(len(rows)) if index not in errors]
+    ids = await BulkCRUD.insert_many(db, model, [rows[index] for index in indexes])
+    for index, row_id in zip(indexes, ids):
+        if row_id is None:
+            errors[index] = CONSTRAINT_ERROR
+    created = {
+        index: row_id for index, row_id in zip(indexes, ids) if row_id is not None
+    }
+
+    return build_bulk_response(
+        [
+            BulkItemResult(
+                index=index,
+                id=created.get(index),
+                success=index in created,
+                error=errors.get(index),
+            )
+            for index in range(len(rows))
+        ]
+    )
+
+
+async def update_items(db: AsyncSession, model, items: List[BaseModel]) -> BulkResponse:
+    """指定された項目のみをまとめて更新"""
+    updates = [item.model_dump(exclude_unset=True) for item in items]
+
+    # 同じIDが複数回指定された場合は先頭のみ更新する
+    seen, errors = set(), {}
+    for index, item in enumerate(updates):
+        if item["id"] in seen:
+            errors[index] = DUPLICATE_ID_ERROR
+        seen.add(item["id"])
+
+    updated_ids, failed_ids = await BulkCRUD.update_many(
+        db, model, [item for index, item in enumerate(updates) if index not in errors]
+    )
+
+    results = []
+    for index, item in enumerate(updates):
+        error = errors.get(index)
+        if error is None and item["id"] in failed_ids:
+            error = CONSTRAINT_ERROR
+        elif error is None and item["id"] not in updated_ids:
+            error = NOT_FOUND_ERROR
+        results.append(
+            BulkItemResult(
+                index=index, id=item["id"], success=error is None, error=error
+            )
+        )
+    return build_bulk_response(results)
+
+
+async def delete_items(db: AsyncSession, model, ids: List[int]) -> BulkResponse:
+    """まとめて削除（参照されている行のみ失敗にする）"""
+    deleted_ids, referenced_ids = await BulkCRUD.delete_many(db, model, ids)
+
+    results = []
+    for index, item_id in enumerate(ids):
+        error = None
+        if item_id in referenced_ids:
+            error = REFERENCED_ERROR
+        elif item_id not in deleted_ids:
+            error = NOT_FOUND_ERROR
+        results.append(
+            BulkItemResult(index=index, id=item_id, success=error is None, error=error)
+        )
+    return build_bulk_response(results)
+
+
+# ==============================================================================
+# ユーザー一括操作
+# ==============================================================================
+
+
+@router.get("/users", response_model=List[UserResponse])
+async def bulk_get_users(
+    ids: List[int] = Query(..., description="取得するID"),
+    db: AsyncSession = Depends(get_db),
+):
+    """ID一覧でユーザーを一括取得"""
+    try:
+        check_batch_size(ids)
+        return await BulkCRUD.get_by_ids(db, User, ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ユーザー一括取得エラー: {e}")
+        raise HTTPException(status_code=500, detail="ユーザー一括取得に失敗しました")
+
+
+@router.post("/users", response_model=BulkResponse)
+async def bulk_create_users(
+    users: List[UserCreate], db: AsyncSession = Depends(get_db)
+):
+    """ユーザーを一括作成"""
+    try:
+        check_batch_size(users)
+        rows = [{**user.model_dump(), "score": user.score or 0} for user in users]
+
+        # ユーザー名の重複チェック（既存データ・バッチ内）
+        existing_names = await BulkCRUD.get_existing_values(
+            db, User.name, [row["name"] for row in rows]
+        )
+        errors = {}
+        for index, row in enumerate(rows):
+            if row["name"] in existing_names:
+                errors[index] = "ユーザー名が既に存在します"
+            existing_names.add(row["name"])
+
+        return await create_items(db, User, rows, errors)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ユーザー一括作成エラー: {e}")
+        raise HTTPException(status_code=500, detail="ユーザー一括作成に失敗しました")
+
+
+@router.put("/users", response_model=BulkResponse)
+async def bulk_update_users(
+    users: List[UserBulkUpdate], db: AsyncSession = Depends(get_db)
+):
+    """ユーザーを一括更新"""
+    try:
+        check_batch_size(users)
+        return await update_items(db, User, users)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ユーザー一括更新エラー: {e}")
+        raise HTTPException(status_code=500, detail="ユーザー一括更新に失敗しました")
+
+
+@router.delete("/users", response_model=BulkResponse)
+async def bulk_delete_users(
+    request: BulkDeleteRequest, db: AsyncSession = Depends(get_db)
+):
+    """ユーザーを一括削除"""
+    try:
+        check_batch_size(request.ids)
+        return await delete_items(db, User, request.ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ユーザー一括削除エラー: {e}")
+        raise HTTPException(status_code=500, detail="ユーザー一括削除に失敗しました")
+
+
+# ==============================================================================
+# プロジェクト一括操作
+# ==============================================================================
+
+
+@router.get("/projects", response_model=List[ProjectResponse])
+async def bulk_get_projects(
+    ids: List[int] = Query(..., description="取得するID"),
+    db: AsyncSession = Depends(get_db),
+):
+    """ID一覧でプロジェクトを一括取得"""
+    try:
+        check_batch_size(ids)
+        return await BulkCRUD.get_by_ids(db, Project, ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"プロジェクト一括取得エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="プロジェクト一括取得に失敗しました"
+        )
+
+
+@router.post("/projects", response_model=BulkResponse)
+async def bulk_create_projects(
+    projects: List[ProjectCreate], db: AsyncSession = Depends(get_db)
+):
+    """プロジェクトを一括作成"""
+    try:
+        check_batch_size(projects)
+        rows = [
+            {**project.model_dump(), "score": project.score or 0}
+            for project in projects
+        ]
+        return await create_items(db, Project, rows)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"プロジェクト一括作成エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="プロジェクト一括作成に失敗しました"
+        )
+
+
+@router.put("/projects", response_model=BulkResponse)
+async def bulk_update_projects(
+    projects: List[ProjectBulkUpdate], db: AsyncSession = Depends(get_db)
+):
+    """プロジェクトを一括更新"""
+    try:
+        check_batch_size(projects)
+        return await update_items(db, Project, projects)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"プロジェクト一括更新エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="プロジェクト一括更新に失敗しました"
+        )
+
+
+@router.delete("/projects", response_model=BulkResponse)
+async def bulk_delete_projects(
+    request: BulkDeleteRequest, db: AsyncSession = Depends(get_db)
+):
+    """プロジェクトを一括削除"""
+    try:
+        check_batch_size(request.ids)
+        return await delete_items(db, Project, request.ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"プロジェクト一括削除エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="プロジェクト一括削除に失敗しました"
+        )
+
+
+# ==============================================================================
+# 課題一括操作
+# ==============================================================================
+
+
+@router.get("/assignments", response_model=List[AssignmentResponse])
+async def bulk_get_assignments(
+    ids: List[int] = Query(..., description="取得するID"),
+    db: AsyncSession = Depends(get_db),
+):
+    """ID一覧で課題を一括取得"""
+    try:
+        check_batch_size(ids)
+        return await BulkCRUD.get_by_ids(db, Assignment, ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"課題一括取得エラー: {e}")
+        raise HTTPException(status_code=500, detail="課題一括取得に失敗しました")
+
+
+@router.post("/assignments", response_model=BulkResponse)
+async def bulk_create_assignments(
+    assignments: List[AssignmentCreate], db: AsyncSession = Depends(get_db)
+):
+    """課題を一括作成"""
+    try:
+        check_batch_size(assignments)
+        rows = [assignment.model_dump() for assignment in assignments]
+
+        # 存在しないプロジェクトを参照する行はエラーにする
+        project_ids = await BulkCRUD.get_existing_ids(
+            db, Project, [row["project_id"] for row in rows]
+        )
+        errors = {
+            index: "プロジェクトが見つかりません"
+            for index, row in enumerate(rows)
+            if row["project_id"] not in project_ids
+        }
+        return await create_items(db, Assignment, rows, errors)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"課題一括作成エラー: {e}")
+        raise HTTPException(status_code=500, detail="課題一括作成に失敗しました")
+
+
+@router.put("/assignments", response_model=BulkResponse)
+async def bulk_update_assignments(
+    assignments: List[AssignmentBulkUpdate], db: AsyncSession = Depends(get_db)
+):
+    """課題を一括更新"""
+    try:
+        check_batch_size(assignments)
+        return await update_items(db, Assignment, assignments)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"課題一括更新エラー: {e}")
+        raise HTTPException(status_code=500, detail="課題一括更新に失敗しました")
+
+
+@router.delete("/assignments", response_model=BulkResponse)
+async def bulk_delete_assignments(
+    request: BulkDeleteRequest, db: AsyncSession = Depends(get_db)
+):
+    """課題を一括削除"""
+    try:
+        check_batch_size(request.ids)
+        return await delete_items(db, Assignment, request.ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"課題一括削除エラー: {e}")
+        raise HTTPException(status_code=500, detail="課題一括削除に失敗しました")
+
+
+# ==============================================================================
+# 通知一括操作
+# ==============================================================================
+
+
+@router.get("/notices", response_model=List[NoticeResponse])
+async def bulk_get_notices(
+    ids: List[int] = Query(..., description="取得するID"),
+    db: AsyncSession = Depends(get_db),
+):
+    """ID一覧で通知を一括取得"""
+    try:
+        check_batch_size(ids)
+        return await BulkCRUD.get_by_ids(db, Notice, ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"通知一括取得エラー: {e}")
+        raise HTTPException(status_code=500, detail="通知一括取得に失敗しました")
+
+
+@router.post("/notices", response_model=BulkResponse)
+async def bulk_create_notices(
+    notices: List[NoticeCreate], db: AsyncSession = Depends(get_db)
+):
+    """通知を一括作成"""
+    try:
+        check_batch_size(notices)
+        rows = [notice.model_dump() for notice in notices]
+
+        # 存在しないユーザー宛ての行はエラーにする
+        user_ids = await BulkCRUD.get_existing_ids(
+            db, User, [row["user_id"] for row in rows]
+        )
+        errors = {
+            index: "ユーザーが見つかりません"
+            for index, row in enumerate(rows)
+            if row["user_id"] not in user_ids
+        }
+        return await create_items(db, Notice, rows, errors)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"通知一括作成エラー: {e}")
+        raise HTTPException(status_code=500, detail="通知一括作成に失敗しました")
+
+
+@router.put("/notices", response_model=BulkResponse)
+async def bulk_update_notices(
+    notices: List[NoticeBulkUpdate], db: AsyncSession = Depends(get_db)
+):
+    """通知を一括更新"""
+    try:
+        check_batch_size(notices)
+        return await update_items(db, Notice, notices)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"通知一括更新エラー: {e}")
+        raise HTTPException(status_code=500, detail="通知一括更新に失敗しました")
+
+
+@router.delete("/notices", response_model=BulkResponse)
+async def bulk_delete_notices(
+    request: BulkDeleteRequest, db: AsyncSession = Depends(get_db)
+):
+    """通知を一括削除"""
+    try:
+        check_batch_size(request.ids)
+        return await delete_items(db, Notice, request.ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"通知一括削除エラー: {e}")
+        raise HTTPException(status_code=500, detail="通知一括削除に失敗しました")
+
+
+# ==============================================================================
+# ヒストグラム一括操作
+# ==============================================================================
+
+
+@router.get("/histograms", response_model=List[HistogramResponse])
+async def bulk_get_histograms(
+    ids: List[int] = Query(..., description="取得するID"),
+    db: AsyncSession = Depends(get_db),
+):
+    """ID一覧でヒストグラムを一括取得"""
+    try:
+        check_batch_size(ids)
+        return await BulkCRUD.get_by_ids(db, Histogram, ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ヒストグラム一括取得エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="ヒストグラム一括取得に失敗しました"
+        )
+
+
+@router.post("/histograms", response_model=BulkResponse)
+async def bulk_create_histograms(
+    histograms: List[HistogramCreate], db: AsyncSession = Depends(get_db)
+):
+    """ヒストグラムを一括作成"""
+    try:
+        check_batch_size(histograms)
+        return await create_items(
+            db, Histogram, [histogram.model_dump() for histogram in histograms]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ヒストグラム一括作成エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="ヒストグラム一括作成に失敗しました"
+        )
+
+
+@router.put("/histograms", response_model=BulkResponse)
+async def bulk_update_histograms(
+    histograms: List[HistogramBulkUpdate], db: AsyncSession = Depends(get_db)
+):
+    """ヒストグラムを一括更新"""
+    try:
+        check_batch_size(histograms)
+        return await update_items(db, Histogram, histograms)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ヒストグラム一括更新エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="ヒストグラム一括更新に失敗しました"
+        )
+
+
+@router.delete("/histograms", response_model=BulkResponse)
+async def bulk_delete_histograms(
+    request: BulkDeleteRequest, db: AsyncSession = Depends(get_db)
+):
+    """ヒストグラムを一括削除"""
+    try:
+        check_batch_size(request.ids)
+        return await delete_items(db, Histogram, request.ids)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ヒストグラム一括削除エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="ヒストグラム一括削除に失敗しました"
+        )
@@ -11,12 +11,12 @@ import uuid
 from datetime import datetime
 from typing import Dict, Any, Optional
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from azure.storage.blob import BlobServiceClient, ContentSettings
-import httpx
 import logging
 import os
 
+from blob_log_writer import blob_log_writer
 from models import CSVUploadResponse
+from blob_clients import get_service_client
 
 logger = logging.getLogger(__name__)
 
@@ -30,12 +30,12 @@ EVENTGRID_ACCESS_KEY = os.getenv("EVENTGRID_ACCESS_KEY")
 
 
 def get_blob_service_client():
-    """Blob Service Clientを取得"""
+    """Blob Service Clientを取得（ワーカー内で共有）"""
     if not AZURE_STORAGE_CONNECTION_STRING:
         raise HTTPException(
             status_code=500, detail="Azure Storage connection string not configured"
         )
-    return BlobServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
+    return get_service_client(AZURE_STORAGE_CONNECTION_STRING)
 
 
 async def publish_csv_processing_event(blob_info: Dict[str, Any], data_type: str):
@@ -72,6 +72,8 @@ async def publish_csv_processing_event(blob_info: Dict[str, Any], data_type: str
             "Content-Type": "application/json",
         }
 
+        import httpx
+
         async with httpx.AsyncClient() as client:
             response = await client.post(
                 EVENTGRID_TOPIC_ENDPOINT, json=[event], headers=headers, timeout=30.0
@@ -125,6 +127,8 @@ async def upload_csv_to_blob(
             blob_metadata.update(metadata)
 
         # Content Settingsを設定
+        from azure.storage.blob import ContentSettings
+
         content_settings = ContentSettings(
             content_type="text/csv", content_encoding="utf-8"
         )
@@ -138,6 +142,13 @@ async def upload_csv_to_blob(
         )
 
         logger.info(f"CSVファイルがBlobにアップロードされました: {unique_filename}")
+        blob_log_writer.log(
+            "csv_upload",
+            CSV_CONTAINER_NAME,
+            unique_filename,
+            file_size=len(file_content),
+            content_type="text/csv",
+        )
 
         return {
             "blob_name": unique_filename,
@@ -149,6 +160,13 @@ async def upload_csv_to_blob(
 
     except Exception as e:
         logger.error(f"Blobアップロードエラー: {str(e)}")
+        blob_log_writer.log(
+            "csv_upload",
+            CSV_CONTAINER_NAME,
+            file.filename or "unknown",
+            "error",
+            error_message=e,
+        )
         raise HTTPException(
             status_code=500, detail=f"Blobアップロードに失敗しました: {str(e)}"
         )
@@ -314,6 +332,7 @@ async def get_csv_processing_status(blob_name: str):
         # Blobのメタデータを取得
         blob_properties = blob_client.get_blob_properties()
         metadata = blob_properties.metadata
+        blob_log_writer.log("csv_status", CSV_CONTAINER_NAME, blob_name)
 
         return {
             "blob_name": blob_name,
@@ -328,6 +347,9 @@ async def get_csv_processing_status(blob_name: str):
 
     except Exception as e:
         logger.error(f"ステータス取得エラー: {str(e)}")
+        blob_log_writer.log(
+            "csv_status", CSV_CONTAINER_NAME, blob_name, "error", error_message=e
+        )
         raise HTTPException(
             status_code=500, detail="処理ステータスの取得に失敗しました"
         )
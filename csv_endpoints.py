@@ -21,12 +21,13 @@ from models import (
     UserCSVData,
     AssignDataCSVData,
 )
-from db_crud import (
-    HistogramDataCRUD,
-    ProjectDataCRUD,
-    UserDataCRUD,
-    AssignDataCSVCRUD,
+from csv_processor import (
+    import_assign_data,
+    import_histogram_data,
+    import_project_data,
+    import_user_data,
 )
+from histogram_partitions import exchange_year_partitions
 import logging
 
 logger = logging.getLogger(__name__)
@@ -101,13 +102,13 @@ async def upload_histogram_csv(
                     status_code=422, detail=f"行 {row_num}: データ形式エラー - {str(e)}"
                 )
 
-        # 既存データを削除
-        await HistogramDataCRUD.clear_histogram_data(db)
-
-        # 新しいデータを一括挿入
-        records_processed = await HistogramDataCRUD.bulk_create_histogram_data(
-            db, validated_data
-        )
+        # 取り込む年のパーティションを差し替え（DDLのためトランザクションの前に実行）
+        # 取り込みが失敗した場合は差し替えたパーティションを元に戻す
+        async with exchange_year_partitions(validated_data) as exchanged_years:
+            # 取り込む年のデータのみを置き換え、他の年のデータは残す
+            records_processed = await import_histogram_data(
+                db, validated_data, exchanged_years
+            )
 
         return CSVUploadResponse(
             message="ヒストグラムデータが正常にアップロードされました",
@@ -152,13 +153,8 @@ async def upload_project_csv(
                     status_code=422, detail=f"行 {row_num}: データ形式エラー - {str(e)}"
                 )
 
-        # 既存データを削除
-        await ProjectDataCRUD.clear_project_data(db)
-
-        # 新しいデータを一括挿入
-        records_processed = await ProjectDataCRUD.bulk_create_project_data(
-            db, validated_data
-        )
+        # 削除と挿入を1トランザクションで実行
+        records_processed = await import_project_data(db, validated_data)
 
         return CSVUploadResponse(
             message="プロジェクトデータが正常にアップロードされました",
@@ -203,11 +199,8 @@ async def upload_user_csv(
                     status_code=422, detail=f"行 {row_num}: データ形式エラー - {str(e)}"
                 )
 
-        # 既存データを削除
-        await UserDataCRUD.clear_user_data(db)
-
-        # 新しいデータを一括挿入
-        records_processed = await UserDataCRUD.bulk_create_user_data(db, validated_data)
+        # 削除と挿入を1トランザクションで実行
+        records_processed = await import_user_data(db, validated_data)
 
         return CSVUploadResponse(
             message="ユーザーデータが正常にアップロードされました",
@@ -274,13 +267,8 @@ async def upload_assign_csv(
                     status_code=422, detail=f"行 {row_num}: データ形式エラー - {str(e)}"
                 )
 
-        # 既存データを削除
-        await AssignDataCSVCRUD.clear_assign_data(db)
-
-        # 新しいデータを一括挿入
-        records_processed = await AssignDataCSVCRUD.bulk_create_assign_data(
-            db, validated_data
-        )
+        # 削除と挿入を1トランザクションで実行
+        records_processed = await import_assign_data(db, validated_data)
 
         return CSVUploadResponse(
             message="アサインデータが正常にアップロードされました",
@@ -14,8 +14,8 @@ import json
 import logging
 from datetime import datetime
 from typing import List, Dict, Any
-from azure.storage.blob import BlobServiceClient
-from database import db_manager
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import session_scope, transaction
 from models import (
     HistogramCSVData,
     ProjectCSVData,
@@ -28,6 +28,11 @@ from db_crud import (
     UserDataCRUD,
     AssignDataCSVCRUD,
 )
+from histogram_engine import regenerate_source_histograms
+from histogram_partitions import exchange_year_partitions
+from db_retry import retry_transaction
+from blob_clients import get_service_client
+from blob_log_writer import blob_log_writer
 import os
 
 logger = logging.getLogger(__name__)
@@ -38,10 +43,10 @@ CSV_CONTAINER_NAME = os.getenv("CSV_CONTAINER_NAME", "csv-uploads")
 
 
 def get_blob_service_client():
-    """Blob Service Clientを取得"""
+    """Blob Service Clientを取得（ワーカー内で共有）"""
     if not AZURE_STORAGE_CONNECTION_STRING:
         raise Exception("Azure Storage connection string not configured")
-    return BlobServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
+    return get_service_client(AZURE_STORAGE_CONNECTION_STRING)
 
 
 async def download_csv_from_blob(blob_name: str) -> str:
@@ -54,13 +59,24 @@ async def download_csv_from_blob(blob_name: str) -> str:
 
         # Blobの内容をダウンロード
         blob_data = blob_client.download_blob()
-        csv_content = blob_data.readall().decode("utf-8-sig")
+        raw_content = blob_data.readall()
+        csv_content = raw_content.decode("utf-8-sig")
 
         logger.info(f"CSVファイルをダウンロードしました: {blob_name}")
+        blob_log_writer.log(
+            "csv_download",
+            CSV_CONTAINER_NAME,
+            blob_name,
+            file_size=len(raw_content),
+            content_type="text/csv",
+        )
         return csv_content
 
     except Exception as e:
         logger.error(f"CSVダウンロードエラー: {str(e)}")
+        blob_log_writer.log(
+            "csv_download", CSV_CONTAINER_NAME, blob_name, "error", error_message=e
+        )
         raise
 
 
@@ -110,6 +126,62 @@ async def parse_csv_content(csv_content: str) -> List[Dict[str, Any]]:
         raise
 
 
+# ==============================================================================
+# 取り込み（1トランザクション単位、一時的なDBエラー時は再試行）
+# ==============================================================================
+
+
+@retry_transaction
+async def import_histogram_data(
+    db: AsyncSession, histogram_list: List[Dict[str, Any]], exchanged_years=()
+) -> int:
+    """取り込む年のデータのみを置き換え、ヒストグラムを再計算"""
+    async with transaction(db):
+        records_processed = await HistogramDataCRUD.replace_years(
+            db, histogram_list, exchanged_years, commit=False
+        )
+        await regenerate_source_histograms(db, "histogram_data", commit=False)
+    return records_processed
+
+
+@retry_transaction
+async def import_project_data(
+    db: AsyncSession, project_list: List[Dict[str, Any]]
+) -> int:
+    """プロジェクトデータを全件置き換え"""
+    async with transaction(db):
+        await ProjectDataCRUD.clear_project_data(db, commit=False)
+        records_processed = await ProjectDataCRUD.bulk_create_project_data(
+            db, project_list, commit=False
+        )
+    return records_processed
+
+
+@retry_transaction
+async def import_user_data(db: AsyncSession, user_list: List[Dict[str, Any]]) -> int:
+    """ユーザーデータを全件置き換え"""
+    async with transaction(db):
+        await UserDataCRUD.clear_user_data(db, commit=False)
+        records_processed = await UserDataCRUD.bulk_create_user_data(
+            db, user_list, commit=False
+        )
+    return records_processed
+
+
+@retry_transaction
+async def import_assign_data(
+    db: AsyncSession, assign_list: List[Dict[str, Any]]
+) -> int:
+    """アサインデータを全件置き換え、ヒストグラムを再計算"""
+    async with transaction(db):
+        await AssignDataCSVCRUD.clear_assign_data(db, commit=False)
+        records_processed = await AssignDataCSVCRUD.bulk_create_assign_data(
+            db, assign_list, commit=False
+        )
+        await regenerate_source_histograms(db, "assign_data", commit=False)
+    return records_processed
+
+
 async def process_histogram_csv(blob_name: str, csv_content: str) -> int:
     """ヒストグラムCSVを処理"""
     try:
@@ -125,20 +197,14 @@ async def process_histogram_csv(blob_name: str, csv_content: str) -> int:
             except Exception as e:
                 raise ValueError(f"行 {row_num}: データ形式エラー - {str(e)}")
 
-        # データベース操作
-        async with db_manager.async_session_maker() as db:
-            try:
-                # 既存データを削除
-                await HistogramDataCRUD.clear_histogram_data(db)
-
-                # 新しいデータを一括挿入
-                records_processed = await HistogramDataCRUD.bulk_create_histogram_data(
-                    db, validated_data
+        # 取り込む年のパーティションを差し替え（DDLのためトランザクションの前に実行）
+        # 取り込みが失敗した場合は差し替えたパーティションを元に戻す
+        async with exchange_year_partitions(validated_data) as exchanged_years:
+            # 取り込む年のデータのみを置き換え、他の年のデータは残す
+            async with session_scope() as db:
+                records_processed = await import_histogram_data(
+                    db, validated_data, exchanged_years
                 )
-                await db.commit()
-            except Exception:
-                await db.rollback()
-                raise
 
         logger.info(f"ヒストグラムデータ処理完了: {records_processed}件")
         return records_processed
@@ -163,20 +229,9 @@ async def process_project_csv(blob_name: str, csv_content: str) -> int:
             except Exception as e:
                 raise ValueError(f"行 {row_num}: データ形式エラー - {str(e)}")
 
-        # データベース操作
-        async with db_manager.async_session_maker() as db:
-            try:
-                # 既存データを削除
-                await ProjectDataCRUD.clear_project_data(db)
-
-                # 新しいデータを一括挿入
-                records_processed = await ProjectDataCRUD.bulk_create_project_data(
-                    db, validated_data
-                )
-                await db.commit()
-            except Exception:
-                await db.rollback()
-                raise
+        # データベース操作（削除と挿入を1トランザクションで実行）
+        async with session_scope() as db:
+            records_processed = await import_project_data(db, validated_data)
 
         logger.info(f"プロジェクトデータ処理完了: {records_processed}件")
         return records_processed
@@ -201,20 +256,9 @@ async def process_user_csv(blob_name: str, csv_content: str) -> int:
             except Exception as e:
                 raise ValueError(f"行 {row_num}: データ形式エラー - {str(e)}")
 
-        # データベース操作
-        async with db_manager.async_session_maker() as db:
-            try:
-                # 既存データを削除
-                await UserDataCRUD.clear_user_data(db)
-
-                # 新しいデータを一括挿入
-                records_processed = await UserDataCRUD.bulk_create_user_data(
-                    db, validated_data
-                )
-                await db.commit()
-            except Exception:
-                await db.rollback()
-                raise
+        # データベース操作（削除と挿入を1トランザクションで実行）
+        async with session_scope() as db:
+            records_processed = await import_user_data(db, validated_data)
 
         logger.info(f"ユーザーデータ処理完了: {records_processed}件")
         return records_processed
@@ -261,20 +305,9 @@ async def process_assign_csv(blob_name: str, csv_content: str) -> int:
             except Exception as e:
                 raise ValueError(f"行 {row_num}: データ形式エラー - {str(e)}")
 
-        # データベース操作
-        async with db_manager.async_session_maker() as db:
-            try:
-                # 既存データを削除
-                await AssignDataCSVCRUD.clear_assign_data(db)
-
-                # 新しいデータを一括挿入
-                records_processed = await AssignDataCSVCRUD.bulk_create_assign_data(
-                    db, validated_data
-                )
-                await db.commit()
-            except Exception:
-                await db.rollback()
-                raise
+        # データベース操作（削除と挿入を1トランザクションで実行）
+        async with session_scope() as db:
+            records_processed = await import_assign_data(db, validated_data)
 
         logger.info(f"アサインデータ処理完了: {records_processed}件")
         return records_processed
@@ -0,0 +1,248 @@
+"""
+データセットの更新バージョンによる ETag と 304 応答
+
+このモジュールは以下の機能を提供します：
+- data_versions テーブルのバージョンのプロセス内キャッシュ（TTL 付き）
+- コミット時のキャッシュの破棄（DataVersionCRUD.bump を行ったセッションのみ）
+- バージョン・パス・クエリから作る強い ETag
+- If-None-Match が一致した場合に MySQL に問い合わせずに 304 を返す ASGI ミドルウェア
+
+Assign-Kun の画面は一覧を定期的に取得しますが、データが変わるのは CSV の
+取り込みと更新 API の実行時のみです。取り込み・更新の処理がバージョンを
+増やし、読み取り API はキャッシュしたバージョンから ETag を作ります。
+他のワーカーでの更新は、最大で DATA_VERSION_TTL 秒後に反映されます。
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime
+from typing import Dict, Mapping, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers, MutableHeaders
+
+from database import BUMPED_DATASETS_KEY, session_scope
+from static_assets import accepted_encodings, etag_matches
+import logging
+
+logger = logging.getLogger(__name__)
+
+# バージョンをキャッシュする秒数（他のワーカーでの更新が反映されるまでの最大時間）
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "2"))
+
+# ETag を付けるエンドポイントと、その応答が依存するデータセット
+# （データセットのないエンドポイントは固定のデモデータを返すため、ETag は salt と
+#   リクエストのみで決まり、バージョンの読み込みも不要）
+ETAG_ROUTES: Dict[str, Sequence[str]] = {
+    "/assign-kun/assigns": ["assign"],
+    "/assign-kun/histograms": [],
+    "/assign-kun/projects": [],
+    "/assign-kun/users": [],
+    "/assign-kun/informations": ["assign", "histogram"],
+    "/assign-kun/rollups": ["histogram"],
+}
+
+# 年の指定がない場合に当年を使うエンドポイント（年が変わると応答も変わる）
+CURRENT_YEAR_ROUTES = {"/assign-kun/assigns", "/assign-kun/informations"}
+
+# ETag の圧縮方式ごとの表現（GZipMiddleware などが付ける Content-Encoding）
+ETAG_ENCODINGS = ("gzip", "br")
+
+
+class DataVersionCache:
+    """データセットのバージョンのプロセス内キャッシュ"""
+
+    def __init__(self, ttl: float = DATA_VERSION_TTL):
+        self.ttl = ttl
+        self.versions: Optional[Dict[str, int]] = None
+        self.loaded_at = 0.0
+        # 読み込み中に破棄された場合、読み込んだ古い値を保存しない
+        self.generation = 0
+        self._lock = asyncio.Lock()
+
+    def fresh(self) -> Optional[Dict[str, int]]:
+        """TTL 内のキャッシュ（ない場合は None）"""
+        versions = self.versions
+        if versions is not None and time.monotonic() - self.loaded_at < self.ttl:
+            return versions
+        return None
+
+    def invalidate(self):
+        self.versions = None
+        self.generation += 1
+
+    async def load(self) -> Dict[str, int]:
+        """データベースからバージョンを読み込む"""
+        from db_crud import DataVersionCRUD
+
+        async with session_scope() as db:
+            return await DataVersionCRUD.get_all(db)
+
+    async def get(self) -> Dict[str, int]:
+        """バージョンを取得（TTL を過ぎていればデータベースから読み直す）"""
+        versions = self.fresh()
+        if versions is not None:
+            return versions
+        async with self._lock:
+            versions = self.fresh()
+            if versions is not None:
+                return versions
+            generation = self.generation
+            versions = await self.load()
+            if generation == self.generation:
+                self.versions = versions
+                self.loaded_at = time.monotonic()
+        return versions
+
+
+data_version_cache = DataVersionCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    """バージョンを増やしたトランザクションのコミット後にキャッシュを破棄"""
+    if session.info.pop(BUMPED_DATASETS_KEY, None):
+        data_version_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session):
+    session.info.pop(BUMPED_DATASETS_KEY, None)
+
+
+# ==============================================================================
+# ETag
+# ==============================================================================
+
+
+def make_etag(
+    datasets: Sequence[str],
+    versions: Mapping[str, int],
+    path: str,
+    query_string: bytes = b"",
+    salt: str = "",
+    year: Optional[int] = None,
+) -> str:
+    """データセットのバージョンとリクエストから強い ETag を作る
+
+    クエリ（基準月など）ごとに応答が異なるため、パスとクエリのハッシュを含める。
+    salt にはルーター構成のハッシュ（アプリのバージョンとルーターのソースから
+    求める）を渡し、デプロイで応答が変わった場合に古い ETag が一致しないようにする。
+    year には年の指定がない場合にエンドポイントが使う当年を渡す。
+    """
+    version_part = (
+        "-".join(f"{dataset}.{versions.get(dataset, 0)}" for dataset in datasets)
+        or "static"
+    )
+    request_key = f"{salt}|{year}|{path}?{query_string.decode('latin-1')}"
+    digest = hashlib.sha256(request_key.encode("utf-8")).hexdigest()[:16]
+    return f'"{version_part}-{digest}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """圧縮した表現の ETag（static_assets と同じく末尾に圧縮方式を付ける）"""
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def matching_etag(
+    if_none_match: Optional[str], etag: str, accept_encoding: str
+) -> Optional[str]:
+    """If-None-Match に一致する表現の ETag（一致しなければ None）
+
+    圧縮の有無は応答のサイズで決まるため、クライアントが受け付ける
+    圧縮方式の ETag も一致とみなす。
+    """
+    if not if_none_match:
+        return None
+    if etag_matches(if_none_match, etag):
+        return etag
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in ETAG_ENCODINGS:
+        candidate = encoded_etag(etag, encoding)
+        if encoding in accepted and etag_matches(if_none_match, candidate):
+            return candidate
+    return None
+
+
+class DataVersionMiddleware:
+    """データセットのバージョンから ETag を付け、一致すれば 304 を返す ASGI ミドルウェア
+
+    304 はエンドポイントを呼ばずに返すため、キャッシュが有効な間は
+    MySQL への問い合わせもルーターの読み込みも発生しない。
+    """
+
+    def __init__(
+        self,
+        app,
+        routes: Mapping[str, Sequence[str]] = ETAG_ROUTES,
+        cache: DataVersionCache = data_version_cache,
+        salt: str = "",
+    ):
+        self.app = app
+        self.routes = routes
+        self.cache = cache
+        self.salt = salt
+
+    async def __call__(self, scope, receive, send):
+        datasets = None
+        if scope["type"] == "http" and scope["method"] == "GET":
+            datasets = self.routes.get(scope["path"])
+        if datasets is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            versions = await self.cache.get() if datasets else {}
+        except Exception as e:
+            # バージョンが取得できない場合は ETag を付けずにそのまま処理する
+            logger.warning(f"データバージョンの取得に失敗しました: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        etag = make_etag(
+            datasets,
+            versions,
+            scope["path"],
+            scope.get("query_string", b""),
+            self.salt,
+            datetime.now().year if scope["path"] in CURRENT_YEAR_ROUTES else None,
+        )
+        matched = matching_etag(
+            request_headers.get("if-none-match"),
+            etag,
+            request_headers.get("accept-encoding", ""),
+        )
+        if matched is not None:
+            headers = MutableHeaders()
+            self.add_cache_headers(headers, matched)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": headers.raw,
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                encoding = headers.get("content-encoding")
+                self.add_cache_headers(
+                    headers, encoded_etag(etag, encoding) if encoding else etag
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+    @staticmethod
+    def add_cache_headers(headers: MutableHeaders, etag: str):
+        headers["ETag"] = etag
+        # 毎回 If-None-Match で再検証させる
+        headers.setdefault("Cache-Control", "no-cache")
+        headers.add_vary_header("Accept-Encoding")
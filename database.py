@@ -6,11 +6,67 @@ SQLAlchemy データベース接続管理
 """
 
 import os
-from typing import AsyncGenerator
+import re
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from sqlalchemy import text
-from db_models import Base
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from pool_metrics import instrument_pool
+
+# 接続プールの種類（null: Azure Functions 向けに毎回接続 / queue: 接続を再利用）
+DB_POOL_CLASS = os.getenv("DB_POOL_CLASS", "null")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def pool_options() -> dict:
+    """DB_POOL_CLASS に応じた create_async_engine のプール設定"""
+    if DB_POOL_CLASS == "queue":
+        return {
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        }
+    return {"poolclass": NullPool}  # Azure Functions用の設定
+
+
+# Alembic のリビジョンファイルの場所
+ALEMBIC_VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "alembic", "versions")
+
+REVISION_PATTERN = re.compile(r"^revision\s*(?::[^=]*)?=\s*['\"](\w+)['\"]", re.M)
+DOWN_REVISION_PATTERN = re.compile(r"^down_revision\s*(?::[^=]*)?=(.*)$", re.M)
+
+
+@lru_cache(maxsize=1)
+def alembic_head(versions_dir: str = ALEMBIC_VERSIONS_DIR) -> Optional[str]:
+    """同梱されたリビジョンの head（head が1つに定まらない場合は None）
+
+    起動を速くするため alembic は読み込まず、リビジョンファイルを直接読む
+    """
+    revisions, parents = set(), set()
+    try:
+        file_names = os.listdir(versions_dir)
+    except FileNotFoundError:
+        return None
+    for file_name in file_names:
+        if not file_name.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, file_name), encoding="utf-8") as f:
+            source = f.read()
+        revision = REVISION_PATTERN.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down_revision = DOWN_REVISION_PATTERN.search(source)
+        if down_revision:
+            parents.update(re.findall(r"['\"](\w+)['\"]", down_revision.group(1)))
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
 
 
 async def test_connection():
@@ -78,11 +134,13 @@ class DatabaseManager:
         # 非同期エンジンの作成
         self.engine = create_async_engine(
             database_url,
-            poolclass=NullPool,  # Azure Functions用の設定
+            **pool_options(),
             echo=False,  # SQLログの出力 (開発時はTrueに設定)
             pool_pre_ping=True,  # 接続の健全性チェック
             pool_recycle=3600,  # 接続の再利用時間 (1時間)
         )
+        # プールの取得待ち時間・接続数を計測
+        instrument_pool(self.engine)
 
         # セッションメーカーの作成
         self.async_session_maker = async_sessionmaker(
@@ -98,6 +156,9 @@ class DatabaseManager:
         if not self._initialized:
             self.initialize()
 
+        # モデル定義は重いため、スキーマ作成が必要な場合のみ読み込む
+        from db_models import Base
+
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
 
@@ -106,6 +167,8 @@ class DatabaseManager:
         if not self._initialized:
             self.initialize()
 
+        from db_models import Base
+
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
 
@@ -146,6 +209,47 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+# バージョンを増やしたデータセットを記録する session.info のキー
+# （db_crud が記録し、コミット後に data_versions がプロセス内のキャッシュを破棄する）
+BUMPED_DATASETS_KEY = "bumped_datasets"
+
+
+@asynccontextmanager
+async def transaction(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    既存セッション上の作業単位
+
+    ブロック内の書き込みを1トランザクションにまとめ、正常終了時に1回だけ
+    コミットし、例外時はロールバックします。ブロック内では CRUD メソッドを
+    commit=False で呼び出してください。
+
+    Yields:
+        AsyncSession: 渡されたセッション
+    """
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """
+    新しいセッションでの作業単位（バックグラウンド処理・取込処理用）
+
+    Yields:
+        AsyncSession: トランザクション内の非同期セッション
+    """
+    if not db_manager._initialized:
+        db_manager.initialize()
+
+    async with db_manager.async_session_maker() as session:
+        async with transaction(session):
+            yield session
+
+
 async def init_db():
     """データベースの初期化"""
     await db_manager.create_tables()
@@ -162,6 +266,43 @@ async def get_database():
     return await db_manager.get_session()
 
 
+async def check_connection() -> bool:
+    """共有エンジンで接続を確認（一時的なエンジンを作らない）"""
+    if not db_manager._initialized:
+        db_manager.initialize()
+    try:
+        async with db_manager.engine.connect() as conn:
+            result = await conn.execute(text("SELECT 1"))
+            return result.scalar() == 1
+    except Exception as e:
+        print(f"データベース接続エラー: {e}")
+        return False
+
+
+async def ensure_schema() -> Dict[str, Any]:
+    """スキーマが Alembic の head であれば create_all を省略し、そうでなければ作成
+
+    alembic_version の確認が接続確認を兼ねるため、起動時のクエリは通常1回のみ
+    """
+    if not db_manager._initialized:
+        db_manager.initialize()
+
+    head = alembic_head()
+    async with db_manager.engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            revision = result.scalar()
+        except (OperationalError, ProgrammingError):
+            # alembic_version がない（マイグレーション未実行）
+            revision = None
+
+    if head is not None and revision == head:
+        return {"revision": revision, "head": head, "create_all": False}
+
+    await db_manager.create_tables()
+    return {"revision": revision, "head": head, "create_all": True}
+
+
 # init_database関数の追加（test_mysql.pyで使用）
 async def init_database():
     """データベースの初期化 (test_mysql.py用)"""
@@ -7,11 +7,38 @@
 - AssignmentCRUD: 課題操作
 - NoticeCRUD: 通知操作
 - BlobLogCRUD: Blob ログ操作
+- RetentionArchiveCRUD: アーカイブ台帳操作
 - HistogramCRUD: ヒストグラム操作
+- AssignDataCRUD: 課題データ操作
+- HistogramDataCRUD / ProjectDataCRUD / UserDataCRUD / AssignDataCSVCRUD: CSV用操作
+- HistogramMonthValueCRUD: ヒストグラム月別値の集計
+- AssignUserTotalCRUD: ユーザー別アサイン集計の再計算
+- TeamAssignTotalCRUD: チーム別アサイン集計の再計算
+- HistogramRollupCRUD: ヒストグラムの月・四半期・年度別事前集計
+- BulkCRUD: 複数件の一括操作
+- DataVersionCRUD: データセットの更新バージョン操作
 """
 
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import (
+    JSON,
+    Integer,
+    Numeric,
+    and_,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from db_models import (
     User,
@@ -21,16 +48,138 @@ from db_models import (
     BlobLog,
     Histogram,
     AssignData,
+    AssignUserTotal,
+    DataVersion,
     HistogramData,
+    HistogramMonthValue,
+    HistogramRollup,
     ProjectData,
+    RetentionArchive,
+    TeamAssignTotal,
     UserData,
 )
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+from pagination import fetch_keyset_page
+from db_retry import retry_transaction
+from database import BUMPED_DATASETS_KEY
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# ユーザー別集計の対象となるアサインのカテゴリ列
+ASSIGN_CATEGORY_COLUMNS = [
+    "assin_execution",
+    "assin_maintenance",
+    "assin_prospect",
+    "assin_common_cost",
+    "assin_most_com_ps",
+    "assin_sales_mane",
+    "assin_investigation",
+    "assin_directly",
+    "assin_common",
+    "assin_sales_sup",
+]
+
+
+# 更新バージョンを管理するデータセット
+# （assign: アサイン・集計 / histogram: ヒストグラム・事前集計 / project, user: CSV マスタ）
+DATASETS = ("assign", "histogram", "project", "user")
+
+
+def shift_month(year: int, month: int, delta: int) -> Tuple[int, int]:
+    """年月を delta ヶ月ずらす（年跨ぎ対応）"""
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def month_range(
+    start_year: int, start_month: int, end_year: int, end_month: int
+) -> List[Tuple[int, int]]:
+    """開始年月から終了年月まで（両端含む）の (年, 月) リストを返す"""
+    start = start_year * 12 + (start_month - 1)
+    end = end_year * 12 + (end_month - 1)
+    return [(index // 12, index % 12 + 1) for index in range(start, end + 1)]
+
+
+def histogram_month_rows(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """ヒストグラムデータ1行を月別値の行（縦持ち）に展開"""
+    return [
+        {
+            "pj_br_num": data["histogram_pj_br_num"],
+            "ac_code": data["histogram_ac_code"],
+            "year": data["histogram_year"],
+            "month": month,
+            "value": data.get(f"histogram_{month}month") or 0,
+            "contract_form": data.get("histogram_pj_contract_form"),
+        }
+        for month in range(1, 13)
+    ]
+
+
+async def commit_or_flush(db: AsyncSession, commit: bool = True):
+    """commit=True ならコミット、False なら呼び出し元のトランザクションに委ねてフラッシュのみ"""
+    if commit:
+        await db.commit()
+    else:
+        await db.flush()
+
+
+def column_values(model, values: Dict[str, Any]) -> Dict[str, Any]:
+    """モデルの列に存在する項目のみを抽出"""
+    columns = model.__table__.columns
+    return {key: value for key, value in values.items() if key in columns}
+
+
+@retry_transaction
+async def update_by_id(
+    db: AsyncSession, model, row_id: int, values: Dict[str, Any], commit: bool = True
+):
+    """1文の UPDATE で更新し、更新後の行を返す（存在しない場合は None）
+
+    RETURNING 対応DBでは UPDATE 1文で完結する。MySQL は RETURNING 非対応で、
+    onupdate の列（updated_at）などサーバー側で決まる値があるため、
+    UPDATE の後に1回だけ読み直す（更新前の SELECT とリフレッシュを省いた2往復）。
+    """
+    values = column_values(model, values)
+    if not values:
+        return await db.get(model, row_id)
+
+    statement = (
+        update(model)
+        .where(model.id == row_id)
+        .values(values)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    if db.bind.dialect.update_returning:
+        # RETURNING 対応DBでは UPDATE の結果をそのまま返す
+        result = await db.execute(statement.returning(model))
+        row = result.scalar_one_or_none()
+    else:
+        # MySQL は RETURNING 非対応のため、該当行がある場合のみ読み直す
+        result = await db.execute(statement)
+        if result.rowcount == 0:
+            return None
+        result = await db.execute(
+            select(model)
+            .where(model.id == row_id)
+            .execution_options(populate_existing=True)
+        )
+        row = result.scalar_one()
+    await commit_or_flush(db, commit)
+    return row
+
+
+@retry_transaction
+async def delete_by_id(
+    db: AsyncSession, model, row_id: int, commit: bool = True
+) -> bool:
+    """1文の DELETE で削除し、削除できたかを返す"""
+    result = await db.execute(delete(model).where(model.id == row_id))
+    await commit_or_flush(db, commit)
+    return result.rowcount > 0
+
+
 # ==============================================================================
 # ユーザー操作クラス
 # ==============================================================================
@@ -41,12 +190,16 @@ class UserCRUD:
 
     @staticmethod
     async def create_user(
-        db: AsyncSession, name: str, email: str = None, score: int = 0
+        db: AsyncSession,
+        name: str,
+        email: str = None,
+        score: int = 0,
+        commit: bool = True,
     ) -> User:
         """ユーザーを作成"""
         user = User(name=name, email=email, score=score)
         db.add(user)
-        await db.commit()
+        await commit_or_flush(db, commit)
         await db.refresh(user)
         return user
 
@@ -64,35 +217,41 @@ class UserCRUD:
 
     @staticmethod
     async def get_users(
-        db: AsyncSession, skip: int = 0, limit: int = 100
+        db: AsyncSession, skip: int = 0, limit: int = 100, options: Sequence = ()
     ) -> List[User]:
         """ユーザー一覧を取得"""
-        result = await db.execute(select(User).offset(skip).limit(limit))
+        result = await db.execute(
+            select(User).options(*options).offset(skip).limit(limit)
+        )
         return result.scalars().all()
 
     @staticmethod
-    async def update_user(db: AsyncSession, user_id: int, **kwargs) -> Optional[User]:
+    async def get_users_page(
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        options: Sequence = (),
+    ) -> Tuple[List[User], Optional[str]]:
+        """ユーザー一覧をカーソルで取得（作成日時の降順）"""
+        return await fetch_keyset_page(
+            db, select(User).options(*options), User.created_at, User.id, cursor, limit
+        )
+
+    @staticmethod
+    async def update_user(
+        db: AsyncSession, user_id: int, commit: bool = True, **kwargs
+    ) -> Optional[User]:
         """ユーザーを更新"""
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        if user:
-            for key, value in kwargs.items():
-                if hasattr(user, key):
-                    setattr(user, key, value)
-            await db.commit()
-            await db.refresh(user)
-        return user
+        return await update_by_id(db, User, user_id, kwargs, commit)
 
     @staticmethod
-    async def delete_user(db: AsyncSession, user_id: int) -> bool:
-        """ユーザーを削除"""
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        if user:
-            await db.delete(user)
-            await db.commit()
-            return True
-        return False
+    async def delete_user(db: AsyncSession, user_id: int, commit: bool = True) -> bool:
+        """ユーザーを削除（Blob操作ログは残し、ユーザーIDを NULL にする）"""
+        # ORM の削除と同じく、参照している blob_logs.user_id を同じトランザクションで外す
+        await db.execute(
+            update(BlobLog).where(BlobLog.user_id == user_id).values(user_id=None)
+        )
+        return await delete_by_id(db, User, user_id, commit)
 
 
 # ==============================================================================
@@ -105,12 +264,16 @@ class ProjectCRUD:
 
     @staticmethod
     async def create_project(
-        db: AsyncSession, name: str, description: str = None, score: int = 0
+        db: AsyncSession,
+        name: str,
+        description: str = None,
+        score: int = 0,
+        commit: bool = True,
     ) -> Project:
         """プロジェクトを作成"""
         project = Project(name=name, description=description, score=score)
         db.add(project)
-        await db.commit()
+        await commit_or_flush(db, commit)
         await db.refresh(project)
         return project
 
@@ -132,42 +295,63 @@ class ProjectCRUD:
 
     @staticmethod
     async def get_projects(
-        db: AsyncSession, skip: int = 0, limit: int = 100
+        db: AsyncSession, skip: int = 0, limit: int = 100, options: Sequence = ()
     ) -> List[Project]:
-        """プロジェクト一覧を取得"""
+        """プロジェクト一覧を取得（関連は options で指定した場合のみ取得）"""
         result = await db.execute(
-            select(Project)
-            .options(selectinload(Project.assignments))
+            select(Project).options(*options).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_projects_page(
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        options: Sequence = (),
+    ) -> Tuple[List[Project], Optional[str]]:
+        """プロジェクト一覧をカーソルで取得（作成日時の降順）"""
+        return await fetch_keyset_page(
+            db,
+            select(Project).options(*options),
+            Project.created_at,
+            Project.id,
+            cursor,
+            limit,
+        )
+
+    @staticmethod
+    async def get_assignment_counts(
+        db: AsyncSession, skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """プロジェクトごとの課題数を取得（課題自体は読み込まない）"""
+        result = await db.execute(
+            select(
+                Project.id.label("project_id"),
+                Project.name,
+                func.count(Assignment.id).label("assignment_count"),
+            )
+            .outerjoin(Assignment, Assignment.project_id == Project.id)
+            .group_by(Project.id, Project.name)
+            .order_by(Project.id)
             .offset(skip)
             .limit(limit)
         )
-        return result.scalars().all()
+        return [dict(row._mapping) for row in result]
 
     @staticmethod
     async def update_project(
-        db: AsyncSession, project_id: int, **kwargs
+        db: AsyncSession, project_id: int, commit: bool = True, **kwargs
     ) -> Optional[Project]:
         """プロジェクトを更新"""
-        result = await db.execute(select(Project).where(Project.id == project_id))
-        project = result.scalar_one_or_none()
-        if project:
-            for key, value in kwargs.items():
-                if hasattr(project, key):
-                    setattr(project, key, value)
-            await db.commit()
-            await db.refresh(project)
-        return project
+        return await update_by_id(db, Project, project_id, kwargs, commit)
 
     @staticmethod
-    async def delete_project(db: AsyncSession, project_id: int) -> bool:
+    async def delete_project(
+        db: AsyncSession, project_id: int, commit: bool = True
+    ) -> bool:
         """プロジェクトを削除"""
-        result = await db.execute(select(Project).where(Project.id == project_id))
-        project = result.scalar_one_or_none()
-        if project:
-            await db.delete(project)
-            await db.commit()
-            return True
-        return False
+        return await delete_by_id(db, Project, project_id, commit)
 
 
 # ==============================================================================
@@ -179,11 +363,13 @@ class AssignmentCRUD:
     """課題操作"""
 
     @staticmethod
-    async def create_assignment(db: AsyncSession, **kwargs) -> Assignment:
+    async def create_assignment(
+        db: AsyncSession, commit: bool = True, **kwargs
+    ) -> Assignment:
         """課題を作成"""
         assignment = Assignment(**kwargs)
         db.add(assignment)
-        await db.commit()
+        await commit_or_flush(db, commit)
         await db.refresh(assignment)
         return assignment
 
@@ -199,17 +385,31 @@ class AssignmentCRUD:
 
     @staticmethod
     async def get_assignments(
-        db: AsyncSession, skip: int = 0, limit: int = 100
+        db: AsyncSession, skip: int = 0, limit: int = 100, options: Sequence = ()
     ) -> List[Assignment]:
-        """課題一覧を取得"""
+        """課題一覧を取得（関連は options で指定した場合のみ取得）"""
         result = await db.execute(
-            select(Assignment)
-            .options(selectinload(Assignment.project))
-            .offset(skip)
-            .limit(limit)
+            select(Assignment).options(*options).offset(skip).limit(limit)
         )
         return result.scalars().all()
 
+    @staticmethod
+    async def get_assignments_page(
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        options: Sequence = (),
+    ) -> Tuple[List[Assignment], Optional[str]]:
+        """課題一覧をカーソルで取得（作成日時の降順）"""
+        return await fetch_keyset_page(
+            db,
+            select(Assignment).options(*options),
+            Assignment.created_at,
+            Assignment.id,
+            cursor,
+            limit,
+        )
+
     @staticmethod
     async def get_assignments_by_project(
         db: AsyncSession, project_id: int
@@ -224,33 +424,17 @@ class AssignmentCRUD:
 
     @staticmethod
     async def update_assignment(
-        db: AsyncSession, assignment_id: int, **kwargs
+        db: AsyncSession, assignment_id: int, commit: bool = True, **kwargs
     ) -> Optional[Assignment]:
         """課題を更新"""
-        result = await db.execute(
-            select(Assignment).where(Assignment.id == assignment_id)
-        )
-        assignment = result.scalar_one_or_none()
-        if assignment:
-            for key, value in kwargs.items():
-                if hasattr(assignment, key):
-                    setattr(assignment, key, value)
-            await db.commit()
-            await db.refresh(assignment)
-        return assignment
+        return await update_by_id(db, Assignment, assignment_id, kwargs, commit)
 
     @staticmethod
-    async def delete_assignment(db: AsyncSession, assignment_id: int) -> bool:
+    async def delete_assignment(
+        db: AsyncSession, assignment_id: int, commit: bool = True
+    ) -> bool:
         """課題を削除"""
-        result = await db.execute(
-            select(Assignment).where(Assignment.id == assignment_id)
-        )
-        assignment = result.scalar_one_or_none()
-        if assignment:
-            await db.delete(assignment)
-            await db.commit()
-            return True
-        return False
+        return await delete_by_id(db, Assignment, assignment_id, commit)
 
 
 # ==============================================================================
@@ -262,11 +446,11 @@ class NoticeCRUD:
     """通知操作"""
 
     @staticmethod
-    async def create_notice(db: AsyncSession, **kwargs) -> Notice:
+    async def create_notice(db: AsyncSession, commit: bool = True, **kwargs) -> Notice:
         """通知を作成"""
         notice = Notice(**kwargs)
         db.add(notice)
-        await db.commit()
+        await commit_or_flush(db, commit)
         await db.refresh(notice)
         return notice
 
@@ -278,12 +462,12 @@ class NoticeCRUD:
 
     @staticmethod
     async def get_notices(
-        db: AsyncSession, skip: int = 0, limit: int = 100
+        db: AsyncSession, skip: int = 0, limit: int = 100, options: Sequence = ()
     ) -> List[Notice]:
-        """通知一覧を取得"""
+        """通知一覧を取得（関連は options で指定した場合のみ取得）"""
         result = await db.execute(
             select(Notice)
-            .options(selectinload(Notice.user))
+            .options(*options)
             .order_by(Notice.created_at.desc())
             .offset(skip)
             .limit(limit)
@@ -291,52 +475,76 @@ class NoticeCRUD:
         return result.scalars().all()
 
     @staticmethod
-    async def get_unread_notices(db: AsyncSession, user_id: int = None) -> List[Notice]:
+    async def get_notices_page(
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        options: Sequence = (),
+    ) -> Tuple[List[Notice], Optional[str]]:
+        """通知一覧をカーソルで取得（作成日時の降順）"""
+        return await fetch_keyset_page(
+            db,
+            select(Notice).options(*options),
+            Notice.created_at,
+            Notice.id,
+            cursor,
+            limit,
+        )
+
+    @staticmethod
+    async def get_unread_notices(
+        db: AsyncSession, user_id: int = None, limit: int = 100, options: Sequence = ()
+    ) -> List[Notice]:
         """未読通知を取得"""
-        query = select(Notice).where(Notice.is_read.is_(False))
+        query = select(Notice).options(*options).where(Notice.is_read.is_(False))
         if user_id:
             query = query.where(Notice.user_id == user_id)
-        query = query.order_by(Notice.created_at.desc())
+        query = query.order_by(Notice.created_at.desc(), Notice.id.desc()).limit(limit)
 
         result = await db.execute(query)
         return result.scalars().all()
 
     @staticmethod
-    async def mark_as_read(db: AsyncSession, notice_id: int) -> bool:
+    async def get_unread_notices_page(
+        db: AsyncSession,
+        user_id: int = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        options: Sequence = (),
+    ) -> Tuple[List[Notice], Optional[str]]:
+        """未読通知をカーソルで取得（作成日時の降順）"""
+        query = select(Notice).options(*options).where(Notice.is_read.is_(False))
+        if user_id:
+            query = query.where(Notice.user_id == user_id)
+        return await fetch_keyset_page(
+            db, query, Notice.created_at, Notice.id, cursor, limit
+        )
+
+    @staticmethod
+    @retry_transaction
+    async def mark_as_read(
+        db: AsyncSession, notice_id: int, commit: bool = True
+    ) -> bool:
         """通知を既読にする"""
-        result = await db.execute(select(Notice).where(Notice.id == notice_id))
-        notice = result.scalar_one_or_none()
-        if notice:
-            notice.is_read = True
-            await db.commit()
-            return True
-        return False
+        result = await db.execute(
+            update(Notice).where(Notice.id == notice_id).values(is_read=True)
+        )
+        await commit_or_flush(db, commit)
+        return result.rowcount > 0
 
     @staticmethod
     async def update_notice(
-        db: AsyncSession, notice_id: int, **kwargs
+        db: AsyncSession, notice_id: int, commit: bool = True, **kwargs
     ) -> Optional[Notice]:
         """通知を更新"""
-        result = await db.execute(select(Notice).where(Notice.id == notice_id))
-        notice = result.scalar_one_or_none()
-        if notice:
-            for key, value in kwargs.items():
-                if hasattr(notice, key):
-                    setattr(notice, key, value)
-            await db.commit()
-            await db.refresh(notice)
-        return notice
+        return await update_by_id(db, Notice, notice_id, kwargs, commit)
 
     @staticmethod
-    async def delete_notice(db: AsyncSession, notice_id: int) -> bool:
+    async def delete_notice(
+        db: AsyncSession, notice_id: int, commit: bool = True
+    ) -> bool:
         """通知を削除"""
-        result = await db.execute(select(Notice).where(Notice.id == notice_id))
-        notice = result.scalar_one_or_none()
-        if notice:
-            await db.delete(notice)
-            await db.commit()
-            return True
-        return False
+        return await delete_by_id(db, Notice, notice_id, commit)
 
 
 # ==============================================================================
@@ -348,14 +556,29 @@ class BlobLogCRUD:
     """Blobログ操作"""
 
     @staticmethod
-    async def create_blob_log(db: AsyncSession, **kwargs) -> BlobLog:
+    async def create_blob_log(
+        db: AsyncSession, commit: bool = True, **kwargs
+    ) -> BlobLog:
         """Blobログを作成"""
         blob_log = BlobLog(**kwargs)
         db.add(blob_log)
-        await db.commit()
+        await commit_or_flush(db, commit)
         await db.refresh(blob_log)
         return blob_log
 
+    @staticmethod
+    async def bulk_create_blob_logs(
+        db: AsyncSession, log_list: List[Dict[str, Any]], commit: bool = True
+    ) -> int:
+        """Blobログを一括作成（1回の executemany で挿入し、refresh は行わない）"""
+        if not log_list:
+            return 0
+        await db.execute(
+            insert(BlobLog), [column_values(BlobLog, data) for data in log_list]
+        )
+        await commit_or_flush(db, commit)
+        return len(log_list)
+
     @staticmethod
     async def get_blob_log_by_id(db: AsyncSession, log_id: int) -> Optional[BlobLog]:
         """IDでBlobログを取得"""
@@ -364,18 +587,35 @@ class BlobLogCRUD:
 
     @staticmethod
     async def get_blob_logs(
-        db: AsyncSession, skip: int = 0, limit: int = 100
+        db: AsyncSession, skip: int = 0, limit: int = 100, options: Sequence = ()
     ) -> List[BlobLog]:
-        """Blobログ一覧を取得"""
+        """Blobログ一覧を取得（関連は options で指定した場合のみ取得）"""
         result = await db.execute(
             select(BlobLog)
-            .options(selectinload(BlobLog.user))
+            .options(*options)
             .order_by(BlobLog.operation_time.desc())
             .offset(skip)
             .limit(limit)
         )
         return result.scalars().all()
 
+    @staticmethod
+    async def get_blob_logs_page(
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        options: Sequence = (),
+    ) -> Tuple[List[BlobLog], Optional[str]]:
+        """Blobログ一覧をカーソルで取得（操作時間の降順）"""
+        return await fetch_keyset_page(
+            db,
+            select(BlobLog).options(*options),
+            BlobLog.operation_time,
+            BlobLog.id,
+            cursor,
+            limit,
+        )
+
     @staticmethod
     async def get_blob_logs_by_container(
         db: AsyncSession, container_name: str
@@ -390,29 +630,51 @@ class BlobLogCRUD:
 
     @staticmethod
     async def update_blob_log(
-        db: AsyncSession, log_id: int, **kwargs
+        db: AsyncSession, log_id: int, commit: bool = True, **kwargs
     ) -> Optional[BlobLog]:
         """Blobログを更新"""
-        result = await db.execute(select(BlobLog).where(BlobLog.id == log_id))
-        blob_log = result.scalar_one_or_none()
-        if blob_log:
-            for key, value in kwargs.items():
-                if hasattr(blob_log, key):
-                    setattr(blob_log, key, value)
-            await db.commit()
-            await db.refresh(blob_log)
-        return blob_log
+        return await update_by_id(db, BlobLog, log_id, kwargs, commit)
 
     @staticmethod
-    async def delete_blob_log(db: AsyncSession, log_id: int) -> bool:
+    async def delete_blob_log(
+        db: AsyncSession, log_id: int, commit: bool = True
+    ) -> bool:
         """Blobログを削除"""
-        result = await db.execute(select(BlobLog).where(BlobLog.id == log_id))
-        blob_log = result.scalar_one_or_none()
-        if blob_log:
-            await db.delete(blob_log)
-            await db.commit()
-            return True
-        return False
+        return await delete_by_id(db, BlobLog, log_id, commit)
+
+
+class RetentionArchiveCRUD:
+    """アーカイブ台帳操作"""
+
+    @staticmethod
+    async def create_archive(
+        db: AsyncSession, commit: bool = True, **kwargs
+    ) -> RetentionArchive:
+        """アーカイブを登録"""
+        archive = RetentionArchive(**kwargs)
+        db.add(archive)
+        await commit_or_flush(db, commit)
+        return archive
+
+    @staticmethod
+    async def get_archives(
+        db: AsyncSession,
+        table_name: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[RetentionArchive]:
+        """期間 [start, end) と重なるアーカイブを古い順に取得"""
+        query = select(RetentionArchive)
+        if table_name is not None:
+            query = query.where(RetentionArchive.table_name == table_name)
+        if start is not None:
+            query = query.where(RetentionArchive.max_time >= start)
+        if end is not None:
+            query = query.where(RetentionArchive.min_time < end)
+        result = await db.execute(
+            query.order_by(RetentionArchive.min_time, RetentionArchive.id)
+        )
+        return result.scalars().all()
 
 
 # ==============================================================================
@@ -424,16 +686,20 @@ class HistogramCRUD:
     """ヒストグラム操作"""
 
     @staticmethod
-    async def create_histogram(db: AsyncSession, **kwargs) -> Histogram:
+    async def create_histogram(
+        db: AsyncSession, commit: bool = True, **kwargs
+    ) -> Histogram:
         """ヒストグラムを作成"""
         try:
             histogram = Histogram(**kwargs)
             db.add(histogram)
-            await db.commit()
+            await commit_or_flush(db, commit)
             await db.refresh(histogram)
             return histogram
         except Exception as e:
-            await db.rollback()
+            # 呼び出し元のトランザクションの途中（commit=False）ではロールバックしない
+            if commit:
+                await db.rollback()
             raise e
 
     @staticmethod
@@ -446,17 +712,35 @@ class HistogramCRUD:
 
     @staticmethod
     async def get_histograms(
-        db: AsyncSession, skip: int = 0, limit: int = 100
+        db: AsyncSession, skip: int = 0, limit: int = 100, options: Sequence = ()
     ) -> List[Histogram]:
         """ヒストグラム一覧を取得"""
         result = await db.execute(
             select(Histogram)
+            .options(*options)
             .order_by(Histogram.created_at.desc())
             .offset(skip)
             .limit(limit)
         )
         return result.scalars().all()
 
+    @staticmethod
+    async def get_histograms_page(
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        options: Sequence = (),
+    ) -> Tuple[List[Histogram], Optional[str]]:
+        """ヒストグラム一覧をカーソルで取得（作成日時の降順）"""
+        return await fetch_keyset_page(
+            db,
+            select(Histogram).options(*options),
+            Histogram.created_at,
+            Histogram.id,
+            cursor,
+            limit,
+        )
+
     @staticmethod
     async def get_histograms_by_resource(
         db: AsyncSession, resource_type: str, resource_id: int
@@ -472,73 +756,96 @@ class HistogramCRUD:
 
     @staticmethod
     async def get_histogram_stats(
-        db: AsyncSession, resource_type: str, resource_id: int
-    ):
-        """ヒストグラム統計を取得"""
-        histograms = await HistogramCRUD.get_histograms_by_resource(
-            db, resource_type, resource_id
+        db: AsyncSession,
+        resource_type: str,
+        resource_id: int,
+        include_bins: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        """ヒストグラム統計を取得（集計はSQLで実行）"""
+        stats = await HistogramCRUD.get_histogram_stats_many(
+            db, [(resource_type, resource_id)], include_bins
         )
+        return stats[0] if stats else None
 
-        if not histograms:
-            return None
-
-        total_count = sum(h.count for h in histograms)
-        bin_count = len(histograms)
-        values = [h.bin_value for h in histograms]
-        average_value = sum(values) / len(values) if values else 0
-        min_value = min(values) if values else 0
-        max_value = max(values) if values else 0
-
-        return {
-            "resource_type": resource_type,
-            "resource_id": resource_id,
-            "total_count": total_count,
-            "bin_count": bin_count,
-            "average_value": average_value,
-            "min_value": min_value,
-            "max_value": max_value,
-            "histograms": histograms,
+    @staticmethod
+    async def get_histogram_stats_many(
+        db: AsyncSession,
+        resources: Sequence[Tuple[str, int]],
+        include_bins: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """複数リソースのヒストグラム統計を1回のGROUP BYで取得（指定順、該当なしは除外）"""
+        keys = list(dict.fromkeys((str(t), int(i)) for t, i in resources))
+        if not keys:
+            return []
+
+        resource_key = tuple_(Histogram.resource_type, Histogram.resource_id)
+        result = await db.execute(
+            select(
+                Histogram.resource_type,
+                Histogram.resource_id,
+                func.coalesce(func.sum(Histogram.count), 0).label("total_count"),
+                func.count().label("bin_count"),
+                func.avg(Histogram.bin_value).label("average_value"),
+                func.min(Histogram.bin_value).label("min_value"),
+                func.max(Histogram.bin_value).label("max_value"),
+            )
+            .where(resource_key.in_(keys))
+            .group_by(Histogram.resource_type, Histogram.resource_id)
+        )
+        stats = {
+            (row.resource_type, row.resource_id): {
+                "resource_type": row.resource_type,
+                "resource_id": row.resource_id,
+                "total_count": int(row.total_count),
+                "bin_count": row.bin_count,
+                "average_value": float(row.average_value or 0),
+                "min_value": row.min_value,
+                "max_value": row.max_value,
+                "histograms": None,
+            }
+            for row in result.all()
         }
 
+        if include_bins and stats:
+            # ビンは必要な場合のみ、対象リソース分をまとめて1回で取得
+            result = await db.execute(
+                select(Histogram)
+                .where(resource_key.in_(list(stats)))
+                .order_by(Histogram.created_at.desc(), Histogram.id.desc())
+            )
+            for entry in stats.values():
+                entry["histograms"] = []
+            for histogram in result.scalars().all():
+                stats[(histogram.resource_type, histogram.resource_id)][
+                    "histograms"
+                ].append(histogram)
+
+        return [stats[key] for key in keys if key in stats]
+
     @staticmethod
     async def update_histogram(
-        db: AsyncSession, histogram_id: int, **kwargs
+        db: AsyncSession, histogram_id: int, commit: bool = True, **kwargs
     ) -> Optional[Histogram]:
         """ヒストグラムを更新"""
         try:
-            result = await db.execute(
-                select(Histogram).where(Histogram.id == histogram_id)
-            )
-            histogram = result.scalar_one_or_none()
-
-            if histogram:
-                for key, value in kwargs.items():
-                    if hasattr(histogram, key):
-                        setattr(histogram, key, value)
-                await db.commit()
-                await db.refresh(histogram)
-                return histogram
-            return None
+            return await update_by_id(db, Histogram, histogram_id, kwargs, commit)
         except Exception as e:
-            await db.rollback()
+            # 呼び出し元のトランザクションの途中（commit=False）ではロールバックしない
+            if commit:
+                await db.rollback()
             raise e
 
     @staticmethod
-    async def delete_histogram(db: AsyncSession, histogram_id: int) -> bool:
+    async def delete_histogram(
+        db: AsyncSession, histogram_id: int, commit: bool = True
+    ) -> bool:
         """ヒストグラムを削除"""
         try:
-            result = await db.execute(
-                select(Histogram).where(Histogram.id == histogram_id)
-            )
-            histogram = result.scalar_one_or_none()
-
-            if histogram:
-                await db.delete(histogram)
-                await db.commit()
-                return True
-            return False
+            return await delete_by_id(db, Histogram, histogram_id, commit)
         except Exception as e:
-            await db.rollback()
+            # 呼び出し元のトランザクションの途中（commit=False）ではロールバックしない
+            if commit:
+                await db.rollback()
             raise e
 
 
@@ -551,11 +858,18 @@ class AssignDataCRUD:
     """課題データ操作"""
 
     @staticmethod
-    async def create_assign_data(db: AsyncSession, **kwargs) -> AssignData:
+    async def create_assign_data(
+        db: AsyncSession, commit: bool = True, **kwargs
+    ) -> AssignData:
         """課題データを作成"""
         assign_data = AssignData(**kwargs)
         db.add(assign_data)
-        await db.commit()
+        await db.flush()
+        # ユーザー別集計も同じトランザクションで更新
+        await AssignUserTotalCRUD.refresh_users(
+            db, [assign_data.user_name], commit=False
+        )
+        await commit_or_flush(db, commit)
         await db.refresh(assign_data)
         return assign_data
 
@@ -577,6 +891,15 @@ class AssignDataCRUD:
         result = await db.execute(select(AssignData).offset(skip).limit(limit))
         return result.scalars().all()
 
+    @staticmethod
+    async def get_assign_data_page(
+        db: AsyncSession, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[AssignData], Optional[str]]:
+        """課題データ一覧をカーソルで取得（作成日時の降順）"""
+        return await fetch_keyset_page(
+            db, select(AssignData), AssignData.created_at, AssignData.id, cursor, limit
+        )
+
     @staticmethod
     async def get_assign_data_by_user_name(
         db: AsyncSession, user_name: str
@@ -591,33 +914,483 @@ class AssignDataCRUD:
 
     @staticmethod
     async def update_assign_data(
-        db: AsyncSession, assign_data_id: int, **kwargs
+        db: AsyncSession, assign_data_id: int, commit: bool = True, **kwargs
     ) -> Optional[AssignData]:
         """課題データを更新"""
-        result = await db.execute(
-            select(AssignData).where(AssignData.id == assign_data_id)
+        # ユーザー名が変わる場合は移動元ユーザーの集計も更新する
+        previous_user_name = None
+        if "user_name" in kwargs:
+            result = await db.execute(
+                select(AssignData.user_name).where(AssignData.id == assign_data_id)
+            )
+            previous_user_name = result.scalar_one_or_none()
+
+        assign_data = await update_by_id(
+            db, AssignData, assign_data_id, kwargs, commit=False
         )
-        assign_data = result.scalar_one_or_none()
-        if assign_data:
-            for key, value in kwargs.items():
-                if hasattr(assign_data, key):
-                    setattr(assign_data, key, value)
-            await db.commit()
-            await db.refresh(assign_data)
+        if assign_data is None:
+            return None
+
+        if set(kwargs) & {"user_name", "assin_project_code", *ASSIGN_CATEGORY_COLUMNS}:
+            await AssignUserTotalCRUD.refresh_users(
+                db,
+                {assign_data.user_name, previous_user_name} - {None},
+                commit=False,
+            )
+        else:
+            # 集計に影響しない更新（month_data など）も /assigns?month= の応答を変える
+            await DataVersionCRUD.bump(db, ["assign"], commit=False)
+        await commit_or_flush(db, commit)
         return assign_data
 
     @staticmethod
-    async def delete_assign_data(db: AsyncSession, assign_data_id: int) -> bool:
+    async def delete_assign_data(
+        db: AsyncSession, assign_data_id: int, commit: bool = True
+    ) -> bool:
         """課題データを削除"""
         result = await db.execute(
-            select(AssignData).where(AssignData.id == assign_data_id)
+            select(AssignData.user_name).where(AssignData.id == assign_data_id)
+        )
+        user_name = result.scalar_one_or_none()
+        if user_name is None:
+            return False
+
+        await db.execute(delete(AssignData).where(AssignData.id == assign_data_id))
+        await AssignUserTotalCRUD.refresh_users(db, [user_name], commit=False)
+        await commit_or_flush(db, commit)
+        return True
+
+
+# ==============================================================================
+# アサイン集計操作クラス
+# ==============================================================================
+
+
+def assign_user_totals_query(user_names: Optional[Sequence[str]] = None):
+    """assign_data からユーザー別集計行を作る SELECT"""
+    query = select(
+        AssignData.user_name,
+        *[
+            func.coalesce(func.sum(getattr(AssignData, column)), 0).label(
+                f"{column}_total"
+            )
+            for column in ASSIGN_CATEGORY_COLUMNS
+        ],
+        func.json_arrayagg(
+            func.json_object(
+                "assin_project_code",
+                AssignData.assin_project_code,
+                "assin_execution",
+                AssignData.assin_execution,
+                "assin_directly",
+                AssignData.assin_directly,
+            ),
+            type_=JSON,
+        ).label("projects"),
+        func.count().label("row_count"),
+        func.now().label("updated_at"),
+    ).group_by(AssignData.user_name)
+    if user_names is not None:
+        query = query.where(AssignData.user_name.in_(user_names))
+    return query
+
+
+# month_data に保持している月別スロット
+MONTH_DATA_SLOTS = ["previous_month", "current_month", "next_month"]
+
+
+def month_slot_value(slot: str, key: str):
+    """month_data のスロットの値（キーがない場合・JSON の null はどちらも NULL）"""
+    return func.nullif(
+        func.json_unquote(func.json_extract(AssignData.month_data, f"$.{slot}.{key}")),
+        "null",
+    )
+
+
+def month_slot_total(slot: str, year: int, month: int):
+    """month_data のスロットが指定年月に該当すればその total_assin、なければ 0"""
+    slot_year = month_slot_value(slot, "year")
+    return case(
+        (
+            and_(
+                cast(month_slot_value(slot, "month"), Integer) == month,
+                # 年を持たない month_data は月のみで照合する
+                or_(slot_year.is_(None), cast(slot_year, Integer) == year),
+            ),
+            func.coalesce(
+                cast(month_slot_value(slot, "total_assin"), Numeric(12, 2)), 0
+            ),
+        ),
+        else_=0,
+    )
+
+
+def assign_month_window_query(year: int, month: int):
+    """ユーザー別集計に基準月の前月・当月・翌月の合計を加えた SELECT"""
+    windows = {
+        "previous_month": shift_month(year, month, -1),
+        "current_month": (year, month),
+        "next_month": shift_month(year, month, 1),
+    }
+    query = assign_user_totals_query()
+    for window, (window_year, window_month) in windows.items():
+        slot_totals = [
+            month_slot_total(slot, window_year, window_month)
+            for slot in MONTH_DATA_SLOTS
+        ]
+        query = query.add_columns(
+            literal(window_month).label(f"{window}_month"),
+            func.coalesce(
+                func.sum(slot_totals[0] + slot_totals[1] + slot_totals[2]), 0
+            ).label(f"{window}_total_assin"),
+        )
+    return query.order_by(AssignData.user_name)
+
+
+ASSIGN_USER_TOTAL_COLUMNS = [
+    "user_name",
+    *[f"{column}_total" for column in ASSIGN_CATEGORY_COLUMNS],
+    "projects",
+    "row_count",
+    "updated_at",
+]
+
+
+class AssignUserTotalCRUD:
+    """ユーザー別アサイン集計操作"""
+
+    @staticmethod
+    async def get_all(db: AsyncSession) -> List[AssignUserTotal]:
+        """全ユーザーの集計を取得"""
+        result = await db.execute(
+            select(AssignUserTotal).order_by(AssignUserTotal.user_name)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_month_window(db: AsyncSession, year: int, month: int) -> List[Any]:
+        """基準月の前後1ヶ月を含むユーザー別集計を assign_data から直接取得"""
+        result = await db.execute(assign_month_window_query(year, month))
+        return result.all()
+
+    @staticmethod
+    @retry_transaction
+    async def rebuild(db: AsyncSession, commit: bool = True) -> int:
+        """集計テーブル全体を assign_data から再計算（INSERT ... SELECT）"""
+        await db.execute(delete(AssignUserTotal))
+        result = await db.execute(
+            insert(AssignUserTotal).from_select(
+                ASSIGN_USER_TOTAL_COLUMNS, assign_user_totals_query()
+            )
         )
-        assign_data = result.scalar_one_or_none()
-        if assign_data:
-            await db.delete(assign_data)
-            await db.commit()
-            return True
-        return False
+        await TeamAssignTotalCRUD.rebuild(db, commit=False)
+        await commit_or_flush(db, commit)
+        return result.rowcount
+
+    @staticmethod
+    async def refresh_users(
+        db: AsyncSession, user_names: Sequence[str], commit: bool = True
+    ) -> None:
+        """指定ユーザーの集計行のみを再計算"""
+        user_names = list(user_names)
+        if not user_names:
+            return
+        await db.execute(
+            delete(AssignUserTotal).where(AssignUserTotal.user_name.in_(user_names))
+        )
+        # assign_data が残っていないユーザーは集計行も削除されたままになる
+        await db.execute(
+            insert(AssignUserTotal).from_select(
+                ASSIGN_USER_TOTAL_COLUMNS, assign_user_totals_query(user_names)
+            )
+        )
+        await TeamAssignTotalCRUD.refresh_users(db, user_names, commit=False)
+        await commit_or_flush(db, commit)
+
+
+# チーム未登録のユーザーの集計先
+UNASSIGNED_TEAM = "未所属"
+
+
+def user_teams_subquery():
+    """ユーザー名ごとの所属チーム"""
+    # user_data は同名ユーザーが複数行になりうるため1ユーザー1チームに絞る
+    return (
+        select(UserData.user_name, func.min(UserData.user_team).label("user_team"))
+        .group_by(UserData.user_name)
+        .subquery()
+    )
+
+
+def team_assign_totals_query(teams: Optional[Sequence[str]] = None):
+    """assign_user_totals から所属チーム別の集計行を作る SELECT"""
+    user_teams = user_teams_subquery()
+    team = func.coalesce(user_teams.c.user_team, UNASSIGNED_TEAM)
+    query = (
+        select(
+            team.label("team"),
+            *[
+                func.coalesce(
+                    func.sum(getattr(AssignUserTotal, f"{column}_total")), 0
+                ).label(f"{column}_total")
+                for column in ASSIGN_CATEGORY_COLUMNS
+            ],
+            func.count().label("user_count"),
+            func.now().label("updated_at"),
+        )
+        .select_from(AssignUserTotal)
+        .outerjoin(user_teams, user_teams.c.user_name == AssignUserTotal.user_name)
+        .group_by(team)
+    )
+    if teams is not None:
+        query = query.where(team.in_(teams))
+    return query
+
+
+TEAM_ASSIGN_TOTAL_COLUMNS = [
+    "team",
+    *[f"{column}_total" for column in ASSIGN_CATEGORY_COLUMNS],
+    "user_count",
+    "updated_at",
+]
+
+
+class TeamAssignTotalCRUD:
+    """チーム別アサイン集計操作"""
+
+    @staticmethod
+    @retry_transaction
+    async def rebuild(db: AsyncSession, commit: bool = True) -> int:
+        """チーム別集計をユーザー別集計から再計算（INSERT ... SELECT）"""
+        await db.execute(delete(TeamAssignTotal))
+        result = await db.execute(
+            insert(TeamAssignTotal).from_select(
+                TEAM_ASSIGN_TOTAL_COLUMNS, team_assign_totals_query()
+            )
+        )
+        # アサイン・ユーザーの変更は全てこの再計算か refresh_users を通る
+        await DataVersionCRUD.bump(db, ["assign"], commit=False)
+        await commit_or_flush(db, commit)
+        return result.rowcount
+
+    @staticmethod
+    async def refresh_users(
+        db: AsyncSession, user_names: Sequence[str], commit: bool = True
+    ) -> None:
+        """指定ユーザーの所属チームの集計行のみを再計算"""
+        user_names = list(user_names)
+        if not user_names:
+            return
+        user_teams = user_teams_subquery()
+        result = await db.execute(
+            select(user_teams.c.user_name, user_teams.c.user_team).where(
+                user_teams.c.user_name.in_(user_names)
+            )
+        )
+        found = dict(result.all())
+        teams = {
+            UNASSIGNED_TEAM if found.get(name) is None else found[name]
+            for name in user_names
+        }
+
+        await db.execute(delete(TeamAssignTotal).where(TeamAssignTotal.team.in_(teams)))
+        # 集計対象のユーザーがいなくなったチームは集計行も削除されたままになる
+        await db.execute(
+            insert(TeamAssignTotal).from_select(
+                TEAM_ASSIGN_TOTAL_COLUMNS, team_assign_totals_query(sorted(teams))
+            )
+        )
+        await DataVersionCRUD.bump(db, ["assign"], commit=False)
+        await commit_or_flush(db, commit)
+
+    @staticmethod
+    async def get_totals(
+        db: AsyncSession, team: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """全チーム（team 指定時はそのチーム）のカテゴリ別合計を取得"""
+        query = select(
+            *[
+                func.coalesce(
+                    func.sum(getattr(TeamAssignTotal, f"{column}_total")), 0
+                ).label(column)
+                for column in ASSIGN_CATEGORY_COLUMNS
+            ]
+        )
+        if team is not None:
+            query = query.where(TeamAssignTotal.team == team)
+        result = await db.execute(query)
+        return dict(result.one()._mapping)
+
+
+# ==============================================================================
+# 一括操作クラス
+# ==============================================================================
+
+
+class BulkCRUD:
+    """複数件の一括操作（1件ずつではなく1文で処理）"""
+
+    @staticmethod
+    async def get_by_ids(db: AsyncSession, model, ids: List[int]) -> List[Any]:
+        """ID一覧でまとめて取得（ID昇順）"""
+        if not ids:
+            return []
+        result = await db.execute(
+            select(model).where(model.id.in_(ids)).order_by(model.id)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_existing_ids(db: AsyncSession, model, ids: List[int]) -> set:
+        """ID一覧のうち存在するものを取得"""
+        if not ids:
+            return set()
+        result = await db.execute(select(model.id).where(model.id.in_(ids)))
+        return set(result.scalars().all())
+
+    @staticmethod
+    async def get_existing_values(db: AsyncSession, column, values: List[Any]) -> set:
+        """値一覧のうち既に登録されているものを取得（重複チェック用）"""
+        if not values:
+            return set()
+        result = await db.execute(select(column).where(column.in_(values)))
+        return set(result.scalars().all())
+
+    @staticmethod
+    async def insert_rows(db: AsyncSession, model, rows: List[Dict[str, Any]]):
+        """行を作成し、採番されたIDを rows の順に返す
+
+        MySQL では複数行INSERTの1文で作成し、同じトランザクション内でIDを読み直す。
+        INSERT の前に一貫性読み取りのスナップショットを確定させるため（REPEATABLE READ）、
+        id >= 先頭行のID で読めるのはこの INSERT の行のみとなり、他の INSERT と採番が
+        混ざっても（innodb_autoinc_lock_mode=2）ID順は VALUES の順と一致する。
+        """
+        if db.bind.dialect.name != "mysql":
+            # lastrowid が先頭行のIDにならないDB（SQLite など）は1行ずつ作成
+            ids = []
+            for row in rows:
+                result = await db.execute(insert(model).values(row))
+                ids.append(result.inserted_primary_key[0])
+            return ids
+
+        await db.execute(select(model.id).limit(1))
+        result = await db.execute(insert(model).values(rows))
+        result = await db.execute(
+            select(model.id)
+            .where(model.id >= result.lastrowid)
+            .order_by(model.id)
+            .limit(len(rows) + 1)
+        )
+        ids = list(result.scalars().all())
+        if len(ids) != len(rows):
+            # READ COMMITTED では他のトランザクションの行も読めるため特定できない
+            raise RuntimeError(
+                f"一括作成した {model.__tablename__} のIDを特定できません"
+            )
+        return ids
+
+    @staticmethod
+    async def insert_many(
+        db: AsyncSession, model, rows: List[Dict[str, Any]], commit: bool = True
+    ) -> List[Optional[int]]:
+        """一括作成し、採番されたIDを rows の順に返す（制約違反の行は None）
+
+        一意制約・外部キー違反の行があれば1行ずつ作成し直し、違反した行のみ失敗にする。
+        """
+        if not rows:
+            return []
+        try:
+            async with db.begin_nested():
+                ids = await BulkCRUD.insert_rows(db, model, rows)
+        except IntegrityError:
+            ids = []
+            for row in rows:
+                try:
+                    async with db.begin_nested():
+                        result = await db.execute(insert(model).values(row))
+                    ids.append(result.inserted_primary_key[0])
+                except IntegrityError:
+                    ids.append(None)
+        await commit_or_flush(db, commit)
+        return ids
+
+    @staticmethod
+    def case_update_values(model, targets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """列ごとに id -> 値 の CASE 式を組み立てる（指定のない行は現在値のまま）"""
+        values = {}
+        for key in {key for item in targets for key in item if key != "id"}:
+            column = getattr(model, key, None)
+            if column is None:
+                continue
+            whens = {
+                item["id"]: literal(item[key], type_=column.type)
+                for item in targets
+                if key in item
+            }
+            values[key] = case(whens, value=model.id, else_=column)
+        return values
+
+    @staticmethod
+    @retry_transaction
+    async def update_many(
+        db: AsyncSession, model, updates: List[Dict[str, Any]], commit: bool = True
+    ) -> Tuple[set, set]:
+        """UPDATE ... CASE で一括更新し、更新対象となったIDと制約違反で更新できなかったIDを返す"""
+        existing_ids = await BulkCRUD.get_existing_ids(
+            db, model, [item["id"] for item in updates]
+        )
+        targets = [item for item in updates if item["id"] in existing_ids]
+        failed_ids = set()
+
+        values = BulkCRUD.case_update_values(model, targets)
+        if values:
+            try:
+                async with db.begin_nested():
+                    await db.execute(
+                        update(model).where(model.id.in_(existing_ids)).values(values)
+                    )
+            except IntegrityError:
+                # 一意制約・外部キー違反の行があれば1件ずつ更新し、その行のみ失敗にする
+                for item in targets:
+                    row_values = column_values(
+                        model, {k: v for k, v in item.items() if k != "id"}
+                    )
+                    if not row_values:
+                        continue
+                    try:
+                        async with db.begin_nested():
+                            await db.execute(
+                                update(model)
+                                .where(model.id == item["id"])
+                                .values(row_values)
+                            )
+                    except IntegrityError:
+                        failed_ids.add(item["id"])
+            await commit_or_flush(db, commit)
+        return existing_ids - failed_ids, failed_ids
+
+    @staticmethod
+    @retry_transaction
+    async def delete_many(
+        db: AsyncSession, model, ids: List[int], commit: bool = True
+    ) -> Tuple[set, set]:
+        """DELETE ... IN で一括削除し、削除したIDと参照されていて削除できなかったIDを返す"""
+        existing_ids = await BulkCRUD.get_existing_ids(db, model, ids)
+        referenced_ids = set()
+        if existing_ids:
+            try:
+                async with db.begin_nested():
+                    await db.execute(delete(model).where(model.id.in_(existing_ids)))
+            except IntegrityError:
+                # 外部キーで参照されている行があれば1件ずつ削除し、その行のみ失敗にする
+                for row_id in sorted(existing_ids):
+                    try:
+                        async with db.begin_nested():
+                            await db.execute(delete(model).where(model.id == row_id))
+                    except IntegrityError:
+                        referenced_ids.add(row_id)
+            await commit_or_flush(db, commit)
+        return existing_ids - referenced_ids, referenced_ids
 
 
 # ==============================================================================
@@ -629,54 +1402,391 @@ class HistogramDataCRUD:
     """ヒストグラムデータ操作（CSV用）"""
 
     @staticmethod
-    async def create_histogram_data(db: AsyncSession, **kwargs) -> HistogramData:
+    async def create_histogram_data(
+        db: AsyncSession, commit: bool = True, **kwargs
+    ) -> HistogramData:
         """ヒストグラムデータを作成"""
         histogram_data = HistogramData(**kwargs)
         db.add(histogram_data)
-        await db.commit()
+        # 月別値テーブルも同じトランザクションで同期
+        await db.execute(insert(HistogramMonthValue), histogram_month_rows(kwargs))
+        await HistogramRollupCRUD.rebuild(
+            db, years=[kwargs["histogram_year"]], commit=False
+        )
+        await commit_or_flush(db, commit)
         await db.refresh(histogram_data)
         return histogram_data
 
     @staticmethod
     async def bulk_create_histogram_data(
-        db: AsyncSession, histogram_list: List[Dict[str, Any]]
+        db: AsyncSession, histogram_list: List[Dict[str, Any]], commit: bool = True
     ) -> int:
         """ヒストグラムデータを一括作成"""
         count = 0
+        month_rows = []
         for data in histogram_list:
             histogram_data = HistogramData(**data)
             db.add(histogram_data)
+            month_rows.extend(histogram_month_rows(data))
             count += 1
-        await db.commit()
+        # 月別値テーブルも同じトランザクションで同期
+        if month_rows:
+            await db.execute(insert(HistogramMonthValue), month_rows)
+        # 事前集計を取り込んだ年について再計算
+        await HistogramRollupCRUD.rebuild(
+            db, years=[data["histogram_year"] for data in histogram_list], commit=False
+        )
+        await commit_or_flush(db, commit)
         return count
 
     @staticmethod
-    async def clear_histogram_data(db: AsyncSession) -> int:
+    async def replace_years(
+        db: AsyncSession,
+        histogram_list: List[Dict[str, Any]],
+        exchanged_years: Sequence[int] = (),
+        commit: bool = True,
+    ) -> int:
+        """取り込みデータに含まれる年のデータのみを置き換え（他の年は残す）
+
+        exchanged_years の年は histogram_data をパーティション交換で差し替え済みのため、
+        月別値と事前集計のみを同期する
+        """
+        years = sorted({data["histogram_year"] for data in histogram_list})
+        if not years:
+            return 0
+
+        remaining = [year for year in years if year not in set(exchanged_years)]
+        if remaining:
+            # 年で絞った DELETE はパーティションのプルーニングで対象年のみを走査する
+            await db.execute(
+                delete(HistogramData).where(HistogramData.histogram_year.in_(remaining))
+            )
+            await db.execute(
+                insert(HistogramData),
+                [
+                    data
+                    for data in histogram_list
+                    if data["histogram_year"] in remaining
+                ],
+            )
+
+        # 月別値・事前集計も対象年のみ置き換える
+        await db.execute(
+            delete(HistogramMonthValue).where(HistogramMonthValue.year.in_(years))
+        )
+        await db.execute(
+            insert(HistogramMonthValue),
+            [row for data in histogram_list for row in histogram_month_rows(data)],
+        )
+        await HistogramRollupCRUD.rebuild(db, years=years, commit=False)
+        await commit_or_flush(db, commit)
+        return len(histogram_list)
+
+    @staticmethod
+    async def clear_histogram_data(db: AsyncSession, commit: bool = True) -> int:
         """全てのヒストグラムデータを削除"""
         result = await db.execute(select(HistogramData))
         existing_data = result.scalars().all()
         count = len(existing_data)
         for data in existing_data:
             await db.delete(data)
-        await db.commit()
+        await db.execute(delete(HistogramMonthValue))
+        await HistogramRollupCRUD.clear(db, commit=False)
+        await commit_or_flush(db, commit)
         return count
 
 
+class HistogramMonthValueCRUD:
+    """ヒストグラム月別値操作（集計用）"""
+
+    @staticmethod
+    async def get_period_totals(
+        db: AsyncSession,
+        periods: List[Tuple[int, int]],
+        pj_br_num: Optional[str] = None,
+        ac_code: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """指定した (年, 月) ごとの合計値を取得"""
+        if not periods:
+            return []
+
+        query = (
+            select(
+                HistogramMonthValue.year,
+                HistogramMonthValue.month,
+                func.sum(HistogramMonthValue.value).label("total"),
+            )
+            .where(
+                tuple_(HistogramMonthValue.year, HistogramMonthValue.month).in_(periods)
+            )
+            .group_by(HistogramMonthValue.year, HistogramMonthValue.month)
+            .order_by(HistogramMonthValue.year, HistogramMonthValue.month)
+        )
+        if pj_br_num:
+            query = query.where(HistogramMonthValue.pj_br_num == pj_br_num)
+        if ac_code:
+            query = query.where(HistogramMonthValue.ac_code == ac_code)
+
+        result = await db.execute(query)
+        totals = {(row.year, row.month): row.total for row in result}
+        # データのない月も0として返す
+        return [
+            {"year": year, "month": month, "total": totals.get((year, month), 0)}
+            for year, month in periods
+        ]
+
+    @staticmethod
+    async def get_month_window_totals(
+        db: AsyncSession,
+        year: int,
+        month: int,
+        months_before: int = 1,
+        months_after: int = 1,
+        pj_br_num: Optional[str] = None,
+        ac_code: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """基準月の前後 N ヶ月分の合計値を取得（年跨ぎ対応）"""
+        start_year, start_month = shift_month(year, month, -months_before)
+        end_year, end_month = shift_month(year, month, months_after)
+        return await HistogramMonthValueCRUD.get_period_totals(
+            db,
+            month_range(start_year, start_month, end_year, end_month),
+            pj_br_num=pj_br_num,
+            ac_code=ac_code,
+        )
+
+    @staticmethod
+    async def get_totals_by_project(
+        db: AsyncSession,
+        start_year: int,
+        start_month: int,
+        end_year: int,
+        end_month: int,
+    ) -> List[Dict[str, Any]]:
+        """期間内のPJ・ACコード別合計値を取得"""
+        periods = month_range(start_year, start_month, end_year, end_month)
+        if not periods:
+            return []
+
+        result = await db.execute(
+            select(
+                HistogramMonthValue.pj_br_num,
+                HistogramMonthValue.ac_code,
+                func.sum(HistogramMonthValue.value).label("total"),
+                func.avg(HistogramMonthValue.value).label("average"),
+                func.max(HistogramMonthValue.value).label("peak"),
+            )
+            .where(
+                tuple_(HistogramMonthValue.year, HistogramMonthValue.month).in_(periods)
+            )
+            .group_by(HistogramMonthValue.pj_br_num, HistogramMonthValue.ac_code)
+            .order_by(HistogramMonthValue.pj_br_num, HistogramMonthValue.ac_code)
+        )
+        return [dict(row._mapping) for row in result]
+
+
+# ==============================================================================
+# ヒストグラム事前集計操作クラス
+# ==============================================================================
+
+# 事前集計の粒度
+ROLLUP_GRAINS = ("month", "quarter", "fiscal_year")
+
+# 年度の開始月（4月始まり）
+FISCAL_YEAR_START_MONTH = 4
+
+
+def fiscal_year_of(year_column, month_column):
+    """年・月の列から年度を求める式"""
+    return year_column - case((month_column < FISCAL_YEAR_START_MONTH, 1), else_=0)
+
+
+def rollup_dimensions() -> Dict[str, Any]:
+    """事前集計の集計軸と、その値を表す式"""
+    return {
+        "total": literal(""),
+        "ac_code": HistogramMonthValue.ac_code,
+        "pj_br_num": HistogramMonthValue.pj_br_num,
+        "contract_form": func.coalesce(HistogramMonthValue.contract_form, ""),
+    }
+
+
+def rollup_period(grain: str) -> Tuple[Any, Any]:
+    """粒度ごとの (期間の年, 期間の番号) の式"""
+    year, month = HistogramMonthValue.year, HistogramMonthValue.month
+    if grain == "month":
+        return year, month
+    fiscal_year = fiscal_year_of(year, month)
+    if grain == "quarter":
+        # 年度の第1四半期は4〜6月
+        quarter = case((month >= 10, 3), (month >= 7, 2), (month >= 4, 1), else_=4)
+        return fiscal_year, quarter
+    return fiscal_year, literal(0)
+
+
+def fiscal_years_for(years: Sequence[int]) -> List[int]:
+    """暦年の一覧から、その月を含む年度の一覧を求める"""
+    return sorted({fiscal for year in years for fiscal in (year - 1, year)})
+
+
+def histogram_rollup_query(
+    grain: str, dimension: str, years: Optional[Sequence[int]] = None
+):
+    """histogram_month_values から事前集計行を作る SELECT"""
+    period_year, period_index = rollup_period(grain)
+    source = select(
+        period_year.label("period_year"),
+        period_index.label("period_index"),
+        rollup_dimensions()[dimension].label("dimension_value"),
+        HistogramMonthValue.value,
+    )
+    if years is not None:
+        if grain == "month":
+            source = source.where(HistogramMonthValue.year.in_(years))
+        else:
+            # 年度は前年4月〜翌年3月のため、対象の年度に属する月をすべて読む
+            fiscal_years = fiscal_years_for(years)
+            source = source.where(
+                HistogramMonthValue.year.between(fiscal_years[0], fiscal_years[-1] + 1),
+                period_year.in_(fiscal_years),
+            )
+    source = source.subquery()
+
+    return select(
+        literal(grain),
+        literal(dimension),
+        source.c.period_year,
+        source.c.period_index,
+        source.c.dimension_value,
+        func.coalesce(func.sum(source.c.value), 0),
+        func.count(),
+        func.now(),
+    ).group_by(source.c.period_year, source.c.period_index, source.c.dimension_value)
+
+
+HISTOGRAM_ROLLUP_COLUMNS = [
+    "grain",
+    "dimension",
+    "period_year",
+    "period_index",
+    "dimension_value",
+    "total_value",
+    "row_count",
+    "updated_at",
+]
+
+
+class HistogramRollupCRUD:
+    """ヒストグラム事前集計操作"""
+
+    @staticmethod
+    @retry_transaction
+    async def rebuild(
+        db: AsyncSession, years: Optional[Sequence[int]] = None, commit: bool = True
+    ) -> int:
+        """事前集計を histogram_month_values から再計算（years 指定時はその年のみ）"""
+        if years is not None:
+            years = sorted(set(years))
+            if not years:
+                return 0
+
+        count = 0
+        for grain in ROLLUP_GRAINS:
+            clear = delete(HistogramRollup).where(HistogramRollup.grain == grain)
+            if years is not None:
+                clear = clear.where(
+                    HistogramRollup.period_year.in_(
+                        years if grain == "month" else fiscal_years_for(years)
+                    )
+                )
+            await db.execute(clear)
+            for dimension in rollup_dimensions():
+                result = await db.execute(
+                    insert(HistogramRollup).from_select(
+                        HISTOGRAM_ROLLUP_COLUMNS,
+                        histogram_rollup_query(grain, dimension, years),
+                    )
+                )
+                count += result.rowcount
+        # ヒストグラムデータの変更は全てこの再計算を通る
+        await DataVersionCRUD.bump(db, ["histogram"], commit=False)
+        await commit_or_flush(db, commit)
+        return count
+
+    @staticmethod
+    async def clear(db: AsyncSession, commit: bool = True) -> None:
+        """事前集計をすべて削除"""
+        await db.execute(delete(HistogramRollup))
+        await DataVersionCRUD.bump(db, ["histogram"], commit=False)
+        await commit_or_flush(db, commit)
+
+    @staticmethod
+    async def get_rollups(
+        db: AsyncSession,
+        grain: str,
+        dimension: str,
+        period_year: Optional[int] = None,
+        dimension_value: Optional[str] = None,
+    ) -> List[HistogramRollup]:
+        """粒度・集計軸を指定して事前集計を取得"""
+        query = select(HistogramRollup).where(
+            HistogramRollup.grain == grain, HistogramRollup.dimension == dimension
+        )
+        if period_year is not None:
+            query = query.where(HistogramRollup.period_year == period_year)
+        if dimension_value is not None:
+            query = query.where(HistogramRollup.dimension_value == dimension_value)
+        result = await db.execute(
+            query.order_by(
+                HistogramRollup.period_year,
+                HistogramRollup.period_index,
+                HistogramRollup.dimension_value,
+            )
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_month_totals(
+        db: AsyncSession, periods: List[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], Any]:
+        """指定した (年, 月) ごとの全体合計を取得（データのない月は含まない）"""
+        if not periods:
+            return {}
+        result = await db.execute(
+            select(
+                HistogramRollup.period_year,
+                HistogramRollup.period_index,
+                HistogramRollup.total_value,
+            ).where(
+                HistogramRollup.grain == "month",
+                HistogramRollup.dimension == "total",
+                HistogramRollup.dimension_value == "",
+                tuple_(HistogramRollup.period_year, HistogramRollup.period_index).in_(
+                    periods
+                ),
+            )
+        )
+        return {(row.period_year, row.period_index): row.total_value for row in result}
+
+
 class ProjectDataCRUD:
     """プロジェクトデータ操作（CSV用）"""
 
     @staticmethod
-    async def create_project_data(db: AsyncSession, **kwargs) -> ProjectData:
+    async def create_project_data(
+        db: AsyncSession, commit: bool = True, **kwargs
+    ) -> ProjectData:
         """プロジェクトデータを作成"""
         project_data = ProjectData(**kwargs)
         db.add(project_data)
-        await db.commit()
+        await DataVersionCRUD.bump(db, ["project"], commit=False)
+        await commit_or_flush(db, commit)
         await db.refresh(project_data)
         return project_data
 
     @staticmethod
     async def bulk_create_project_data(
-        db: AsyncSession, project_list: List[Dict[str, Any]]
+        db: AsyncSession, project_list: List[Dict[str, Any]], commit: bool = True
     ) -> int:
         """プロジェクトデータを一括作成"""
         count = 0
@@ -684,18 +1794,20 @@ class ProjectDataCRUD:
             project_data = ProjectData(**data)
             db.add(project_data)
             count += 1
-        await db.commit()
+        await DataVersionCRUD.bump(db, ["project"], commit=False)
+        await commit_or_flush(db, commit)
         return count
 
     @staticmethod
-    async def clear_project_data(db: AsyncSession) -> int:
+    async def clear_project_data(db: AsyncSession, commit: bool = True) -> int:
         """全てのプロジェクトデータを削除"""
         result = await db.execute(select(ProjectData))
         existing_data = result.scalars().all()
         count = len(existing_data)
         for data in existing_data:
             await db.delete(data)
-        await db.commit()
+        await DataVersionCRUD.bump(db, ["project"], commit=False)
+        await commit_or_flush(db, commit)
         return count
 
 
@@ -703,17 +1815,23 @@ class UserDataCRUD:
     """ユーザーデータ操作（CSV用）"""
 
     @staticmethod
-    async def create_user_data(db: AsyncSession, **kwargs) -> UserData:
+    async def create_user_data(
+        db: AsyncSession, commit: bool = True, **kwargs
+    ) -> UserData:
         """ユーザーデータを作成"""
         user_data = UserData(**kwargs)
         db.add(user_data)
-        await db.commit()
+        await db.flush()
+        # 所属チームが変わるためチーム別集計を再計算
+        await TeamAssignTotalCRUD.rebuild(db, commit=False)
+        await DataVersionCRUD.bump(db, ["user"], commit=False)
+        await commit_or_flush(db, commit)
         await db.refresh(user_data)
         return user_data
 
     @staticmethod
     async def bulk_create_user_data(
-        db: AsyncSession, user_list: List[Dict[str, Any]]
+        db: AsyncSession, user_list: List[Dict[str, Any]], commit: bool = True
     ) -> int:
         """ユーザーデータを一括作成"""
         count = 0
@@ -721,18 +1839,25 @@ class UserDataCRUD:
             user_data = UserData(**data)
             db.add(user_data)
             count += 1
-        await db.commit()
+        await db.flush()
+        # 所属チームが変わるためチーム別集計を再計算
+        await TeamAssignTotalCRUD.rebuild(db, commit=False)
+        await DataVersionCRUD.bump(db, ["user"], commit=False)
+        await commit_or_flush(db, commit)
         return count
 
     @staticmethod
-    async def clear_user_data(db: AsyncSession) -> int:
+    async def clear_user_data(db: AsyncSession, commit: bool = True) -> int:
         """全てのユーザーデータを削除"""
         result = await db.execute(select(UserData))
         existing_data = result.scalars().all()
         count = len(existing_data)
         for data in existing_data:
             await db.delete(data)
-        await db.commit()
+        await db.flush()
+        await TeamAssignTotalCRUD.rebuild(db, commit=False)
+        await DataVersionCRUD.bump(db, ["user"], commit=False)
+        await commit_or_flush(db, commit)
         return count
 
 
@@ -741,7 +1866,7 @@ class AssignDataCSVCRUD:
 
     @staticmethod
     async def bulk_create_assign_data(
-        db: AsyncSession, assign_list: List[Dict[str, Any]]
+        db: AsyncSession, assign_list: List[Dict[str, Any]], commit: bool = True
     ) -> int:
         """アサインデータを一括作成"""
         count = 0
@@ -749,16 +1874,57 @@ class AssignDataCSVCRUD:
             assign_data = AssignData(**data)
             db.add(assign_data)
             count += 1
-        await db.commit()
+        await db.flush()
+        # ユーザー別集計を取り込み結果から再計算
+        await AssignUserTotalCRUD.rebuild(db, commit=False)
+        await commit_or_flush(db, commit)
         return count
 
     @staticmethod
-    async def clear_assign_data(db: AsyncSession) -> int:
+    async def clear_assign_data(db: AsyncSession, commit: bool = True) -> int:
         """全てのアサインデータを削除"""
         result = await db.execute(select(AssignData))
         existing_data = result.scalars().all()
         count = len(existing_data)
         for data in existing_data:
             await db.delete(data)
-        await db.commit()
+        await db.execute(delete(AssignUserTotal))
+        await db.execute(delete(TeamAssignTotal))
+        await DataVersionCRUD.bump(db, ["assign"], commit=False)
+        await commit_or_flush(db, commit)
         return count
+
+
+# ==============================================================================
+# 更新バージョン操作クラス
+# ==============================================================================
+
+
+class DataVersionCRUD:
+    """データセットの更新バージョン操作"""
+
+    @staticmethod
+    async def get_all(db: AsyncSession) -> Dict[str, int]:
+        """全データセットのバージョンを取得"""
+        result = await db.execute(select(DataVersion.dataset, DataVersion.version))
+        return dict(result.all())
+
+    @staticmethod
+    async def bump(
+        db: AsyncSession, datasets: Sequence[str], commit: bool = True
+    ) -> None:
+        """データセットのバージョンを1つ増やす（行がなければ作成）"""
+        # 同時に取り込む処理どうしで行ロックの順序を揃える
+        datasets = sorted(set(datasets))
+        if not datasets:
+            return
+        statement = mysql_insert(DataVersion).values(
+            [{"dataset": dataset, "version": 1} for dataset in datasets]
+        )
+        await db.execute(
+            statement.on_duplicate_key_update(
+                version=DataVersion.version + 1, updated_at=func.now()
+            )
+        )
+        db.info.setdefault(BUMPED_DATASETS_KEY, set()).update(datasets)
+        await commit_or_flush(db, commit)
@@ -9,6 +9,13 @@ SQLAlchemy データベースモデル定義
 - BlobLog: Blob ログ情報
 - Histogram: ヒストグラム情報
 - AssignData: アサインデータ情報
+- HistogramData: ヒストグラムデータ情報（CSV）
+- HistogramMonthValue: ヒストグラム月別値（縦持ち）
+- AssignUserTotal: ユーザー別アサイン集計
+- TeamAssignTotal: チーム別アサイン集計
+- HistogramRollup: ヒストグラム事前集計（月・四半期・年度）
+- RetentionArchive: 保持期間切れデータのアーカイブ台帳
+- DataVersion: データセットごとの更新バージョン（ETag 用）
 """
 
 from sqlalchemy import (
@@ -21,6 +28,7 @@ from sqlalchemy import (
     ForeignKey,
     JSON,
     DECIMAL,
+    Index,
 )
 from sqlalchemy.orm import DeclarativeBase, relationship
 from sqlalchemy.sql import func
@@ -46,6 +54,7 @@ class User(Base):
     """ユーザーテーブル"""
 
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, comment="ユーザー名")
@@ -65,6 +74,7 @@ class Project(Base):
     """プロジェクトテーブル"""
 
     __tablename__ = "projects"
+    __table_args__ = (Index("ix_projects_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, comment="プロジェクト名")
@@ -83,6 +93,7 @@ class Assignment(Base):
     """課題テーブル"""
 
     __tablename__ = "assignments"
+    __table_args__ = (Index("ix_assignments_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, comment="課題名")
@@ -106,6 +117,10 @@ class Notice(Base):
     """通知テーブル"""
 
     __tablename__ = "notices"
+    __table_args__ = (
+        Index("ix_notices_created_at_id", "created_at", "id"),
+        Index("ix_notices_unread", "is_read", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False, comment="タイトル")
@@ -128,6 +143,7 @@ class BlobLog(Base):
     """Blob ログテーブル"""
 
     __tablename__ = "blob_logs"
+    __table_args__ = (Index("ix_blob_logs_operation_time_id", "operation_time", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     operation_type = Column(String(50), nullable=False, comment="操作タイプ")
@@ -144,10 +160,54 @@ class BlobLog(Base):
     user = relationship("User", back_populates="blob_logs")
 
 
+class RetentionArchive(Base):
+    """アーカイブ台帳テーブル
+
+    保持期間を過ぎて削除した行の退避先（Parquetファイル）を記録する。
+    1行が1バッチ（1ファイル）に対応する。
+    """
+
+    __tablename__ = "retention_archives"
+    __table_args__ = (
+        Index("ix_retention_archives_range", "table_name", "min_time", "max_time"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(50), nullable=False, comment="元テーブル名")
+    storage = Column(String(10), nullable=False, comment="保存先（blob / local）")
+    location = Column(String(500), nullable=False, comment="保存パス")
+    first_id = Column(Integer, nullable=False, comment="先頭行のID")
+    last_id = Column(Integer, nullable=False, comment="末尾行のID")
+    row_count = Column(Integer, nullable=False, comment="行数")
+    min_time = Column(DateTime, nullable=False, comment="最古の日時")
+    max_time = Column(DateTime, nullable=False, comment="最新の日時")
+    created_at = Column(DateTime, default=func.now(), comment="作成日時")
+
+
+class DataVersion(Base):
+    """データセットごとの更新バージョン
+
+    取り込み・更新のたびに version を1つ増やす。読み取り API は
+    この値から ETag を作り、変更がなければ 304 を返す。
+    """
+
+    __tablename__ = "data_versions"
+
+    dataset = Column(String(50), primary_key=True, comment="データセット名")
+    version = Column(Integer, nullable=False, default=1, comment="バージョン")
+    updated_at = Column(
+        DateTime, default=func.now(), onupdate=func.now(), comment="更新日時"
+    )
+
+
 class Histogram(Base):
     """ヒストグラムテーブル"""
 
     __tablename__ = "histograms"
+    __table_args__ = (
+        Index("ix_histograms_created_at_id", "created_at", "id"),
+        Index("ix_histograms_resource", "resource_type", "resource_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     resource_type = Column(String(50), nullable=False, comment="リソースタイプ")
@@ -167,6 +227,10 @@ class AssignData(Base):
     """アサインデータテーブル"""
 
     __tablename__ = "assign_data"
+    __table_args__ = (
+        Index("ix_assign_data_created_at_id", "created_at", "id"),
+        Index("ix_assign_data_user_name", "user_name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_name = Column(String(100), nullable=False, comment="ユーザー名")
@@ -188,12 +252,74 @@ class AssignData(Base):
     )
 
 
+class AssignUserTotal(Base):
+    """ユーザー別アサイン集計テーブル
+
+    assign_data をユーザー名ごとに集計した結果（各カテゴリの合計と
+    プロジェクト別内訳）。assign_data の取り込み・更新時に再計算される。
+    """
+
+    __tablename__ = "assign_user_totals"
+
+    user_name = Column(String(100), primary_key=True, comment="ユーザー名")
+    assin_execution_total = Column(DECIMAL(12, 2), default=0.0, comment="実行合計")
+    assin_maintenance_total = Column(DECIMAL(12, 2), default=0.0, comment="保守合計")
+    assin_prospect_total = Column(DECIMAL(12, 2), default=0.0, comment="見込み合計")
+    assin_common_cost_total = Column(
+        DECIMAL(12, 2), default=0.0, comment="共通費合計"
+    )
+    assin_most_com_ps_total = Column(
+        DECIMAL(12, 2), default=0.0, comment="最も共通PS合計"
+    )
+    assin_sales_mane_total = Column(DECIMAL(12, 2), default=0.0, comment="営業管理合計")
+    assin_investigation_total = Column(DECIMAL(12, 2), default=0.0, comment="調査合計")
+    assin_directly_total = Column(DECIMAL(12, 2), default=0.0, comment="直接合計")
+    assin_common_total = Column(DECIMAL(12, 2), default=0.0, comment="共通合計")
+    assin_sales_sup_total = Column(DECIMAL(12, 2), default=0.0, comment="営業支援合計")
+    projects = Column(JSON, comment="プロジェクト別内訳")
+    row_count = Column(Integer, default=0, comment="集計元の行数")
+    updated_at = Column(DateTime, default=func.now(), comment="集計日時")
+
+
+class TeamAssignTotal(Base):
+    """チーム別アサイン集計テーブル
+
+    assign_user_totals を user_data の所属チームごとに合計したもの。
+    user_data に存在しないユーザーは「未所属」として集計する。
+    """
+
+    __tablename__ = "team_assign_totals"
+
+    team = Column(String(30), primary_key=True, comment="所属チーム")
+    assin_execution_total = Column(DECIMAL(14, 2), default=0.0, comment="実行合計")
+    assin_maintenance_total = Column(DECIMAL(14, 2), default=0.0, comment="保守合計")
+    assin_prospect_total = Column(DECIMAL(14, 2), default=0.0, comment="見込み合計")
+    assin_common_cost_total = Column(
+        DECIMAL(14, 2), default=0.0, comment="共通費合計"
+    )
+    assin_most_com_ps_total = Column(
+        DECIMAL(14, 2), default=0.0, comment="最も共通PS合計"
+    )
+    assin_sales_mane_total = Column(DECIMAL(14, 2), default=0.0, comment="営業管理合計")
+    assin_investigation_total = Column(DECIMAL(14, 2), default=0.0, comment="調査合計")
+    assin_directly_total = Column(DECIMAL(14, 2), default=0.0, comment="直接合計")
+    assin_common_total = Column(DECIMAL(14, 2), default=0.0, comment="共通合計")
+    assin_sales_sup_total = Column(DECIMAL(14, 2), default=0.0, comment="営業支援合計")
+    user_count = Column(Integer, default=0, comment="ユーザー数")
+    updated_at = Column(DateTime, default=func.now(), comment="集計日時")
+
+
 class HistogramData(Base):
-    """ヒストグラムデータテーブル（Swagger準拠）"""
+    """ヒストグラムデータテーブル（Swagger準拠）
+
+    MySQL では histogram_year による年単位の RANGE パーティションを使用する
+    （マイグレーションで設定。パーティション列を含めるため主キーは (id, histogram_year)）。
+    取り込み時は対象年のパーティションのみを差し替える。
+    """
 
     __tablename__ = "histogram_data"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     histogram_ac_code = Column(String(30), nullable=False, comment="ACコード")
     histogram_ac_name = Column(String(100), nullable=False, comment="AC名称")
     histogram_pj_br_num = Column(String(30), nullable=False, comment="PJ枝番")
@@ -202,25 +328,94 @@ class HistogramData(Base):
         String(30), nullable=False, comment="PJ契約形態"
     )
     histogram_costs_unit = Column(Integer, nullable=False, comment="工数単位")
-    histogram_year = Column(Integer, nullable=False, comment="年")
-    histogram_1month = Column(String(10), default="0.00", comment="1月")
-    histogram_2month = Column(String(10), default="0.00", comment="2月")
-    histogram_3month = Column(String(10), default="0.00", comment="3月")
-    histogram_4month = Column(String(10), default="0.00", comment="4月")
-    histogram_5month = Column(String(10), default="0.00", comment="5月")
-    histogram_6month = Column(String(10), default="0.00", comment="6月")
-    histogram_7month = Column(String(10), default="0.00", comment="7月")
-    histogram_8month = Column(String(10), default="0.00", comment="8月")
-    histogram_9month = Column(String(10), default="0.00", comment="9月")
-    histogram_10month = Column(String(10), default="0.00", comment="10月")
-    histogram_11month = Column(String(10), default="0.00", comment="11月")
-    histogram_12month = Column(String(10), default="0.00", comment="12月")
+    histogram_year = Column(Integer, primary_key=True, comment="年")
+    histogram_1month = Column(DECIMAL(10, 2), default=0.0, comment="1月")
+    histogram_2month = Column(DECIMAL(10, 2), default=0.0, comment="2月")
+    histogram_3month = Column(DECIMAL(10, 2), default=0.0, comment="3月")
+    histogram_4month = Column(DECIMAL(10, 2), default=0.0, comment="4月")
+    histogram_5month = Column(DECIMAL(10, 2), default=0.0, comment="5月")
+    histogram_6month = Column(DECIMAL(10, 2), default=0.0, comment="6月")
+    histogram_7month = Column(DECIMAL(10, 2), default=0.0, comment="7月")
+    histogram_8month = Column(DECIMAL(10, 2), default=0.0, comment="8月")
+    histogram_9month = Column(DECIMAL(10, 2), default=0.0, comment="9月")
+    histogram_10month = Column(DECIMAL(10, 2), default=0.0, comment="10月")
+    histogram_11month = Column(DECIMAL(10, 2), default=0.0, comment="11月")
+    histogram_12month = Column(DECIMAL(10, 2), default=0.0, comment="12月")
     created_at = Column(DateTime, default=func.now(), comment="作成日時")
     updated_at = Column(
         DateTime, default=func.now(), onupdate=func.now(), comment="更新日時"
     )
 
 
+class HistogramMonthValue(Base):
+    """ヒストグラム月別値テーブル（縦持ち）
+
+    histogram_data の月列を (PJ枝番, ACコード, 年, 月) 単位の行に展開したもの。
+    月範囲・年跨ぎの集計をインデックスシークとSQL集計で行うために使用する。
+    histogram_data の取り込み時に同期される。
+    """
+
+    __tablename__ = "histogram_month_values"
+    __table_args__ = (
+        Index(
+            "ix_histogram_month_values_period",
+            "year",
+            "month",
+            "pj_br_num",
+            "ac_code",
+            "value",
+        ),
+        Index(
+            "ix_histogram_month_values_pj",
+            "pj_br_num",
+            "ac_code",
+            "year",
+            "month",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    pj_br_num = Column(String(30), nullable=False, comment="PJ枝番")
+    ac_code = Column(String(30), nullable=False, comment="ACコード")
+    year = Column(Integer, nullable=False, comment="年")
+    month = Column(Integer, nullable=False, comment="月")
+    value = Column(DECIMAL(10, 2), nullable=False, default=0.0, comment="値")
+    contract_form = Column(String(30), comment="PJ契約形態")
+
+
+class HistogramRollup(Base):
+    """ヒストグラム事前集計テーブル
+
+    histogram_month_values を 粒度（月・四半期・年度）× 集計軸（全体・ACコード・
+    PJ枝番・契約形態）ごとに合計したもの。四半期・年度は4月始まりの年度で集計する。
+    histogram_data はチームを持たないため、チームの軸はない（チーム別は team_assign_totals）。
+    主キーが検索条件の順に並ぶため、期間・軸を指定した取得は主キーの範囲読みで済む。
+    histogram_data の取り込み時に再計算される。
+    """
+
+    __tablename__ = "histogram_rollups"
+    __table_args__ = (
+        Index(
+            "ix_histogram_rollups_value",
+            "dimension",
+            "dimension_value",
+            "grain",
+            "period_year",
+            "period_index",
+            "total_value",
+        ),
+    )
+
+    grain = Column(String(12), primary_key=True, comment="粒度")
+    dimension = Column(String(20), primary_key=True, comment="集計軸")
+    period_year = Column(Integer, primary_key=True, comment="年（四半期・年度は年度）")
+    period_index = Column(Integer, primary_key=True, comment="月・四半期（年度は0）")
+    dimension_value = Column(String(100), primary_key=True, comment="集計軸の値")
+    total_value = Column(DECIMAL(14, 2), default=0.0, comment="合計値")
+    row_count = Column(Integer, default=0, comment="集計元の行数")
+    updated_at = Column(DateTime, default=func.now(), comment="集計日時")
+
+
 class ProjectData(Base):
     """プロジェクトデータテーブル（Swagger準拠）"""
 
@@ -0,0 +1,256 @@
+"""
+MySQL の一時的なエラーに対する再試行
+
+このモジュールは以下の機能を提供します：
+- 再試行できるエラー（デッドロック・ロック待ちタイムアウト・接続断）の分類
+- ジッター付き指数バックオフ
+- リクエストごとの再試行回数の上限（contextvar とミドルウェア）
+- アプリケーション全体の再試行トークン（成功に応じて補充し、再試行の連鎖を防ぐ）
+- 再試行の件数の集計
+
+再試行するのは、同じ引数で再実行しても結果が変わらない（冪等な）
+トランザクション単位のみです。セッションを受け取る関数は、呼び出し時点で
+セッションのトランザクションが始まっていない場合に限り、ロールバックして
+再実行します（呼び出し元のトランザクションの途中では再試行しません）。
+"""
+
+import asyncio
+import functools
+import os
+import random
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 再試行できる MySQL のエラーコードと分類
+RETRYABLE_ERROR_CODES = {
+    1213: "deadlock",
+    1205: "lock_wait_timeout",
+    2006: "server_gone_away",
+    2013: "lost_connection",
+    2055: "lost_connection",
+}
+
+# 1つのトランザクション単位の最大試行回数とバックオフ（秒）
+DB_RETRY_MAX_ATTEMPTS = int(os.getenv("DB_RETRY_MAX_ATTEMPTS", "3"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.05"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "1.0"))
+
+# 1リクエストあたりの再試行回数の上限
+DB_RETRY_REQUEST_BUDGET = int(os.getenv("DB_RETRY_REQUEST_BUDGET", "3"))
+
+# 全体の再試行トークン（上限と、成功1回あたりの補充量）
+DB_RETRY_TOKENS = float(os.getenv("DB_RETRY_TOKENS", "20"))
+DB_RETRY_TOKEN_RATIO = float(os.getenv("DB_RETRY_TOKEN_RATIO", "0.1"))
+
+
+def error_code(error: BaseException) -> Optional[int]:
+    """例外から MySQL のエラーコードを取り出す"""
+    orig = error.orig if isinstance(error, DBAPIError) else error
+    args = getattr(orig, "args", ())
+    if args and isinstance(args[0], int):
+        return args[0]
+    return None
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """再試行できるエラーの分類（再試行できない場合は None）"""
+    reason = RETRYABLE_ERROR_CODES.get(error_code(error))
+    if reason is None and getattr(error, "connection_invalidated", False):
+        reason = "lost_connection"
+    return reason
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = DB_RETRY_BASE_DELAY,
+    cap: float = DB_RETRY_MAX_DELAY,
+) -> float:
+    """attempt 回目の再試行前の待機秒数（0〜指数上限の一様乱数）"""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+# ==============================================================================
+# 再試行の上限
+# ==============================================================================
+
+
+class RetryTokenBucket:
+    """全体の再試行トークン
+
+    再試行のたびに1トークンを使い、成功のたびに ratio ずつ補充する。
+    失敗が続くとトークンが尽きて再試行しなくなるため、
+    混雑時に再試行がさらに負荷を増やす連鎖を防ぐ。
+    """
+
+    def __init__(
+        self, capacity: float = DB_RETRY_TOKENS, ratio: float = DB_RETRY_TOKEN_RATIO
+    ):
+        self.capacity = capacity
+        self.ratio = ratio
+        self.tokens = capacity
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """再試行用のトークンを1つ使う（足りなければ False）"""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def record_success(self):
+        """成功に応じてトークンを補充"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+
+class RetryBudget:
+    """1リクエスト内の再試行回数の上限"""
+
+    def __init__(self, limit: int = DB_RETRY_REQUEST_BUDGET):
+        self.limit = limit
+        self.used = 0
+
+    def acquire(self) -> bool:
+        if self.used >= self.limit:
+            return False
+        self.used += 1
+        return True
+
+
+class RetryMetrics:
+    """再試行の件数の集計"""
+
+    def __init__(self):
+        self.calls = 0
+        self.retries: Dict[str, int] = {}
+        self.recovered = 0
+        self.exhausted = 0
+        self.budget_denied = 0
+        self.tokens_denied = 0
+        self.in_transaction = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": dict(self.retries),
+            "recovered": self.recovered,
+            "exhausted": self.exhausted,
+            "budget_denied": self.budget_denied,
+            "tokens_denied": self.tokens_denied,
+            "in_transaction": self.in_transaction,
+            "tokens": round(retry_tokens.tokens, 2),
+        }
+
+
+retry_tokens = RetryTokenBucket()
+retry_metrics = RetryMetrics()
+
+# 現在のリクエストの再試行上限（リクエスト外では None）
+current_retry_budget: ContextVar[Optional[RetryBudget]] = ContextVar(
+    "current_retry_budget", default=None
+)
+
+
+class RetryBudgetMiddleware:
+    """リクエストごとに再試行上限を設定する ASGI ミドルウェア"""
+
+    def __init__(self, app, limit: int = DB_RETRY_REQUEST_BUDGET):
+        self.app = app
+        self.limit = limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_retry_budget.set(RetryBudget(self.limit))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_retry_budget.reset(token)
+
+
+# ==============================================================================
+# 再試行の実行
+# ==============================================================================
+
+
+def find_session(args: tuple, kwargs: Dict[str, Any]) -> Optional[AsyncSession]:
+    """引数からセッションを探す（第1引数または db キーワード）"""
+    session = kwargs.get("db", args[0] if args else None)
+    return session if isinstance(session, AsyncSession) else None
+
+
+def allow_retry(reason: str) -> bool:
+    """リクエストの上限と全体のトークンを確認し、再試行してよいか判定"""
+    budget = current_retry_budget.get()
+    if budget is not None and not budget.acquire():
+        retry_metrics.budget_denied += 1
+        return False
+    if not retry_tokens.acquire():
+        retry_metrics.tokens_denied += 1
+        return False
+    retry_metrics.retries[reason] = retry_metrics.retries.get(reason, 0) + 1
+    return True
+
+
+def retry_transaction(
+    func: Optional[Callable] = None, *, max_attempts: int = DB_RETRY_MAX_ATTEMPTS
+):
+    """冪等なトランザクション単位を一時的なエラー時に再試行するデコレータ
+
+    セッションを受け取る関数は、呼び出し時にトランザクションが始まっていない
+    場合のみ再試行し、再試行前にセッションをロールバックする。
+    セッションを受け取らない関数は、関数内で自分のセッションを開くものとして扱う。
+    """
+
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            retry_metrics.calls += 1
+            session = find_session(args, kwargs)
+            if session is not None and session.in_transaction():
+                # 呼び出し元の書き込みを巻き戻さないよう、1回だけ実行
+                retry_metrics.in_transaction += 1
+                return await func(*args, **kwargs)
+
+            attempt = 0
+            while True:
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    reason = classify_error(e)
+                    if reason is None:
+                        raise
+                    attempt += 1
+                    if attempt >= max_attempts:
+                        retry_metrics.exhausted += 1
+                        raise
+                    if not allow_retry(reason):
+                        raise
+                    if session is not None:
+                        await session.rollback()
+                    delay = backoff_delay(attempt)
+                    logger.warning(
+                        f"DB再試行 {func.__qualname__} ({reason}) "
+                        f"{attempt}/{max_attempts - 1}回目 {delay:.3f}秒後"
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+                retry_tokens.record_success()
+                if attempt:
+                    retry_metrics.recovered += 1
+                return result
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
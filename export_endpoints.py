@@ -0,0 +1,141 @@
+"""
+データエクスポート エンドポイント
+
+このモジュールは以下のエクスポート機能を提供します：
+- テーブル全件の NDJSON / CSV ストリーミング出力
+- サーバーサイドカーソル（AsyncSession.stream）による逐次読み出し
+- gzip による逐次圧縮
+
+行をまとめてメモリに載せず、一定サイズのバッチごとに
+エンコード・送信するため、件数に関わらずメモリ使用量は一定です。
+"""
+
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from database import db_manager
+from json_response import dumps, json_default
+from db_models import (
+    AssignData,
+    BlobLog,
+    HistogramData,
+    Notice,
+    ProjectData,
+    UserData,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# エクスポート対象テーブル
+EXPORT_MODELS = {
+    "histogram_data": HistogramData,
+    "project_data": ProjectData,
+    "user_data": UserData,
+    "assign_data": AssignData,
+    "notices": Notice,
+    "blob_logs": BlobLog,
+}
+
+# サーバーサイドカーソルから1回に取り出す行数
+STREAM_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# CSV の先頭に付ける BOM（Excel での文字化けを避けるため）
+CSV_BOM = "\ufeff".encode("utf-8")
+
+
+def encode_ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    """行のリストを NDJSON に変換"""
+    return b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def encode_csv(rows: List[List[Any]]) -> bytes:
+    """行のリストを CSV に変換"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [
+            [json_default(v) if isinstance(v, datetime) else v for v in row]
+            for row in rows
+        ]
+    )
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream_table(
+    model, export_format: str, batch_size: int = STREAM_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """テーブルをサーバーサイドカーソルで読み出し、エンコード済みのチャンクを返す"""
+    if not db_manager._initialized:
+        db_manager.initialize()
+
+    columns = list(model.__table__.columns)
+    column_names = [column.name for column in columns]
+
+    if export_format == "csv":
+        yield CSV_BOM + encode_csv([column_names])
+
+    # レスポンス送信中も接続を保持するため、依存性注入ではなく専用セッションを使用
+    async with db_manager.async_session_maker() as db:
+        result = await db.stream(
+            select(*columns)
+            .order_by(model.__table__.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions(batch_size):
+            if export_format == "csv":
+                yield encode_csv([list(row) for row in partition])
+            else:
+                yield encode_ndjson([dict(zip(column_names, row)) for row in partition])
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """チャンクを逐次 gzip 圧縮（バッチごとにフラッシュして即時送信）"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@router.get("/{table}")
+async def export_table(
+    table: str,
+    request: Request,
+    format: str = Query(
+        "ndjson", pattern="^(ndjson|csv)$", description="出力形式（ndjson / csv）"
+    ),
+    gzip: bool = Query(True, description="クライアントが対応していれば gzip 圧縮する"),
+):
+    """テーブル全件をストリーミングでエクスポート"""
+    model = EXPORT_MODELS.get(table)
+    if model is None:
+        raise HTTPException(
+            status_code=404, detail=f"エクスポート対象外のテーブルです: {table}"
+        )
+
+    logger.info(f"エクスポート開始: {table} ({format})")
+
+    chunks = stream_table(model, format)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{table}.{format}"',
+    }
+    if gzip and "gzip" in request.headers.get("accept-encoding", ""):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
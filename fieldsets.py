@@ -0,0 +1,78 @@
+"""
+スパースフィールドセット
+
+このモジュールは以下の機能を提供します：
+- fields= による取得列の絞り込み（load_only）
+- include= による関連データの明示的な一括取得（selectinload）
+- 絞り込んだ結果の辞書変換
+
+一覧APIで画面が実際に使う列・関連だけを取得・返却するために使用します。
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+
+
+class InvalidFieldsetError(ValueError):
+    """不正な fields / include が指定された"""
+
+    pass
+
+
+def parse_names(value: Optional[str]) -> List[str]:
+    """カンマ区切りの文字列を名前のリストに変換"""
+    if not value:
+        return []
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def column_names(model) -> List[str]:
+    """モデルの列名一覧"""
+    return [attr.key for attr in inspect(model).column_attrs]
+
+
+def loader_options(
+    model,
+    fields: Sequence[str] = (),
+    include: Sequence[str] = (),
+    required: Sequence[str] = ("id",),
+) -> List[Any]:
+    """fields / include からクエリのローダーオプションを作成"""
+    options = []
+
+    if fields:
+        columns = column_names(model)
+        unknown = [name for name in fields if name not in columns]
+        if unknown:
+            raise InvalidFieldsetError(f"不明な列です: {', '.join(unknown)}")
+        # ページングや識別に必要な列は常に取得する
+        names = list(dict.fromkeys([*required, *fields]))
+        options.append(load_only(*[getattr(model, name) for name in names]))
+
+    relationships = inspect(model).relationships
+    for name in include:
+        if name not in relationships:
+            raise InvalidFieldsetError(f"不明な関連です: {name}")
+        options.append(selectinload(getattr(model, name)))
+
+    return options
+
+
+def to_dict(
+    obj, fields: Sequence[str] = (), include: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """指定された列・関連のみを辞書に変換"""
+    names = list(dict.fromkeys(["id", *fields])) if fields else column_names(type(obj))
+    data = {name: getattr(obj, name) for name in names}
+
+    for name in include:
+        related = getattr(obj, name)
+        if related is None:
+            data[name] = None
+        elif isinstance(related, list):
+            data[name] = [to_dict(item) for item in related]
+        else:
+            data[name] = to_dict(related)
+    return data
@@ -2,38 +2,46 @@
 統合アプリケーション: Azure Functions + FastAPI + MySQL
 
 このファイルは以下の機能を統合します：
-- Azure Functions (HTTPトリガー、EventGridトリガー)
-- FastAPI アプリケーション
+- Azure Functions (ASGI 統合による HTTP、EventGridトリガー、タイマートリガー)
+- FastAPI アプリケーション（uvicorn / gunicorn でも起動可能）
 - MySQL データベース統合
 - Azure Blob Storage
 - EventGrid
 - Assign-Kun API
 """
 
+import time
+
+# コールドスタート計測の起点（モジュール読み込み開始時刻）
+MODULE_LOAD_STARTED = time.perf_counter()
+
+import asyncio
 import logging
+import os
+from datetime import datetime
 import azure.functions as func
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 
 # データベース接続をインポート
-from database import db_manager, test_connection, init_database
-
-# 分割したエンドポイントをインポート
-import blob_endpoints
-import blob_views
-import assignkun_endpoints
-import eventgrid_endpoints
-import csv_endpoints
-import csv_blob_endpoints
-
-# MySQLエンドポイントは条件付きインポート
-try:
-    import mysql_endpoints
-
-    MYSQL_AVAILABLE = True
-except ImportError:
-    MYSQL_AVAILABLE = False
+from database import db_manager, check_connection, ensure_schema
+from blob_clients import close_clients
+from blob_log_writer import blob_log_writer
+from data_versions import DataVersionMiddleware
+from db_retry import RetryBudgetMiddleware
+from json_response import FastJSONResponse
+from pool_metrics import pool_metrics
+from static_assets import static_page
+
+# 分割したエンドポイントは初回リクエスト時に読み込む（コールドスタート短縮）
+from lazy_routers import (
+    LazyRouters,
+    LazyRouterMiddleware,
+    install_openapi,
+    route_table_hash,
+)
 
 # 環境変数の読み込み
 try:
@@ -48,41 +56,88 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-if not MYSQL_AVAILABLE:
-    logger.warning("MySQL関連のモジュールが利用できません")
+# 動的な応答を gzip 圧縮する最小サイズ（バイト）と圧縮レベル
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
 
 
 # ==============================================================================
-# FastAPI アプリケーション設定
+# ワーカーの起動・終了
 # ==============================================================================
 
+# ワーカープロセスの状態（DBエンジン・Blobクライアント・キャッシュは
+# モジュールに保持し、呼び出しをまたいで再利用する）
+worker_state = {"started": False, "started_at": None}
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """アプリケーションの起動・終了時の処理"""
-    # 起動時
-    logger.info("🚀 アプリケーション起動中...")
+# Functions ホストは最初の HTTP 呼び出しで lifespan を開始し、同時に届いた
+# 呼び出しがそれぞれ開始することもあるため、起動・終了はロックして1回だけ行う
+_worker_lock = asyncio.Lock()
+
+
+async def startup_worker():
+    """ワーカーの起動処理（2回目以降の呼び出しは何もしない）"""
+    async with _worker_lock:
+        if worker_state["started"]:
+            return
+        await _startup()
+        worker_state.update(started=True, started_at=datetime.now())
+
+
+async def shutdown_worker():
+    """ワーカーの終了処理（起動していなければ何もしない）"""
+    async with _worker_lock:
+        if not worker_state["started"]:
+            return
+        logger.info("🔄 アプリケーション終了中...")
+        await blob_log_writer.stop()  # キューに残ったBlobログを書き込んでから閉じる
+        close_clients()
+        await db_manager.close()  # close_pool() ではなく close() を使用
+        logger.info("✅ データベース接続を閉じました")
+        worker_state["started"] = False
 
-    # データベース接続テスト
-    if await test_connection():
-        logger.info("✅ データベース接続確認完了")
-    else:
-        logger.warning("⚠️  データベース接続に失敗しました")
 
-    # データベース接続プールを作成
+async def _startup():
+    """DB接続・Blobログ書き込みを準備し、コールドスタート時間を記録"""
+    startup_started = time.perf_counter()
+    logger.info(f"🚀 アプリケーション起動中...（pid={os.getpid()}）")
+
+    # 共有エンジンを作成し、スキーマが Alembic の head なら create_all を省略
+    # （alembic_version の確認が接続確認を兼ねる）
     try:
         db_manager.initialize()  # create_pool() ではなく initialize() を使用
-        await init_database()
-        logger.info("✅ データベース初期化完了")
+        schema = await ensure_schema()
+        if schema["create_all"]:
+            logger.info(
+                f"✅ データベース初期化完了（create_all 実行: "
+                f"revision={schema['revision']} head={schema['head']}）"
+            )
+        else:
+            logger.info(f"✅ データベース接続確認完了（スキーマは head: {schema['head']}）")
     except Exception as e:
-        logger.error(f"❌ データベース初期化エラー: {e}")
+        logger.warning(f"⚠️  データベース接続に失敗しました: {e}")
 
-    yield
+    # Blob操作ログのバックグラウンド書き込みを開始
+    blob_log_writer.start()
+
+    ready = time.perf_counter()
+    logger.info(
+        f"⏱️ コールドスタート: 合計 {(ready - MODULE_LOAD_STARTED) * 1000:.0f}ms "
+        f"(モジュール読み込み {(startup_started - MODULE_LOAD_STARTED) * 1000:.0f}ms, "
+        f"起動処理 {(ready - startup_started) * 1000:.0f}ms)"
+    )
 
-    # 終了時
-    logger.info("🔄 アプリケーション終了中...")
-    await db_manager.close()  # close_pool() ではなく close() を使用
-    logger.info("✅ データベース接続を閉じました")
+
+# ==============================================================================
+# FastAPI アプリケーション設定
+# ==============================================================================
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """アプリケーションの起動・終了時の処理（ワーカーごとに1回）"""
+    await startup_worker()
+    yield
+    await shutdown_worker()
 
 
 # FastAPIアプリケーション
@@ -91,42 +146,56 @@ fastapi_app = FastAPI(
     version="2.0.0",
     description="Azure Functions + FastAPI + MySQL + Blob Storage + EventGrid + Assign-Kun API",
     lifespan=lifespan,
+    # 辞書を返すエンドポイントも orjson でシリアライズする
+    default_response_class=FastJSONResponse,
+)
+
+# リクエストごとのDB再試行回数の上限
+fastapi_app.add_middleware(RetryBudgetMiddleware)
+
+# 一定サイズ以上の応答（JSON の一覧など）をクライアントが対応していれば gzip 圧縮
+# （静的ページは圧縮済みで Content-Encoding が付いているため、そのまま返す）
+fastapi_app.add_middleware(
+    GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL
 )
 
 # ==============================================================================
 # ルーター登録
 # ==============================================================================
 
-# APIエンドポイント
-fastapi_app.include_router(
-    assignkun_endpoints.router, prefix="/assign-kun", tags=["📊 Assign-Kun API"]
-)
-fastapi_app.include_router(
-    blob_endpoints.router, prefix="/blob", tags=["� Blob Storage"]
-)
-fastapi_app.include_router(blob_views.router, prefix="/blob", tags=["� Blob Views"])
-fastapi_app.include_router(
-    eventgrid_endpoints.router, prefix="/eventgrid", tags=["⚡ EventGrid"]
-)
-fastapi_app.include_router(csv_endpoints.router, prefix="/csv", tags=["📂 CSV Upload"])
-fastapi_app.include_router(
-    csv_blob_endpoints.router, prefix="/csv-blob", tags=["📂 CSV Blob Storage"]
-)
+# ルーターはプレフィックスへの初回リクエスト時にインポートして登録する
+lazy_routers = LazyRouters(fastapi_app)
 
-# MySQLエンドポイントは条件付きで登録
-if MYSQL_AVAILABLE:
-    fastapi_app.include_router(
-        mysql_endpoints.router, prefix="/mysql", tags=["🗄️ MySQL Database"]
-    )
-    logger.info("MySQL エンドポイントが登録されました")
-else:
-    logger.warning("MySQL エンドポイントはスキップされました")
+# APIエンドポイント
+lazy_routers.add("assignkun_endpoints", "/assign-kun", ["📊 Assign-Kun API"])
+lazy_routers.add("blob_endpoints", "/blob", ["� Blob Storage"])
+lazy_routers.add("blob_views", "/blob", ["� Blob Views"])
+lazy_routers.add("eventgrid_endpoints", "/eventgrid", ["⚡ EventGrid"])
+lazy_routers.add("csv_endpoints", "/csv", ["📂 CSV Upload"])
+lazy_routers.add("csv_blob_endpoints", "/csv-blob", ["📂 CSV Blob Storage"])
+
+# MySQLエンドポイントは条件付きで登録（インポートできなければスキップ）
+lazy_routers.add("mysql_endpoints", "/mysql", ["🗄️ MySQL Database"], optional=True)
+lazy_routers.add("bulk_endpoints", "/mysql/bulk", ["🗄️ MySQL Bulk"], optional=True)
+lazy_routers.add("export_endpoints", "/export", ["📤 Data Export"], optional=True)
+lazy_routers.add("admin_endpoints", "/admin", ["🛠️ Admin"], optional=True)
 
 # 古いWebhookエンドポイントとの互換性のため
-fastapi_app.include_router(
-    eventgrid_endpoints.router, prefix="/webhook", tags=["⚡ EventGrid Legacy"]
+lazy_routers.add("eventgrid_endpoints", "/webhook", ["⚡ EventGrid Legacy"])
+
+fastapi_app.add_middleware(LazyRouterMiddleware, routers=lazy_routers)
+
+# Assign-Kun の読み取り API にデータのバージョンから作る ETag を付け、変更がなければ 304
+# 最も外側に置き、304 ではルーターの読み込みも行わない
+# （gzip 圧縮後の Content-Encoding を見て ETag を分けるため、GZipMiddleware より外側）
+# salt はルーターのソースを含むハッシュで、固定のデモデータもデプロイごとに ETag が変わる
+fastapi_app.add_middleware(
+    DataVersionMiddleware, salt=route_table_hash(fastapi_app, lazy_routers)
 )
 
+# /openapi.json・/docs はビルド時に生成した openapi.json を返す
+install_openapi(fastapi_app, lazy_routers)
+
 
 # ==============================================================================
 # ヘルスチェックエンドポイント
@@ -141,14 +210,19 @@ def health_check():
         "service": "Azure統合プラットフォーム",
         "database": "MySQL",
         "version": "2.0.0",
+        "worker": {
+            "pid": os.getpid(),
+            "started": worker_state["started"],
+            "started_at": worker_state["started_at"],
+        },
     }
 
 
 @fastapi_app.get("/db-health")
 async def db_health_check():
-    """データベース接続ヘルスチェック"""
+    """データベース接続ヘルスチェック（共有エンジンを使用）"""
     try:
-        if await test_connection():
+        if await check_connection():
             return {
                 "status": "healthy",
                 "database": "MySQL",
@@ -161,346 +235,33 @@ async def db_health_check():
         return {"status": "error", "database": "MySQL", "error": str(e)}
 
 
+@fastapi_app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus 形式のメトリクス（DB接続プール）"""
+    return PlainTextResponse(
+        pool_metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 # ==============================================================================
 # ホームページ
 # ==============================================================================
 
 
 @fastapi_app.get("/")
-def read_root():
+def read_root(request: Request):
     """統合プラットフォーム管理画面"""
-    return HTMLResponse(content=get_homepage_html())
-
-
-def get_homepage_html():
-    """ホームページのHTMLコンテンツを生成"""
-    return """
-    <!DOCTYPE html>
-    <html lang="ja">
-        <head>
-            <title>Azure統合プラットフォーム</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                * {
-                    margin: 0;
-                    padding: 0;
-                    box-sizing: border-box;
-                }
-                
-                body { 
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    min-height: 100vh;
-                    padding: 20px;
-                }
-                
-                .container { 
-                    background: white;
-                    border-radius: 15px;
-                    box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-                    max-width: 800px;
-                    margin: 0 auto;
-                    overflow: hidden;
-                }
-                
-                .header { 
-                    background: linear-gradient(135deg, #007acc 0%, #0056b3 100%);
-                    color: white;
-                    padding: 40px 30px;
-                    text-align: center;
-                }
-                
-                .header h1 {
-                    font-size: 2.5em;
-                    margin-bottom: 10px;
-                    font-weight: 300;
-                }
-                
-                .header p {
-                    font-size: 1.1em;
-                    opacity: 0.9;
-                }
-                
-                .content {
-                    padding: 40px 30px;
-                }
-                
-                .section {
-                    margin-bottom: 40px;
-                }
-                
-                .section-title {
-                    color: #333;
-                    font-size: 1.4em;
-                    font-weight: 600;
-                    margin-bottom: 20px;
-                    padding-bottom: 10px;
-                    border-bottom: 3px solid #007acc;
-                    display: flex;
-                    align-items: center;
-                }
-                
-                .section-title::before {
-                    content: '';
-                    display: inline-block;
-                    width: 4px;
-                    height: 20px;
-                    background: #007acc;
-                    margin-right: 10px;
-                }
-                
-                .links {
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-                    gap: 15px;
-                }
-                
-                .link-button {
-                    display: block;
-                    color: #333;
-                    text-decoration: none;
-                    padding: 20px;
-                    border: 2px solid #e0e0e0;
-                    border-radius: 10px;
-                    transition: all 0.3s ease;
-                    background: #f8f9fa;
-                    position: relative;
-                    overflow: hidden;
-                }
-                
-                .link-button::before {
-                    content: '';
-                    position: absolute;
-                    top: 0;
-                    left: -100%;
-                    width: 100%;
-                    height: 100%;
-                    background: linear-gradient(90deg, transparent, rgba(255,255,255,0.4), transparent);
-                    transition: left 0.5s;
-                }
-                
-                .link-button:hover::before {
-                    left: 100%;
-                }
-                
-                .link-button:hover {
-                    border-color: #007acc;
-                    transform: translateY(-2px);
-                    box-shadow: 0 8px 25px rgba(0,122,204,0.15);
-                    background: #fff;
-                }
-                
-                .link-button h3 {
-                    font-size: 1.1em;
-                    margin-bottom: 8px;
-                    color: #007acc;
-                }
-                
-                .link-button p {
-                    color: #666;
-                    font-size: 0.9em;
-                    line-height: 1.4;
-                }
-                
-                .footer {
-                    background: #f8f9fa;
-                    padding: 30px;
-                    text-align: center;
-                    border-top: 1px solid #e0e0e0;
-                }
-                
-                .footer p {
-                    color: #666;
-                    font-size: 0.9em;
-                }
-                
-                .status-badge {
-                    display: inline-block;
-                    background: #28a745;
-                    color: white;
-                    padding: 4px 8px;
-                    border-radius: 12px;
-                    font-size: 0.8em;
-                    margin-left: 10px;
-                }
-                
-                @media (max-width: 768px) {
-                    .header h1 {
-                        font-size: 2em;
-                    }
-                    .content {
-                        padding: 30px 20px;
-                    }
-                    .links {
-                        grid-template-columns: 1fr;
-                    }
-                }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>🚀 Azure統合プラットフォーム</h1>
-                    <p>Azure Functions + FastAPI + MySQL + Blob Storage + EventGrid</p>
-                    <span class="status-badge">ONLINE</span>
-                </div>
-                
-                <div class="content">
-                    <div class="section">
-                        <h2 class="section-title">📊 Assign-Kun API</h2>
-                        <div class="links">
-                            <a href="/assign-kun/assigns" class="link-button">
-                                <h3>📊 アサインデータ</h3>
-                                <p>ホーム画面アサインデータ取得・管理</p>
-                            </a>
-                            <a href="/assign-kun/histograms" class="link-button">
-                                <h3>� ヒストグラムデータ</h3>
-                                <p>リソースヒストグラム表示・分析</p>
-                            </a>
-                            <a href="/assign-kun/projects" class="link-button">
-                                <h3>📋 プロジェクト管理</h3>
-                                <p>プロジェクト情報表示・管理</p>
-                            </a>
-                            <a href="/assign-kun/users" class="link-button">
-                                <h3>👥 ユーザー管理</h3>
-                                <p>メンバー情報表示・管理</p>
-                            </a>
-                            <a href="/assign-kun/notices" class="link-button">
-                                <h3>🔔 通知管理</h3>
-                                <p>通知一覧表示・管理</p>
-                            </a>
-                            <a href="/assign-kun/informations" class="link-button">
-                                <h3>📊 情報ダッシュボード</h3>
-                                <p>総計情報表示・分析</p>
-                            </a>
-                        </div>
-                    </div>
-                    
-                    <div class="section">
-                        <h2 class="section-title">🗄️ MySQL Database</h2>
-                        <div class="links">
-                            <a href="/mysql/users" class="link-button">
-                                <h3>👥 ユーザー管理</h3>
-                                <p>ユーザー情報のCRUD操作</p>
-                            </a>
-                            <a href="/mysql/projects" class="link-button">
-                                <h3>📋 プロジェクト管理</h3>
-                                <p>プロジェクト情報のCRUD操作</p>
-                            </a>
-                            <a href="/mysql/assignments" class="link-button">
-                                <h3>📊 アサインメント管理</h3>
-                                <p>アサインメント情報のCRUD操作</p>
-                            </a>
-                            <a href="/mysql/notices" class="link-button">
-                                <h3>🔔 通知管理</h3>
-                                <p>通知情報のCRUD操作</p>
-                            </a>
-                            <a href="/mysql/histograms" class="link-button">
-                                <h3>� ヒストグラム管理</h3>
-                                <p>ヒストグラムデータのCRUD操作</p>
-                            </a>
-                        </div>
-                    </div>
-                    
-                    <div class="section">
-                        <h2 class="section-title">💾 Azure Blob Storage</h2>
-                        <div class="links">
-                            <a href="/blob/view" class="link-button">
-                                <h3>📄 Blobテキスト表示</h3>
-                                <p>ファイル内容の表示・確認</p>
-                            </a>
-                            <a href="/blob/list-view" class="link-button">
-                                <h3>📁 ファイル一覧</h3>
-                                <p>コンテナ内のファイル一覧表示</p>
-                            </a>
-                        </div>
-                    </div>
-                    
-                    <div class="section">
-                        <h2 class="section-title">⚡ EventGrid</h2>
-                        <div class="links">
-                            <a href="/eventgrid/events-view" class="link-button">
-                                <h3>⚡ EventGrid ダッシュボード</h3>
-                                <p>リアルタイムイベント監視</p>
-                            </a>
-                            <a href="/eventgrid/test-ui" class="link-button">
-                                <h3>🧪 EventGrid テストツール</h3>
-                                <p>ローカル環境でのEventGridテスト</p>
-                            </a>
-                            <a href="/eventgrid/setup-guide" class="link-button">
-                                <h3>🔧 EventGrid セットアップ</h3>
-                                <p>Azure Event Grid設定ガイド</p>
-                            </a>
-                        </div>
-                    </div>
-                    
-                    <div class="section">
-                        <h2 class="section-title">📚 開発者向けツール</h2>
-                        <div class="links">
-                            <a href="/docs" class="link-button">
-                                <h3>📚 API文書 (Swagger UI)</h3>
-                                <p>インタラクティブなAPI文書</p>
-                            </a>
-                            <a href="/redoc" class="link-button">
-                                <h3>📖 API文書 (ReDoc)</h3>
-                                <p>きれいなAPI文書</p>
-                            </a>
-                            <a href="/health" class="link-button">
-                                <h3>🔍 システムヘルスチェック</h3>
-                                <p>システム状態確認</p>
-                            </a>
-                            <a href="/db-health" class="link-button">
-                                <h3>🔍 データベースヘルスチェック</h3>
-                                <p>MySQL接続状態確認</p>
-                            </a>
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="footer">
-                    <p><strong>Azure統合プラットフォーム v2.0</strong></p>
-                    <p>FastAPI + Azure Functions + MySQL + Blob Storage + EventGrid</p>
-                </div>
-            </div>
-        </body>
-    </html>
-    """
+    return static_page(request, "index.html")
 
 
 # ==============================================================================
 # Azure Functions
 # ==============================================================================
 
-# Azure Functions App
-app = func.FunctionApp()
-
-
-@app.route(route="hello")
-def http_trigger(req: func.HttpRequest) -> func.HttpResponse:
-    """Azure Functions HTTPトリガー"""
-    logging.info("🔄 Azure Functions HTTP trigger が呼び出されました")
-
-    name = req.params.get("name")
-    if not name:
-        try:
-            req_body = req.get_json()
-        except ValueError:
-            pass
-        else:
-            name = req_body.get("name")
-
-    if name:
-        return func.HttpResponse(
-            f"こんにちは、{name}さん！Azure Functions HTTP トリガーが正常に実行されました。"
-        )
-    else:
-        return func.HttpResponse(
-            "Azure Functions HTTP トリガーが正常に実行されました。"
-            "パーソナライズされたレスポンスを取得するには、"
-            "クエリ文字列またはリクエスト本文で名前を渡してください。",
-            status_code=200,
-        )
+# Azure Functions App（FastAPI アプリケーションを同じワーカーで ASGI として提供）
+# host.json の routePrefix を "" にしているため、パスは FastAPI と同じ
+app = func.AsgiFunctionApp(app=fastapi_app, http_auth_level=func.AuthLevel.ANONYMOUS)
 
 
 @app.event_grid_trigger(arg_name="azeventgrid")
@@ -523,6 +284,35 @@ def EventGridTrigger(azeventgrid: func.EventGridEvent):
         logging.error(f"❌ EventGrid処理エラー: {e}")
 
 
+@app.timer_trigger(
+    schedule="0 0 18 * * *",
+    arg_name="retention_timer",
+    run_on_startup=False,
+    use_monitor=False,
+)
+async def RetentionTimerTrigger(retention_timer: func.TimerRequest):
+    """Azure Functions タイマートリガー（毎日 18:00 UTC = 03:00 JST にリテンション実行）"""
+    logging.info("🧹 Azure Functions リテンション timer trigger が呼び出されました")
+
+    try:
+        import retention
+    except ImportError:
+        logging.warning("MySQL関連のモジュールが利用できないためスキップします")
+        return
+
+    # HTTP 呼び出しより先に実行された場合もDB接続などを準備
+    await startup_worker()
+
+    try:
+        results = await retention.run_retention()
+        for result in results:
+            logging.info(
+                f"📋 {result['table']}: {result['archived']}件をアーカイブしました"
+            )
+    except Exception as e:
+        logging.error(f"❌ リテンション処理エラー: {e}")
+
+
 # ==============================================================================
 # アプリケーションエイリアス
 # ==============================================================================
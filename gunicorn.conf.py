@@ -0,0 +1,40 @@
+"""
+gunicorn 設定（uvicorn ワーカーで FastAPI アプリケーションを複数プロセス起動）
+
+起動方法:
+    gunicorn -c gunicorn.conf.py function_app:fastapi_app
+
+各ワーカーが lifespan を1回実行し、DBエンジン・Blobクライアント・キャッシュを
+プロセス内で保持します。フォーク後にワーカーごとに接続を作るため、
+preload_app は使いません（親プロセスで作った接続を子プロセスで共有しない）。
+"""
+
+import multiprocessing
+import os
+
+# 待ち受けアドレス
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# ワーカー数（非同期ワーカーのため CPU 数を基準にする）と種類
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Keep-Alive の秒数（前段のロードバランサーのアイドルタイムアウトより長くし、
+# ロードバランサーが再利用しようとした接続をアプリ側が先に閉じないようにする）
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+
+# 応答のないワーカーの再起動までの秒数と、終了時に処理中のリクエストを待つ秒数
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+# メモリ増加を抑えるため、一定数のリクエストでワーカーを入れ替える
+# （全ワーカーが同時に入れ替わらないよう jitter でずらす）
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+preload_app = False
+
+# ログ
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
@@ -0,0 +1,272 @@
+"""
+ヒストグラム生成エンジン
+
+このモジュールは以下の機能を提供します：
+- assign_data / histogram_data の数値列からのビン計算（NumPy）
+- 等幅（fixed）・分位点（quantile）・境界指定（edges）の3方式
+- グループ列ごと（例: プロジェクトコード、年）のヒストグラムの一括計算
+- histograms テーブルへのリソース単位の一括置き換え
+- CSV取り込み後の既定ヒストグラムの再計算
+
+生成したビンは resource_type を "<ソーステーブル>:<列名>"、
+resource_id をグループ列の値（グループなしの場合は 0）として保存します。
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Integer, Numeric, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_crud import commit_or_flush
+from db_models import AssignData, Histogram, HistogramData
+from models import HistogramGenerateRequest
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ヒストグラムの元データにできるテーブル
+SOURCE_MODELS = {
+    "assign_data": AssignData,
+    "histogram_data": HistogramData,
+}
+
+BINNING_METHODS = ("fixed", "quantile", "edges")
+
+# 1つのヒストグラムで作成できるビン数の上限
+MAX_BINS = 100
+
+# CSV取り込み後に再計算する既定のヒストグラム
+DEFAULT_HISTOGRAM_SPECS = {
+    "assign_data": [
+        HistogramGenerateRequest(
+            source="assign_data", column=column, group_by="assin_project_code"
+        )
+        for column in ("assin_execution", "assin_directly")
+    ],
+    "histogram_data": [
+        HistogramGenerateRequest(
+            source="histogram_data",
+            column=f"histogram_{month}month",
+            group_by="histogram_year",
+        )
+        for month in range(1, 13)
+    ],
+}
+
+
+class HistogramEngineError(ValueError):
+    """ヒストグラム生成の指定が不正"""
+
+    pass
+
+
+def resource_type_for(source: str, column: str) -> str:
+    """ヒストグラムの resource_type（"<ソース>:<列名>"）"""
+    return f"{source}:{column}"
+
+
+def numeric_columns(model, types: Tuple[type, ...] = (Integer, Numeric)) -> List[str]:
+    """ビン計算に使用できる数値列の一覧（id を除く）"""
+    return [
+        column.name
+        for column in model.__table__.columns
+        if isinstance(column.type, types) and column.name != "id"
+    ]
+
+
+def validate_spec(spec: HistogramGenerateRequest):
+    """生成指定を検証し、元テーブルのモデルを返す"""
+    model = SOURCE_MODELS.get(spec.source)
+    if model is None:
+        raise HistogramEngineError(f"不明なソースです: {spec.source}")
+
+    if spec.column not in numeric_columns(model):
+        raise HistogramEngineError(f"数値列ではありません: {spec.column}")
+    # グループ値は resource_id になるため整数列のみ
+    if spec.group_by is not None and spec.group_by not in numeric_columns(
+        model, (Integer,)
+    ):
+        raise HistogramEngineError(f"グループ列に使用できません: {spec.group_by}")
+
+    if spec.method not in BINNING_METHODS:
+        raise HistogramEngineError(f"不明な方式です: {spec.method}")
+    if spec.method == "edges":
+        if not spec.edges or len(spec.edges) < 2:
+            raise HistogramEngineError("edges には2つ以上の境界値が必要です")
+        if len(spec.edges) - 1 > MAX_BINS:
+            raise HistogramEngineError(f"ビン数は{MAX_BINS}以下にしてください")
+        if np.any(np.diff(spec.edges) <= 0):
+            raise HistogramEngineError("edges は昇順で指定してください")
+    elif not 1 <= spec.bins <= MAX_BINS:
+        raise HistogramEngineError(f"ビン数は1〜{MAX_BINS}で指定してください")
+    return model
+
+
+# ==============================================================================
+# ビン計算
+# ==============================================================================
+
+
+def group_edges(
+    values: np.ndarray,
+    starts: np.ndarray,
+    sizes: np.ndarray,
+    method: str,
+    bins: int,
+    edges: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    """グループごとのビン境界を計算（values はグループ内で昇順に並んでいること）
+
+    戻り値は (グループ数, ビン数 + 1) の配列
+    """
+    if method == "edges":
+        return np.tile(np.asarray(edges, dtype=float), (len(starts), 1))
+
+    lows = values[starts]
+    highs = values[starts + sizes - 1]
+
+    if method == "quantile":
+        # 昇順に並んだ値から分位点を線形補間で求める（np.quantile と同じ方式）
+        positions = (
+            starts[:, None]
+            + np.linspace(0.0, 1.0, bins + 1)[None, :] * (sizes - 1)[:, None]
+        )
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, (starts + sizes - 1)[:, None])
+        fraction = positions - lower
+        return values[lower] * (1.0 - fraction) + values[upper] * fraction
+
+    # 等幅: 全値が同じグループは np.histogram と同様に ±0.5 の幅を取る
+    same = lows == highs
+    lows = np.where(same, lows - 0.5, lows)
+    highs = np.where(same, highs + 0.5, highs)
+    return lows[:, None] + (highs - lows)[:, None] * np.linspace(0.0, 1.0, bins + 1)
+
+
+def bin_counts(
+    values: np.ndarray, starts: np.ndarray, sizes: np.ndarray, edges: np.ndarray
+) -> np.ndarray:
+    """グループごとのビン件数（[左端, 右端)、最後のビンのみ右端を含む）"""
+    counts = np.empty((len(starts), edges.shape[1] - 1), dtype=np.int64)
+    for index, (start, size) in enumerate(zip(starts, sizes)):
+        segment = values[start : start + size]
+        positions = np.searchsorted(segment, edges[index], side="left")
+        positions[-1] = np.searchsorted(segment, edges[index][-1], side="right")
+        counts[index] = np.diff(positions)
+    return counts
+
+
+def compute_histograms(
+    group_keys: np.ndarray,
+    values: np.ndarray,
+    method: str = "fixed",
+    bins: int = 10,
+    edges: Optional[Sequence[float]] = None,
+) -> List[Tuple[int, np.ndarray, np.ndarray]]:
+    """グループごとのヒストグラムを計算
+
+    戻り値は (グループ値, ビン境界, ビン件数) のリスト
+    """
+    if len(values) == 0:
+        return []
+
+    # グループ・値の順に並べ替え、グループの開始位置と件数を求める
+    order = np.lexsort((values, group_keys))
+    group_keys = group_keys[order]
+    values = values[order]
+    keys, starts, sizes = np.unique(group_keys, return_index=True, return_counts=True)
+
+    all_edges = group_edges(values, starts, sizes, method, bins, edges)
+    counts = bin_counts(values, starts, sizes, all_edges)
+    return [
+        (int(key), all_edges[index], counts[index]) for index, key in enumerate(keys)
+    ]
+
+
+def histogram_rows(
+    spec: HistogramGenerateRequest,
+    results: List[Tuple[int, np.ndarray, np.ndarray]],
+) -> List[Dict[str, Any]]:
+    """計算結果を histograms テーブルの行に変換"""
+    resource_type = resource_type_for(spec.source, spec.column)
+    rows = []
+    for group_value, edges, counts in results:
+        total = int(counts.sum())
+        for index, count in enumerate(counts.tolist()):
+            lower, upper = float(edges[index]), float(edges[index + 1])
+            rows.append(
+                {
+                    "resource_type": resource_type,
+                    "resource_id": group_value,
+                    "bin_label": f"{lower:g}-{upper:g}",
+                    "bin_value": int(np.floor(lower)),
+                    "count": count,
+                    "percentage": f"{count / total * 100:.2f}" if total else "0.00",
+                    "additional_data": {
+                        "method": spec.method,
+                        "bin_index": index,
+                        "lower": lower,
+                        "upper": upper,
+                        "group_by": spec.group_by,
+                    },
+                }
+            )
+    return rows
+
+
+# ==============================================================================
+# データベース操作
+# ==============================================================================
+
+
+async def generate_histograms(
+    db: AsyncSession, spec: HistogramGenerateRequest, commit: bool = True
+) -> Dict[str, Any]:
+    """元テーブルの列からヒストグラムを計算し、histograms の該当リソースを置き換える"""
+    model = validate_spec(spec)
+    value_column = getattr(model, spec.column)
+    group_column = getattr(model, spec.group_by) if spec.group_by else None
+
+    query = select(value_column).where(value_column.is_not(None))
+    if group_column is not None:
+        query = query.add_columns(group_column).where(group_column.is_not(None))
+    result = await db.execute(query)
+    rows = result.all()
+
+    values = np.fromiter((row[0] for row in rows), dtype=float, count=len(rows))
+    if group_column is not None:
+        group_keys = np.fromiter(
+            (row[1] for row in rows), dtype=np.int64, count=len(rows)
+        )
+    else:
+        group_keys = np.zeros(len(rows), dtype=np.int64)
+
+    results = compute_histograms(group_keys, values, spec.method, spec.bins, spec.edges)
+    bin_rows = histogram_rows(spec, results)
+
+    # 同じソース・列のビンは全グループ分をまとめて置き換える
+    resource_type = resource_type_for(spec.source, spec.column)
+    await db.execute(delete(Histogram).where(Histogram.resource_type == resource_type))
+    if bin_rows:
+        await db.execute(insert(Histogram), bin_rows)
+    await commit_or_flush(db, commit)
+
+    return {
+        "resource_type": resource_type,
+        "resources": len(results),
+        "bins": len(bin_rows),
+        "values": len(values),
+    }
+
+
+async def regenerate_source_histograms(
+    db: AsyncSession, source: str, commit: bool = True
+) -> List[Dict[str, Any]]:
+    """ソーステーブルの既定ヒストグラムをすべて再計算（CSV取り込み後に使用）"""
+    summaries = []
+    for spec in DEFAULT_HISTOGRAM_SPECS.get(source, []):
+        summaries.append(await generate_histograms(db, spec, commit=False))
+    await commit_or_flush(db, commit)
+    logger.info(f"ヒストグラム再計算完了: {source} ({len(summaries)}種類)")
+    return summaries
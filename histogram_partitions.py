@@ -0,0 +1,266 @@
+"""
+histogram_data の年別パーティション管理
+
+このモジュールは以下の機能を提供します：
+- histogram_year による RANGE パーティションの一覧取得
+- 新しい年のパーティション追加（p_max の分割）
+- 取り込み年のパーティションの EXCHANGE PARTITION による差し替え
+
+パーティション操作は DDL のため、MySQL では実行時に暗黙のコミットが発生します。
+そのため取り込みのトランザクションより前に専用の接続で実行し、差し替えられなかった年は
+呼び出し側で DELETE + INSERT により置き換えます（HistogramDataCRUD.replace_years）。
+交換で外した旧データは取り込みのトランザクションがコミットされるまで作業テーブルに残し、
+失敗した場合は交換し直して元に戻します。
+パーティションが設定されていない環境（create_all で作成したテーブル等）では
+何もせず、全ての年が DELETE + INSERT で置き換えられます。
+"""
+
+import re
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Set
+
+from sqlalchemy import MetaData, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database import db_manager
+from db_models import HistogramData
+import logging
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = HistogramData.__tablename__
+
+# 最新年より後の値を受けるパーティション
+MAX_PARTITION = "p_max"
+
+YEAR_PARTITION_PATTERN = re.compile(r"^p(\d{4})$")
+
+# 取り込みどうしで作業テーブルを取り合わないようにする名前付きロック
+IMPORT_LOCK_NAME = f"{TABLE_NAME}_import"
+IMPORT_LOCK_TIMEOUT = 60
+
+
+def partition_name(year: int) -> str:
+    """年のパーティション名"""
+    return f"p{year}"
+
+
+def stage_name(year: int) -> str:
+    """年の作業テーブル名"""
+    return f"{TABLE_NAME}_stage_{year}"
+
+
+def rows_by_year(
+    histogram_list: List[Dict[str, Any]],
+) -> Dict[int, List[Dict[str, Any]]]:
+    """取り込みデータを年ごとに分割"""
+    grouped = defaultdict(list)
+    for data in histogram_list:
+        grouped[data["histogram_year"]].append(data)
+    return dict(sorted(grouped.items()))
+
+
+async def get_year_partitions(conn: AsyncConnection) -> Set[int]:
+    """年単位のパーティションがある年の一覧（パーティションなしの場合は空）"""
+    if conn.dialect.name != "mysql":
+        return set()
+    result = await conn.execute(
+        text(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+            "AND PARTITION_NAME IS NOT NULL"
+        ),
+        {"table": TABLE_NAME},
+    )
+    years = set()
+    for (name,) in result:
+        match = YEAR_PARTITION_PATTERN.match(name)
+        if match:
+            years.add(int(match.group(1)))
+    return years
+
+
+async def add_year_partitions(
+    conn: AsyncConnection, existing: Set[int], years: List[int]
+) -> Set[int]:
+    """最新年より後の年のパーティションを p_max を分割して追加"""
+    latest = max(existing)
+    if max(years) <= latest:
+        return existing
+
+    new_years = range(latest + 1, max(years) + 1)
+    definitions = ", ".join(
+        f"PARTITION {partition_name(year)} VALUES LESS THAN ({year + 1})"
+        for year in new_years
+    )
+    await conn.execute(
+        text(
+            f"ALTER TABLE {TABLE_NAME} REORGANIZE PARTITION {MAX_PARTITION} INTO "
+            f"({definitions}, PARTITION {MAX_PARTITION} VALUES LESS THAN MAXVALUE)"
+        )
+    )
+    logger.info(f"パーティション追加: {new_years.start}〜{new_years.stop - 1}")
+    return existing | set(new_years)
+
+
+async def reserve_ids(conn: AsyncConnection, count: int) -> int:
+    """本テーブルの採番から count 件分の ID を予約し、先頭の ID を返す
+
+    LOCK TABLES の間は他の接続の INSERT が待たされるため、max(id) の読み取りから
+    AUTO_INCREMENT の更新までの間に同じ ID が採番されることはない
+    """
+    await conn.execute(text(f"LOCK TABLES {TABLE_NAME} WRITE"))
+    try:
+        result = await conn.execute(select(func.max(HistogramData.id)))
+        first_id = (result.scalar() or 0) + 1
+        await conn.execute(
+            text(f"ALTER TABLE {TABLE_NAME} AUTO_INCREMENT = {first_id + count}")
+        )
+    finally:
+        await conn.execute(text("UNLOCK TABLES"))
+    return first_id
+
+
+async def exchange_partition(conn: AsyncConnection, year: int) -> None:
+    """年のパーティションと作業テーブルの中身を入れ替える"""
+    # 対象年の行のみを入れているため検証は省略できる
+    await conn.execute(
+        text(
+            f"ALTER TABLE {TABLE_NAME} EXCHANGE PARTITION {partition_name(year)} "
+            f"WITH TABLE {stage_name(year)} WITHOUT VALIDATION"
+        )
+    )
+
+
+async def drop_stage(conn: AsyncConnection, year: int) -> None:
+    await conn.execute(text(f"DROP TABLE IF EXISTS {stage_name(year)}"))
+
+
+async def exchange_year(
+    conn: AsyncConnection, year: int, rows: List[Dict[str, Any]], first_id: int
+) -> None:
+    """年のデータを作業テーブルに作成し、パーティションと交換する
+
+    交換後の作業テーブルには旧データが入る（restore_year で元に戻せる）
+    """
+    stage = stage_name(year)
+    await drop_stage(conn, year)
+    await conn.execute(text(f"CREATE TABLE {stage} LIKE {TABLE_NAME}"))
+    await conn.execute(text(f"ALTER TABLE {stage} REMOVE PARTITIONING"))
+    try:
+        # ID は予約した範囲から明示的に割り当てる
+        stage_table = HistogramData.__table__.to_metadata(MetaData(), name=stage)
+        await conn.execute(
+            insert(stage_table),
+            [{**data, "id": first_id + index} for index, data in enumerate(rows)],
+        )
+        await exchange_partition(conn, year)
+    except Exception:
+        await drop_stage(conn, year)
+        raise
+
+
+async def restore_year(conn: AsyncConnection, year: int) -> None:
+    """作業テーブルに残した旧データをパーティションに戻す"""
+    await exchange_partition(conn, year)
+    await drop_stage(conn, year)
+
+
+async def exchange_years(
+    conn: AsyncConnection, grouped: Dict[int, List[Dict[str, Any]]]
+) -> Set[int]:
+    """年単位のパーティションがある年を差し替え、差し替えた年を返す"""
+    exchanged = set()
+    existing = await get_year_partitions(conn)
+    if not existing:
+        return exchanged
+    existing = await add_year_partitions(conn, existing, list(grouped))
+
+    targets = {year: rows for year, rows in grouped.items() if year in existing}
+    if not targets:
+        return exchanged
+    next_id = await reserve_ids(conn, sum(len(rows) for rows in targets.values()))
+    for year, rows in targets.items():
+        try:
+            await exchange_year(conn, year, rows, next_id)
+        except Exception as e:
+            logger.warning(
+                f"パーティション差し替え失敗（DELETEで置き換え）: {year}: {e}"
+            )
+        else:
+            exchanged.add(year)
+        next_id += len(rows)
+    return exchanged
+
+
+@asynccontextmanager
+async def year_partition_exchange(
+    conn: AsyncConnection, histogram_list: List[Dict[str, Any]]
+) -> AsyncIterator[Set[int]]:
+    """conn 上でパーティションを差し替え、差し替えた年を渡す
+
+    ブロック内の取り込み（月別値・事前集計・ヒストグラムの再計算）が失敗した
+    場合は、作業テーブルに残した旧データと交換し直して元に戻す。成功した場合のみ
+    作業テーブルを削除する。
+    """
+    grouped = rows_by_year(histogram_list)
+    if not grouped or conn.dialect.name != "mysql":
+        yield set()
+        return
+
+    result = await conn.execute(
+        text("SELECT GET_LOCK(:name, :timeout)"),
+        {"name": IMPORT_LOCK_NAME, "timeout": IMPORT_LOCK_TIMEOUT},
+    )
+    if result.scalar() != 1:
+        # 他の取り込みが実行中の場合は交換せず、トランザクション内で置き換える
+        logger.warning("パーティション差し替えのロックを取得できませんでした")
+        yield set()
+        return
+
+    try:
+        exchanged = await exchange_years(conn, grouped)
+        logger.info(f"パーティション差し替え完了: {sorted(exchanged)}")
+        try:
+            yield exchanged
+        except BaseException:
+            for year in sorted(exchanged):
+                try:
+                    await restore_year(conn, year)
+                except Exception as e:
+                    logger.error(
+                        f"パーティションを元に戻せませんでした（旧データは "
+                        f"{stage_name(year)} に残っています）: {e}"
+                    )
+            if exchanged:
+                logger.info(f"パーティションを元に戻しました: {sorted(exchanged)}")
+            raise
+        for year in sorted(exchanged):
+            await drop_stage(conn, year)
+    finally:
+        await conn.execute(
+            text("SELECT RELEASE_LOCK(:name)"), {"name": IMPORT_LOCK_NAME}
+        )
+
+
+@asynccontextmanager
+async def exchange_year_partitions(
+    histogram_list: List[Dict[str, Any]],
+) -> AsyncIterator[Set[int]]:
+    """取り込みデータの年のパーティションを差し替え、差し替えた年を渡す
+
+    最古のパーティションより前の年など、年単位のパーティションがない年は
+    差し替えずに呼び出し側の DELETE + INSERT に任せる。取り込みの
+    トランザクションはこのブロック内で実行・コミットすること。
+    """
+    if not rows_by_year(histogram_list):
+        yield set()
+        return
+    if not db_manager._initialized:
+        db_manager.initialize()
+
+    async with db_manager.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        async with year_partition_exchange(conn, histogram_list) as exchanged:
+            yield exchanged
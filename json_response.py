@@ -0,0 +1,84 @@
+"""
+JSON レスポンスの高速なシリアライズ
+
+このモジュールは以下の機能を提供します：
+- orjson による JSON レスポンスクラス（アプリケーションの既定のレスポンスクラス）
+- DECIMAL 列（Decimal）・日時列（datetime）の変換
+- レスポンスモデルの TypeAdapter の再利用と、1回だけ検証して JSON にするレスポンス
+
+辞書を返すエンドポイントは、FastAPI が jsonable_encoder で値を1つずつ
+変換してから json.dumps するため、件数が多いとシリアライズが処理時間の
+大半を占めます。一覧系のエンドポイントは FastJSONResponse / model_response
+を直接返し、この変換と response_model による再検証を省略します。
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+# orjson はオプション（インストールされていなければ標準ライブラリの json）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# dict のキーに int（月番号など）を使えるようにする
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def json_default(value: Any) -> Any:
+    """JSON に変換できない値（Decimal, datetime）の変換"""
+    # DECIMAL(10, 2) の列は、既存のレスポンスと同じく数値（float）で返す
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """content を JSON（UTF-8）に変換"""
+    if orjson is not None:
+        # datetime は orjson が isoformat と同じ形式で直接変換する
+        return orjson.dumps(content, default=json_default, option=ORJSON_OPTIONS)
+    return json.dumps(
+        content,
+        default=json_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson でシリアライズする JSON レスポンス"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def response_adapter(response_type: Any) -> TypeAdapter:
+    """レスポンス型の TypeAdapter（型ごとに1回だけ作成）"""
+    return TypeAdapter(response_type)
+
+
+def model_response(response_type: Any, content: Any, status_code: int = 200):
+    """content を response_type で1回だけ検証し、Pydantic で直接 JSON にする
+
+    ORM オブジェクトは from_attributes で読み込む。検証済みのモデルは
+    再検証されない。
+    """
+    adapter = response_adapter(response_type)
+    value = adapter.validate_python(content, from_attributes=True)
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        media_type="application/json",
+    )
@@ -0,0 +1,214 @@
+"""
+ルーターの遅延登録と OpenAPI の事前生成
+
+このモジュールは以下の機能を提供します：
+- ルーターのモジュール名とプレフィックスの登録（起動時にはインポートしない）
+- リクエストのパスに一致するルーターの初回アクセス時のインポートと登録
+- ビルド時に生成した OpenAPI ドキュメント（openapi.json）の読み込み
+  （ルーター構成のハッシュが現在のコードと一致する場合のみ）
+- openapi.json がない場合の全ルーターの読み込みとスキーマ生成
+
+ルーターのモジュールは Azure SDK・Pydantic モデル・HTML 生成などの重い
+インポートを伴うため、コールドスタートでは読み込まず、そのプレフィックスへの
+最初のリクエストで読み込みます。
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import FastAPI
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ビルド時に生成する OpenAPI ドキュメントのパス
+OPENAPI_FILE = os.getenv(
+    "OPENAPI_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "openapi.json"),
+)
+
+# ルーター以外で OpenAPI スキーマの元になるモジュール
+# （アプリに直接登録したルートと、リクエスト・レスポンスのモデル）
+OPENAPI_SOURCE_MODULES = ("function_app", "models")
+
+# openapi.json に書き込むルーター構成のハッシュのキー
+ROUTE_TABLE_HASH_KEY = "x-route-table-hash"
+
+
+class LazyRouters:
+    """プレフィックスごとに遅延登録するルーターの一覧
+
+    登録順にインクルードされるため、プレフィックスが入れ子になる場合
+    （/mysql と /mysql/bulk など）は外側を先に登録する。
+    """
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        module_name: str,
+        prefix: str,
+        tags: Sequence[str],
+        optional: bool = False,
+    ):
+        """ルーターを登録（optional のモジュールはインポートできなければスキップ）"""
+        self.entries.append(
+            {
+                "module": module_name,
+                "prefix": prefix,
+                "tags": list(tags),
+                "optional": optional,
+                "loaded": False,
+                "error": None,
+            }
+        )
+
+    @staticmethod
+    def matches(prefix: str, path: str) -> bool:
+        return path == prefix or path.startswith(prefix + "/")
+
+    def _include(self, entry: Dict[str, Any]):
+        try:
+            module = importlib.import_module(entry["module"])
+        except ImportError as e:
+            if not entry["optional"]:
+                raise
+            entry["error"] = str(e)
+            logger.warning(f"{entry['module']} が利用できないためスキップします: {e}")
+        else:
+            self.app.include_router(
+                module.router, prefix=entry["prefix"], tags=entry["tags"]
+            )
+            logger.info(
+                f"ルーターを登録しました: {entry['prefix']} ({entry['module']})"
+            )
+        entry["loaded"] = True
+
+    def load_for_path(self, path: str):
+        """パスに一致する未登録のルーターをインクルード"""
+        pending = [
+            entry
+            for entry in self.entries
+            if not entry["loaded"] and self.matches(entry["prefix"], path)
+        ]
+        if not pending:
+            return
+        with self._lock:
+            for entry in pending:
+                if not entry["loaded"]:
+                    self._include(entry)
+
+    def load_all(self):
+        """全てのルーターをインクルード（OpenAPI の生成用）"""
+        with self._lock:
+            for entry in self.entries:
+                if not entry["loaded"]:
+                    self._include(entry)
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [dict(entry) for entry in self.entries]
+
+
+class LazyRouterMiddleware:
+    """ルーティングの前に、パスに一致するルーターを登録する ASGI ミドルウェア"""
+
+    def __init__(self, app, routers: LazyRouters):
+        self.app = app
+        self.routers = routers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            self.routers.load_for_path(scope["path"])
+        await self.app(scope, receive, send)
+
+
+# ==============================================================================
+# OpenAPI
+# ==============================================================================
+
+
+def module_source(module_name: str) -> bytes:
+    """モジュールのソース（インポートせずに読む、見つからなければ空）"""
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        return b""
+    with open(spec.origin, "rb") as f:
+        return f.read()
+
+
+def route_table_hash(app: FastAPI, routers: LazyRouters) -> str:
+    """ルーター構成のハッシュ
+
+    ルーターをインポートせずに求めるため、アプリのバージョン、登録内容
+    （モジュール・プレフィックス・タグ）と、ルーターおよびスキーマの元になる
+    モジュールのソースから計算する。ルートやモデルを変更するとハッシュが変わる。
+    """
+    digest = hashlib.sha256(app.version.encode("utf-8"))
+    module_names = [entry["module"] for entry in routers.entries]
+    for entry in routers.entries:
+        digest.update(repr((entry["module"], entry["prefix"], entry["tags"])).encode())
+    for module_name in [*module_names, *OPENAPI_SOURCE_MODULES]:
+        digest.update(module_name.encode("utf-8"))
+        digest.update(hashlib.sha256(module_source(module_name)).digest())
+    return digest.hexdigest()
+
+
+def read_openapi(path: str = OPENAPI_FILE, route_hash: Optional[str] = None):
+    """生成済みの OpenAPI ドキュメントを読む（ない場合・ルーター構成が異なる場合は None）"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            schema = json.load(f)
+    except FileNotFoundError:
+        return None
+    if route_hash is not None and schema.get(ROUTE_TABLE_HASH_KEY) != route_hash:
+        logger.warning(
+            f"{path} は現在のルーター構成から生成されていないため使用しません"
+        )
+        return None
+    return schema
+
+
+def generate_openapi(app: FastAPI, routers: LazyRouters) -> Dict[str, Any]:
+    """全てのルーターを読み込んで OpenAPI スキーマを生成"""
+    routers.load_all()
+    app.openapi_schema = None
+    return FastAPI.openapi(app)
+
+
+def install_openapi(app: FastAPI, routers: LazyRouters, path: str = OPENAPI_FILE):
+    """/openapi.json・/docs が生成済みのファイルを返すよう設定
+
+    ファイルがない場合は初回アクセス時に全ルーターを読み込んで生成する。
+    """
+
+    def openapi():
+        if app.openapi_schema is None:
+            app.openapi_schema = read_openapi(path, route_table_hash(app, routers))
+        if app.openapi_schema is None:
+            app.openapi_schema = generate_openapi(app, routers)
+        return app.openapi_schema
+
+    app.openapi = openapi
+
+
+def write_openapi(app: FastAPI, routers: LazyRouters, path: str = OPENAPI_FILE):
+    """OpenAPI ドキュメントを生成してファイルに書き出す（ビルド時に使用）"""
+    schema = {
+        **generate_openapi(app, routers),
+        ROUTE_TABLE_HASH_KEY: route_table_hash(app, routers),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return schema
@@ -9,9 +9,11 @@ Pydantic モデル定義
 """
 
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Generic, TypeVar
 from datetime import datetime
 
+T = TypeVar("T")
+
 
 # ==============================================================================
 # Azure Blob Storage 関連モデル
@@ -171,6 +173,37 @@ class AssignKunResponse(BaseModel):
 # ==============================================================================
 
 
+class CursorPage(BaseModel, Generic[T]):
+    """カーソルページネーションのレスポンス"""
+
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class BulkItemResult(BaseModel):
+    """一括操作の要素ごとの結果"""
+
+    index: int
+    id: Optional[int] = None
+    success: bool
+    error: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    """一括操作レスポンス"""
+
+    success: bool
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class BulkDeleteRequest(BaseModel):
+    """一括削除リクエスト"""
+
+    ids: List[int]
+
+
 class UserBase(BaseModel):
     """ユーザー基底モデル"""
 
@@ -193,6 +226,12 @@ class UserUpdate(BaseModel):
     score: Optional[int] = None
 
 
+class UserBulkUpdate(UserUpdate):
+    """ユーザー一括更新モデル"""
+
+    id: int
+
+
 class UserResponse(UserBase):
     """ユーザーレスポンスモデル"""
 
@@ -226,6 +265,12 @@ class ProjectUpdate(BaseModel):
     score: Optional[int] = None
 
 
+class ProjectBulkUpdate(ProjectUpdate):
+    """プロジェクト一括更新モデル"""
+
+    id: int
+
+
 class ProjectResponse(ProjectBase):
     """プロジェクトレスポンスモデル"""
 
@@ -237,6 +282,14 @@ class ProjectResponse(ProjectBase):
         from_attributes = True
 
 
+class ProjectAssignmentCount(BaseModel):
+    """プロジェクト別課題数モデル"""
+
+    project_id: int
+    name: str
+    assignment_count: int
+
+
 class AssignmentBase(BaseModel):
     """課題基底モデル"""
 
@@ -265,6 +318,12 @@ class AssignmentUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class AssignmentBulkUpdate(AssignmentUpdate):
+    """課題一括更新モデル"""
+
+    id: int
+
+
 class AssignmentResponse(AssignmentBase):
     """課題レスポンスモデル"""
 
@@ -300,6 +359,12 @@ class NoticeUpdate(BaseModel):
     is_read: Optional[bool] = None
 
 
+class NoticeBulkUpdate(NoticeUpdate):
+    """通知一括更新モデル"""
+
+    id: int
+
+
 # ==============================================================================
 # CSV アップロード関連モデル
 # ==============================================================================
@@ -464,6 +529,12 @@ class HistogramUpdate(BaseModel):
     additional_data: Optional[dict] = None
 
 
+class HistogramBulkUpdate(HistogramUpdate):
+    """ヒストグラム一括更新モデル"""
+
+    id: int
+
+
 class HistogramResponse(HistogramBase):
     """ヒストグラムレスポンスモデル"""
 
@@ -485,7 +556,41 @@ class HistogramStatsResponse(BaseModel):
     average_value: float
     min_value: int
     max_value: int
-    histograms: List[HistogramResponse]
+    histograms: Optional[List[HistogramResponse]] = None
 
     class Config:
         from_attributes = True
+
+
+class HistogramGenerateRequest(BaseModel):
+    """ヒストグラム生成リクエストモデル"""
+
+    source: str
+    column: str
+    method: str = "fixed"
+    bins: int = 10
+    edges: Optional[List[float]] = None
+    group_by: Optional[str] = None
+
+
+class HistogramGenerateResponse(BaseModel):
+    """ヒストグラム生成レスポンスモデル"""
+
+    resource_type: str
+    resources: int
+    bins: int
+    values: int
+
+
+class HistogramResourceKey(BaseModel):
+    """ヒストグラム統計の対象リソース"""
+
+    resource_type: str
+    resource_id: int
+
+
+class HistogramStatsBatchRequest(BaseModel):
+    """ヒストグラム統計一括取得リクエストモデル"""
+
+    resources: List[HistogramResourceKey]
+    include_bins: bool = False
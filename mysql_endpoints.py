@@ -10,7 +10,7 @@ MySQL データベース API エンドポイント
 - Histograms: ヒストグラム管理
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from db_crud import (
@@ -18,30 +18,95 @@ from db_crud import (
     ProjectCRUD,
     AssignmentCRUD,
     NoticeCRUD,
+    BlobLogCRUD,
     HistogramCRUD,
 )
+from db_models import User, Project, Assignment, Notice, BlobLog, Histogram
+from fieldsets import InvalidFieldsetError, loader_options, parse_names, to_dict
+import histogram_engine
+from json_response import FastJSONResponse, model_response
+from histogram_engine import HistogramEngineError
+from pagination import InvalidCursorError
 from models import (
+    CursorPage,
     UserCreate,
     UserResponse,
     UserUpdate,
     ProjectCreate,
     ProjectResponse,
     ProjectUpdate,
+    ProjectAssignmentCount,
     AssignmentCreate,
     AssignmentResponse,
     NoticeCreate,
     NoticeResponse,
+    BlobLogResponse,
     HistogramCreate,
+    HistogramGenerateRequest,
+    HistogramGenerateResponse,
     HistogramResponse,
+    HistogramStatsBatchRequest,
     HistogramStatsResponse,
 )
-from typing import List
+from typing import Any, List, Optional, Sequence, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# カーソルページネーション用クエリパラメータ（指定時は CursorPage を返す）
+CURSOR_QUERY = Query(
+    None,
+    description="カーソル（空文字で先頭ページ）。指定時は items と next_cursor を返す",
+)
+
+# スパースフィールドセット用クエリパラメータ
+FIELDS_QUERY = Query(None, description="返却する列（カンマ区切り、例: id,name）")
+INCLUDE_QUERY = Query(
+    None, description="同時に取得する関連（カンマ区切り、例: assignments）"
+)
+
+# 統計一括取得で1回に指定できるリソース数
+MAX_STATS_RESOURCES = 1000
+
+
+def invalid_query_error(e: ValueError) -> HTTPException:
+    """不正なカーソル・フィールド指定を400エラーに変換"""
+    return HTTPException(status_code=400, detail=str(e))
+
+
+def list_options(
+    model, fields: List[str], include: List[str], sort_key: str = "created_at"
+) -> List[Any]:
+    """fields / include から一覧取得用のローダーオプションを作成"""
+    return loader_options(model, fields, include, required=("id", sort_key))
+
+
+def list_response(
+    model,
+    items: Sequence[Any],
+    cursor: Optional[str],
+    next_cursor: Optional[str],
+    fields: List[str],
+    include: List[str],
+):
+    """一覧レスポンスを作成（fields / include 指定時は絞り込んだ辞書を返す）
+
+    response_model の Union を検証し直さないよう、model の一覧（または
+    カーソルページ）として1回だけ検証して JSON にする。
+    """
+    if fields or include:
+        data = [to_dict(item, fields, include) for item in items]
+        if cursor is not None:
+            data = {"items": data, "next_cursor": next_cursor}
+        return FastJSONResponse(data)
+    if cursor is None:
+        return model_response(List[model], items)
+    return model_response(
+        CursorPage[model], {"items": items, "next_cursor": next_cursor}
+    )
+
 
 # ==============================================================================
 # ユーザー関連エンドポイント
@@ -66,14 +131,35 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail="ユーザー作成に失敗しました")
 
 
-@router.get("/users", response_model=List[UserResponse])
+@router.get(
+    "/users", response_model=Union[List[UserResponse], CursorPage[UserResponse]]
+)
 async def get_users(
-    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    include: Optional[str] = INCLUDE_QUERY,
+    db: AsyncSession = Depends(get_db),
 ):
     """ユーザー一覧を取得"""
     try:
-        users = await UserCRUD.get_users(db, skip=skip, limit=limit)
-        return users
+        field_names, include_names = parse_names(fields), parse_names(include)
+        options = list_options(User, field_names, include_names)
+        if cursor is None:
+            users = await UserCRUD.get_users(
+                db, skip=skip, limit=limit, options=options
+            )
+            next_cursor = None
+        else:
+            users, next_cursor = await UserCRUD.get_users_page(
+                db, cursor, limit, options=options
+            )
+        return list_response(
+            UserResponse, users, cursor, next_cursor, field_names, include_names
+        )
+    except (InvalidCursorError, InvalidFieldsetError) as e:
+        raise invalid_query_error(e)
     except Exception as e:
         logger.error(f"ユーザー一覧取得エラー: {e}")
         raise HTTPException(status_code=500, detail="ユーザー一覧取得に失敗しました")
@@ -143,14 +229,36 @@ async def create_project(project: ProjectCreate, db: AsyncSession = Depends(get_
         raise HTTPException(status_code=500, detail="プロジェクト作成に失敗しました")
 
 
-@router.get("/projects", response_model=List[ProjectResponse])
+@router.get(
+    "/projects",
+    response_model=Union[List[ProjectResponse], CursorPage[ProjectResponse]],
+)
 async def get_projects(
-    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    include: Optional[str] = INCLUDE_QUERY,
+    db: AsyncSession = Depends(get_db),
 ):
-    """プロジェクト一覧を取得"""
+    """プロジェクト一覧を取得（課題は include=assignments 指定時のみ取得）"""
     try:
-        projects = await ProjectCRUD.get_projects(db, skip=skip, limit=limit)
-        return projects
+        field_names, include_names = parse_names(fields), parse_names(include)
+        options = list_options(Project, field_names, include_names)
+        if cursor is None:
+            projects = await ProjectCRUD.get_projects(
+                db, skip=skip, limit=limit, options=options
+            )
+            next_cursor = None
+        else:
+            projects, next_cursor = await ProjectCRUD.get_projects_page(
+                db, cursor, limit, options=options
+            )
+        return list_response(
+            ProjectResponse, projects, cursor, next_cursor, field_names, include_names
+        )
+    except (InvalidCursorError, InvalidFieldsetError) as e:
+        raise invalid_query_error(e)
     except Exception as e:
         logger.error(f"プロジェクト一覧取得エラー: {e}")
         raise HTTPException(
@@ -158,6 +266,20 @@ async def get_projects(
         )
 
 
+@router.get("/projects/assignment-counts", response_model=List[ProjectAssignmentCount])
+async def get_project_assignment_counts(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
+):
+    """プロジェクトごとの課題数を取得（課題本体は返さない）"""
+    try:
+        return await ProjectCRUD.get_assignment_counts(db, skip=skip, limit=limit)
+    except Exception as e:
+        logger.error(f"プロジェクト別課題数取得エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="プロジェクト別課題数取得に失敗しました"
+        )
+
+
 @router.get("/projects/{project_id}", response_model=ProjectResponse)
 async def get_project(project_id: int, db: AsyncSession = Depends(get_db)):
     """プロジェクトを取得"""
@@ -221,14 +343,41 @@ async def create_assignment(
         raise HTTPException(status_code=500, detail="課題作成に失敗しました")
 
 
-@router.get("/assignments", response_model=List[AssignmentResponse])
+@router.get(
+    "/assignments",
+    response_model=Union[List[AssignmentResponse], CursorPage[AssignmentResponse]],
+)
 async def get_assignments(
-    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    include: Optional[str] = INCLUDE_QUERY,
+    db: AsyncSession = Depends(get_db),
 ):
-    """課題一覧を取得"""
+    """課題一覧を取得（プロジェクトは include=project 指定時のみ取得）"""
     try:
-        assignments = await AssignmentCRUD.get_assignments(db, skip=skip, limit=limit)
-        return assignments
+        field_names, include_names = parse_names(fields), parse_names(include)
+        options = list_options(Assignment, field_names, include_names)
+        if cursor is None:
+            assignments = await AssignmentCRUD.get_assignments(
+                db, skip=skip, limit=limit, options=options
+            )
+            next_cursor = None
+        else:
+            assignments, next_cursor = await AssignmentCRUD.get_assignments_page(
+                db, cursor, limit, options=options
+            )
+        return list_response(
+            AssignmentResponse,
+            assignments,
+            cursor,
+            next_cursor,
+            field_names,
+            include_names,
+        )
+    except (InvalidCursorError, InvalidFieldsetError) as e:
+        raise invalid_query_error(e)
     except Exception as e:
         logger.error(f"課題一覧取得エラー: {e}")
         raise HTTPException(status_code=500, detail="課題一覧取得に失敗しました")
@@ -263,19 +412,115 @@ async def create_notice(notice: NoticeCreate, db: AsyncSession = Depends(get_db)
         raise HTTPException(status_code=500, detail="通知作成に失敗しました")
 
 
-@router.get("/notices", response_model=List[NoticeResponse])
+@router.get(
+    "/notices", response_model=Union[List[NoticeResponse], CursorPage[NoticeResponse]]
+)
 async def get_notices(
-    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    include: Optional[str] = INCLUDE_QUERY,
+    db: AsyncSession = Depends(get_db),
 ):
-    """通知一覧を取得"""
+    """通知一覧を取得（ユーザーは include=user 指定時のみ取得）"""
     try:
-        notices = await NoticeCRUD.get_notices(db, skip=skip, limit=limit)
-        return notices
+        field_names, include_names = parse_names(fields), parse_names(include)
+        options = list_options(Notice, field_names, include_names)
+        if cursor is None:
+            notices = await NoticeCRUD.get_notices(
+                db, skip=skip, limit=limit, options=options
+            )
+            next_cursor = None
+        else:
+            notices, next_cursor = await NoticeCRUD.get_notices_page(
+                db, cursor, limit, options=options
+            )
+        return list_response(
+            NoticeResponse, notices, cursor, next_cursor, field_names, include_names
+        )
+    except (InvalidCursorError, InvalidFieldsetError) as e:
+        raise invalid_query_error(e)
     except Exception as e:
         logger.error(f"通知一覧取得エラー: {e}")
         raise HTTPException(status_code=500, detail="通知一覧取得に失敗しました")
 
 
+@router.get(
+    "/notices/unread",
+    response_model=Union[List[NoticeResponse], CursorPage[NoticeResponse]],
+)
+async def get_unread_notices(
+    user_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    include: Optional[str] = INCLUDE_QUERY,
+    db: AsyncSession = Depends(get_db),
+):
+    """未読通知を取得"""
+    try:
+        field_names, include_names = parse_names(fields), parse_names(include)
+        options = list_options(Notice, field_names, include_names)
+        if cursor is None:
+            notices = await NoticeCRUD.get_unread_notices(
+                db, user_id, limit=limit, options=options
+            )
+            next_cursor = None
+        else:
+            notices, next_cursor = await NoticeCRUD.get_unread_notices_page(
+                db, user_id, cursor, limit, options=options
+            )
+        return list_response(
+            NoticeResponse, notices, cursor, next_cursor, field_names, include_names
+        )
+    except (InvalidCursorError, InvalidFieldsetError) as e:
+        raise invalid_query_error(e)
+    except Exception as e:
+        logger.error(f"未読通知取得エラー: {e}")
+        raise HTTPException(status_code=500, detail="未読通知取得に失敗しました")
+
+
+# ==============================================================================
+# Blob ログ関連エンドポイント
+# ==============================================================================
+
+
+@router.get(
+    "/blob-logs",
+    response_model=Union[List[BlobLogResponse], CursorPage[BlobLogResponse]],
+)
+async def get_blob_logs(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    include: Optional[str] = INCLUDE_QUERY,
+    db: AsyncSession = Depends(get_db),
+):
+    """Blobログ一覧を取得（ユーザーは include=user 指定時のみ取得）"""
+    try:
+        field_names, include_names = parse_names(fields), parse_names(include)
+        options = list_options(BlobLog, field_names, include_names, "operation_time")
+        if cursor is None:
+            blob_logs = await BlobLogCRUD.get_blob_logs(
+                db, skip=skip, limit=limit, options=options
+            )
+            next_cursor = None
+        else:
+            blob_logs, next_cursor = await BlobLogCRUD.get_blob_logs_page(
+                db, cursor, limit, options=options
+            )
+        return list_response(
+            BlobLogResponse, blob_logs, cursor, next_cursor, field_names, include_names
+        )
+    except (InvalidCursorError, InvalidFieldsetError) as e:
+        raise invalid_query_error(e)
+    except Exception as e:
+        logger.error(f"Blobログ一覧取得エラー: {e}")
+        raise HTTPException(status_code=500, detail="Blobログ一覧取得に失敗しました")
+
+
 # ==============================================================================
 # ヒストグラム関連エンドポイント
 # ==============================================================================
@@ -294,14 +539,35 @@ async def create_histogram(
         raise HTTPException(status_code=500, detail="ヒストグラム作成に失敗しました")
 
 
-@router.get("/histograms", response_model=List[HistogramResponse])
+@router.get(
+    "/histograms",
+    response_model=Union[List[HistogramResponse], CursorPage[HistogramResponse]],
+)
 async def get_histograms(
-    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
 ):
     """ヒストグラム一覧を取得"""
     try:
-        histograms = await HistogramCRUD.get_histograms(db, skip=skip, limit=limit)
-        return histograms
+        field_names = parse_names(fields)
+        options = list_options(Histogram, field_names, [])
+        if cursor is None:
+            histograms = await HistogramCRUD.get_histograms(
+                db, skip=skip, limit=limit, options=options
+            )
+            next_cursor = None
+        else:
+            histograms, next_cursor = await HistogramCRUD.get_histograms_page(
+                db, cursor, limit, options=options
+            )
+        return list_response(
+            HistogramResponse, histograms, cursor, next_cursor, field_names, []
+        )
+    except (InvalidCursorError, InvalidFieldsetError) as e:
+        raise invalid_query_error(e)
     except Exception as e:
         logger.error(f"ヒストグラム一覧取得エラー: {e}")
         raise HTTPException(
@@ -327,14 +593,60 @@ async def get_histogram(histogram_id: int, db: AsyncSession = Depends(get_db)):
     response_model=HistogramStatsResponse,
 )
 async def get_histogram_stats(
-    resource_type: str, resource_id: int, db: AsyncSession = Depends(get_db)
+    resource_type: str,
+    resource_id: int,
+    include_bins: bool = Query(True, description="ビンの一覧も返す"),
+    db: AsyncSession = Depends(get_db),
 ):
     """リソース別ヒストグラム統計を取得"""
     try:
-        stats = await HistogramCRUD.get_histogram_stats(db, resource_type, resource_id)
+        stats = await HistogramCRUD.get_histogram_stats(
+            db, resource_type, resource_id, include_bins
+        )
+        if not stats:
+            raise HTTPException(status_code=404, detail="ヒストグラムが見つかりません")
         return stats
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"ヒストグラム統計取得エラー: {e}")
         raise HTTPException(
             status_code=500, detail="ヒストグラム統計取得に失敗しました"
         )
+
+
+@router.post("/histograms/stats/batch", response_model=List[HistogramStatsResponse])
+async def get_histogram_stats_batch(
+    request: HistogramStatsBatchRequest, db: AsyncSession = Depends(get_db)
+):
+    """複数リソースのヒストグラム統計を一括取得（該当なしのリソースは含まない）"""
+    if len(request.resources) > MAX_STATS_RESOURCES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"一度に指定できるリソースは{MAX_STATS_RESOURCES}件までです",
+        )
+    try:
+        return await HistogramCRUD.get_histogram_stats_many(
+            db,
+            [(r.resource_type, r.resource_id) for r in request.resources],
+            request.include_bins,
+        )
+    except Exception as e:
+        logger.error(f"ヒストグラム統計一括取得エラー: {e}")
+        raise HTTPException(
+            status_code=500, detail="ヒストグラム統計一括取得に失敗しました"
+        )
+
+
+@router.post("/histograms/generate", response_model=HistogramGenerateResponse)
+async def generate_histograms(
+    request: HistogramGenerateRequest, db: AsyncSession = Depends(get_db)
+):
+    """assign_data / histogram_data の列からヒストグラムを生成（既存のビンは置き換え）"""
+    try:
+        return await histogram_engine.generate_histograms(db, request)
+    except HistogramEngineError as e:
+        raise invalid_query_error(e)
+    except Exception as e:
+        logger.error(f"ヒストグラム生成エラー: {e}")
+        raise HTTPException(status_code=500, detail="ヒストグラム生成に失敗しました")
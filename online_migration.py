@@ -0,0 +1,411 @@
+"""
+Alembic 用のオンラインマイグレーション補助
+
+ALTER TABLE による列の型変更はテーブル全体を書き換え、その間テーブルへの
+書き込みが止まります。このモジュールは以下の手順で、書き込みを止めずに
+列を置き換える関数を提供します：
+
+1. 影の列（<列名>__new）を ALGORITHM=INSTANT で追加
+2. INSERT / UPDATE トリガーで、以降の書き込みを影の列にも反映（二重書き込み）
+3. 既存の行を ID のキーセット順に小バッチで影の列へ複写（スロットリング付き）
+4. 短時間のテーブルロック内でトリガーを削除し、列名を入れ替え（<列名>__old に退避）
+5. 後続のリビジョンで退避した列を削除
+
+進捗は online_migration_state テーブルに記録し、ログにも出力します。
+途中で失敗した場合も、もう一度 alembic upgrade を実行すると記録した位置から
+再開します。各ステップはリビジョンの upgrade() 内で次のように使います：
+
+    from online_migration import run_online_change
+
+    def upgrade() -> None:
+        run_online_change(
+            'assign_data_decimal_12_2',
+            'assign_data',
+            [sa.Column('assin_execution', sa.DECIMAL(12, 2), comment='実行アサイン')],
+        )
+
+入れ替え前の列にあるインデックスは退避した列に付いたまま残るため、
+必要なインデックスは create_shadow_index() で影の列に事前に作成してください。
+また、バイナリログ有効時のトリガー作成には TRIGGER 権限に加えて
+log_bin_trust_function_creators の設定が必要な場合があります。
+"""
+
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+import logging
+
+# alembic.ini では alembic 配下のロガーのみ INFO で出力される
+logger = logging.getLogger(f"alembic.{__name__}")
+
+STATE_TABLE = "online_migration_state"
+SHADOW_SUFFIX = "__new"
+OLD_SUFFIX = "__old"
+
+# 1バッチの行数と、バッチ間の待機（固定秒数 + 直前のバッチ時間に対する比率）
+ONLINE_MIGRATION_BATCH_SIZE = int(os.getenv("ONLINE_MIGRATION_BATCH_SIZE", "5000"))
+ONLINE_MIGRATION_PAUSE = float(os.getenv("ONLINE_MIGRATION_PAUSE", "0.05"))
+ONLINE_MIGRATION_SLEEP_RATIO = float(os.getenv("ONLINE_MIGRATION_SLEEP_RATIO", "0.5"))
+
+# 進捗ログの出力間隔（秒）
+PROGRESS_INTERVAL = 10.0
+
+
+def shadow_name(column: str) -> str:
+    """影の列名"""
+    return f"{column}{SHADOW_SUFFIX}"
+
+
+def old_name(column: str) -> str:
+    """入れ替え後に旧列を退避する列名"""
+    return f"{column}{OLD_SUFFIX}"
+
+
+def trigger_names(table: str) -> Dict[str, str]:
+    """二重書き込みトリガーの名前（INSERT / UPDATE）"""
+    return {"INSERT": f"{table}_online_ins", "UPDATE": f"{table}_online_upd"}
+
+
+def copy_expression(column: str, reference: str, using: Dict[str, str]) -> str:
+    """旧列から影の列に複写する式（using に "{}" を含む式があれば旧列で置き換える）"""
+    template = using.get(column)
+    return template.format(reference) if template else reference
+
+
+# ==============================================================================
+# SQL の組み立て
+# ==============================================================================
+
+
+def add_shadow_columns_sql(
+    table: str, columns: Sequence[sa.Column], dialect: sa.engine.Dialect
+) -> str:
+    """影の列を追加する ALTER TABLE（行の書き換えなしで追加）"""
+    definitions = []
+    for column in columns:
+        shadow = sa.Column(
+            shadow_name(column.name), column.type, nullable=True, comment=column.comment
+        )
+        definitions.append(
+            f"ADD COLUMN {CreateColumn(shadow).compile(dialect=dialect)}"
+        )
+    return f"ALTER TABLE {table} {', '.join(definitions)}, ALGORITHM=INSTANT"
+
+
+def trigger_sql(
+    table: str, columns: Sequence[str], using: Dict[str, str], event: str
+) -> str:
+    """書き込みを影の列にも反映する BEFORE トリガー"""
+    assignments = ", ".join(
+        f"NEW.{shadow_name(column)} = {copy_expression(column, f'NEW.{column}', using)}"
+        for column in columns
+    )
+    return (
+        f"CREATE TRIGGER {trigger_names(table)[event]} BEFORE {event} ON {table} "
+        f"FOR EACH ROW SET {assignments}"
+    )
+
+
+def backfill_sql(table: str, columns: Sequence[str], using: Dict[str, str]) -> str:
+    """ID の範囲 (:last_id, :upper_id] の行を影の列に複写する UPDATE"""
+    assignments = ", ".join(
+        f"{shadow_name(column)} = {copy_expression(column, column, using)}"
+        for column in columns
+    )
+    return f"UPDATE {table} SET {assignments} WHERE id > :last_id AND id <= :upper_id"
+
+
+def cutover_sql(table: str, columns: Sequence[str]) -> str:
+    """旧列を退避し、影の列を元の名前にする ALTER TABLE（メタデータのみの変更）"""
+    renames = []
+    for column in columns:
+        renames.append(f"RENAME COLUMN {column} TO {old_name(column)}")
+        renames.append(f"RENAME COLUMN {shadow_name(column)} TO {column}")
+    return f"ALTER TABLE {table} {', '.join(renames)}"
+
+
+# ==============================================================================
+# 進捗の記録
+# ==============================================================================
+
+
+def ensure_state_table(bind: Connection):
+    """進捗テーブルを作成（存在する場合は何もしない）"""
+    bind.execute(
+        sa.text(
+            f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} ("
+            "name VARCHAR(100) NOT NULL PRIMARY KEY, "
+            "table_name VARCHAR(64) NOT NULL, "
+            "phase VARCHAR(20) NOT NULL, "
+            "last_id BIGINT NOT NULL DEFAULT 0, "
+            "max_id BIGINT NULL, "
+            "rows_done BIGINT NOT NULL DEFAULT 0, "
+            "batches INT NOT NULL DEFAULT 0, "
+            "started_at DATETIME NULL, "
+            "updated_at DATETIME NULL)"
+        )
+    )
+
+
+def get_state(bind: Connection, name: str) -> Optional[Dict]:
+    """マイグレーションの進捗（未開始の場合は None）"""
+    row = (
+        bind.execute(
+            sa.text(f"SELECT * FROM {STATE_TABLE} WHERE name = :name"), {"name": name}
+        )
+        .mappings()
+        .first()
+    )
+    return dict(row) if row else None
+
+
+def set_state(bind: Connection, name: str, **values):
+    """進捗を更新"""
+    assignments = ", ".join(f"{key} = :{key}" for key in values)
+    bind.execute(
+        sa.text(
+            f"UPDATE {STATE_TABLE} SET {assignments}, updated_at = CURRENT_TIMESTAMP "
+            "WHERE name = :name"
+        ),
+        {"name": name, **values},
+    )
+
+
+def migration_progress(bind: Connection) -> List[Dict]:
+    """全マイグレーションの進捗（バックフィルの進捗率を含む）"""
+    rows = bind.execute(sa.text(f"SELECT * FROM {STATE_TABLE} ORDER BY name"))
+    return [with_percent(dict(row)) for row in rows.mappings()]
+
+
+def with_percent(state: Dict) -> Dict:
+    """ID の範囲から見たバックフィルの進捗率を付加"""
+    if state["phase"] in ("cutover", "done"):
+        state["percent"] = 100.0
+    elif state["max_id"]:
+        state["percent"] = round(min(state["last_id"] / state["max_id"], 1) * 100, 1)
+    else:
+        state["percent"] = 0.0
+    return state
+
+
+# ==============================================================================
+# 各ステップ
+# ==============================================================================
+
+
+def add_shadow_columns(bind: Connection, table: str, columns: Sequence[sa.Column]):
+    """影の列を追加（既に存在する列は追加しない）"""
+    existing = {column["name"] for column in sa.inspect(bind).get_columns(table)}
+    missing = [column for column in columns if shadow_name(column.name) not in existing]
+    if missing:
+        bind.execute(sa.text(add_shadow_columns_sql(table, missing, bind.dialect)))
+        logger.info(f"影の列を追加: {table} {[shadow_name(c.name) for c in missing]}")
+
+
+def create_shadow_index(bind: Connection, table: str, name: str, columns: List[str]):
+    """影の列にインデックスを書き込みを止めずに作成"""
+    shadow_columns = ", ".join(shadow_name(column) for column in columns)
+    bind.execute(
+        sa.text(
+            f"CREATE INDEX {name} ON {table} ({shadow_columns}) "
+            "ALGORITHM=INPLACE LOCK=NONE"
+        )
+    )
+
+
+def create_sync_triggers(
+    bind: Connection, table: str, columns: Sequence[str], using: Dict[str, str]
+):
+    """二重書き込みトリガーを作り直す"""
+    drop_sync_triggers(bind, table)
+    for event in ("INSERT", "UPDATE"):
+        bind.execute(sa.text(trigger_sql(table, columns, using, event)))
+
+
+def drop_sync_triggers(bind: Connection, table: str):
+    """二重書き込みトリガーを削除"""
+    for trigger in trigger_names(table).values():
+        bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+
+def backfill(
+    bind: Connection,
+    name: str,
+    table: str,
+    columns: Sequence[str],
+    using: Dict[str, str],
+    batch_size: int = ONLINE_MIGRATION_BATCH_SIZE,
+    pause: float = ONLINE_MIGRATION_PAUSE,
+    sleep_ratio: float = ONLINE_MIGRATION_SLEEP_RATIO,
+):
+    """既存の行を ID 順の小バッチで影の列に複写（記録した位置から再開）
+
+    各バッチは自動コミットで確定し、次のバッチの前に
+    pause + 直前のバッチ時間 × sleep_ratio 秒待機して他の書き込みに譲る。
+    """
+    state = get_state(bind, name)
+    last_id = state["last_id"]
+    rows_done = state["rows_done"]
+    batches = state["batches"]
+    # トリガー作成後に追加された行は複写不要のため、開始時点の最大IDまで処理する
+    max_id = state["max_id"]
+    if max_id is None:
+        max_id = bind.execute(sa.text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+        set_state(bind, name, max_id=max_id)
+
+    statement = sa.text(backfill_sql(table, columns, using))
+    upper_query = sa.text(
+        f"SELECT id FROM {table} WHERE id > :last_id AND id <= :max_id "
+        "ORDER BY id LIMIT 1 OFFSET :offset"
+    )
+    last_report = time.monotonic()
+    while last_id < max_id:
+        started = time.monotonic()
+        upper_id = bind.execute(
+            upper_query,
+            {"last_id": last_id, "max_id": max_id, "offset": batch_size - 1},
+        ).scalar()
+        if upper_id is None:
+            upper_id = max_id
+        result = bind.execute(statement, {"last_id": last_id, "upper_id": upper_id})
+
+        last_id = upper_id
+        rows_done += result.rowcount
+        batches += 1
+        set_state(bind, name, last_id=last_id, rows_done=rows_done, batches=batches)
+
+        if time.monotonic() - last_report >= PROGRESS_INTERVAL or last_id >= max_id:
+            last_report = time.monotonic()
+            logger.info(
+                f"バックフィル {name}: id {last_id}/{max_id} "
+                f"({min(last_id / max_id, 1) * 100:.1f}%) {rows_done}行 {batches}バッチ"
+            )
+        time.sleep(pause + (time.monotonic() - started) * sleep_ratio)
+
+
+def cutover(
+    bind: Connection, table: str, columns: Sequence[str], using: Dict[str, str]
+):
+    """テーブルロック内でトリガーを削除し、列名を入れ替える
+
+    ロック中は他の書き込みが待たされるため、トリガー削除から入れ替えまでの間に
+    影の列へ反映されない書き込みは発生しない。
+    """
+    # 入れ替え済み（状態の記録前に中断した場合）は何もしない
+    existing = {column["name"] for column in sa.inspect(bind).get_columns(table)}
+    if all(
+        old_name(column) in existing and shadow_name(column) not in existing
+        for column in columns
+    ):
+        drop_sync_triggers(bind, table)
+        return
+
+    bind.execute(sa.text(f"LOCK TABLES {table} WRITE"))
+    try:
+        drop_sync_triggers(bind, table)
+        try:
+            bind.execute(sa.text(cutover_sql(table, columns)))
+        except Exception:
+            # 入れ替えに失敗した場合はロック解除前にトリガーを戻す
+            create_sync_triggers(bind, table, columns, using)
+            raise
+    finally:
+        bind.execute(sa.text("UNLOCK TABLES"))
+    logger.info(f"列の入れ替え完了: {table} {list(columns)}")
+
+
+def drop_old_columns(bind: Connection, table: str, columns: Sequence[str]):
+    """退避した旧列を書き込みを止めずに削除（後続のリビジョンで実行）"""
+    drops = ", ".join(f"DROP COLUMN {old_name(column)}" for column in columns)
+    bind.execute(sa.text(f"ALTER TABLE {table} {drops}, ALGORITHM=INPLACE, LOCK=NONE"))
+
+
+def abort_online_change(
+    bind: Connection, name: str, table: str, columns: Sequence[str]
+):
+    """入れ替え前のマイグレーションを取り消す（トリガーと影の列を削除）"""
+    drop_sync_triggers(bind, table)
+    existing = {column["name"] for column in sa.inspect(bind).get_columns(table)}
+    drops = [
+        f"DROP COLUMN {shadow_name(column)}"
+        for column in columns
+        if shadow_name(column) in existing
+    ]
+    if drops:
+        bind.execute(sa.text(f"ALTER TABLE {table} {', '.join(drops)}"))
+    ensure_state_table(bind)
+    bind.execute(
+        sa.text(f"DELETE FROM {STATE_TABLE} WHERE name = :name"), {"name": name}
+    )
+
+
+# ==============================================================================
+# 一連の実行
+# ==============================================================================
+
+
+def run_online_change(
+    name: str,
+    table: str,
+    columns: Sequence[sa.Column],
+    using: Optional[Dict[str, str]] = None,
+    batch_size: int = ONLINE_MIGRATION_BATCH_SIZE,
+    bind: Optional[Connection] = None,
+):
+    """影の列の追加からバックフィル・列の入れ替えまでを実行（完了済みの手順は飛ばす）
+
+    Args:
+        name: マイグレーションの識別名（進捗テーブルのキー）
+        table: 対象テーブル（整数の主キー id を持つこと）
+        columns: 新しい列定義（名前は置き換える既存の列名）
+        using: 列名 -> 複写式（例: {"assin_execution": "ROUND({}, 2)"}）
+    """
+    from alembic import op
+
+    using = using or {}
+    column_names = [column.name for column in columns]
+    context = op.get_context()
+    bind = bind or op.get_bind()
+
+    # 各文を自動コミットで実行し、中断しても完了したバッチは残す
+    with context.autocommit_block():
+        ensure_state_table(bind)
+        state = get_state(bind, name)
+        if state is None:
+            bind.execute(
+                sa.text(
+                    f"INSERT INTO {STATE_TABLE} "
+                    "(name, table_name, phase, started_at, updated_at) "
+                    "VALUES (:name, :table, 'shadow', CURRENT_TIMESTAMP, "
+                    "CURRENT_TIMESTAMP)"
+                ),
+                {"name": name, "table": table},
+            )
+            state = get_state(bind, name)
+        elif state["phase"] == "done":
+            logger.info(f"オンラインマイグレーション完了済み: {name}")
+            return
+        logger.info(f"オンラインマイグレーション開始: {name} (phase={state['phase']})")
+
+        if state["phase"] == "shadow":
+            add_shadow_columns(bind, table, columns)
+            create_sync_triggers(bind, table, column_names, using)
+            set_state(bind, name, phase="backfill")
+            state["phase"] = "backfill"
+
+        if state["phase"] == "backfill":
+            # 再開時もトリガーが確実に存在するよう作り直す
+            create_sync_triggers(bind, table, column_names, using)
+            backfill(bind, name, table, column_names, using, batch_size)
+            set_state(bind, name, phase="cutover")
+            state["phase"] = "cutover"
+
+        if state["phase"] == "cutover":
+            cutover(bind, table, column_names, using)
+            set_state(bind, name, phase="done")
+
+    logger.info(f"オンラインマイグレーション完了: {name}")
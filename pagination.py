@@ -0,0 +1,90 @@
+"""
+キーセット（カーソル）ページネーション
+
+このモジュールは以下の機能を提供します：
+- 不透明なカーソル文字列のエンコード・デコード
+- (時刻列, id) をキーとした降順キーセット取得
+
+OFFSET を使わず前ページ末尾のキーから続きを取得するため、
+何ページ目でも1ページ目と同じコストで取得できます。
+時刻列が NULL の行は、MySQL の降順と同じく末尾（id の降順）に並びます。
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursorError(ValueError):
+    """不正なカーソルが指定された"""
+
+    pass
+
+
+def encode_cursor(sort_value: Optional[datetime], row_id: int) -> str:
+    """並び順キーからカーソル文字列を生成（時刻が NULL の場合は null）"""
+    sort_key = sort_value.isoformat() if sort_value is not None else None
+    payload = json.dumps([sort_key, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """カーソル文字列から並び順キーを復元"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_key, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        sort_value = datetime.fromisoformat(sort_key) if sort_key is not None else None
+        return sort_value, int(row_id)
+    except Exception as e:
+        raise InvalidCursorError(f"不正なカーソルです: {cursor}") from e
+
+
+def apply_keyset(
+    query: Select, sort_column, id_column, cursor: Optional[str], limit: int
+) -> Select:
+    """クエリに降順キーセット条件を付与（次ページ判定のため limit + 1 件取得）"""
+    query = query.order_by(sort_column.desc(), id_column.desc())
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if sort_value is None:
+            # NULL の行の途中: 残りは NULL の行のみ
+            query = query.where(and_(sort_column.is_(None), id_column < row_id))
+        else:
+            # sort_column <= X を先頭に置き、(時刻列, id) インデックスのレンジスキャンにする
+            # （末尾に並ぶ NULL の行も続きに含める）
+            query = query.where(
+                or_(
+                    and_(
+                        sort_column <= sort_value,
+                        or_(sort_column < sort_value, id_column < row_id),
+                    ),
+                    sort_column.is_(None),
+                )
+            )
+    return query.limit(limit + 1)
+
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    query: Select,
+    sort_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Tuple[List[Any], Optional[str]]:
+    """キーセットで1ページ分を取得し、(行リスト, 次ページカーソル) を返す"""
+    result = await db.execute(
+        apply_keyset(query, sort_column, id_column, cursor, limit)
+    )
+    rows = list(result.scalars().all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+    return rows, next_cursor
@@ -0,0 +1,258 @@
+"""
+データベース接続プールの計測
+
+このモジュールは以下の機能を提供します：
+- プールのイベント（connect / checkout / checkin / invalidate / close）の集計
+- 接続の取得待ち時間・保持時間のヒストグラムと p50 / p95 / p99
+- 取得待ち時間の p95 がしきい値を超えた場合の警告ログ
+- Prometheus テキスト形式（/metrics）と管理用スナップショットの出力
+
+取得待ち時間はプールにイベントがないため、プールの _do_get を計測用の関数で
+包んで測ります。NullPool では待ち時間は新規接続の確立時間になります。
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import event
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 取得待ち時間の p95 の警告しきい値（ミリ秒）と、警告の最短間隔（秒）
+DB_POOL_WAIT_WARN_MS = float(os.getenv("DB_POOL_WAIT_WARN_MS", "100"))
+DB_POOL_WARN_INTERVAL = float(os.getenv("DB_POOL_WARN_INTERVAL", "60"))
+
+# パーセンタイル計算に使う直近のサンプル数
+POOL_SAMPLE_SIZE = 1024
+
+# ヒストグラムのバケット境界（秒）
+POOL_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def percentile(samples: Sequence[float], q: float) -> Optional[float]:
+    """サンプルの q パーセンタイル（最近傍法、サンプルがない場合は None）"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class TimeHistogram:
+    """累積バケット付きの時間ヒストグラム（直近のサンプルも保持）"""
+
+    def __init__(self, buckets: Sequence[float] = POOL_TIME_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=POOL_SAMPLE_SIZE)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[index] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """件数・合計と直近サンプルの p50 / p95 / p99（ミリ秒）"""
+
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.total, 6),
+            "p50_ms": ms(percentile(self.samples, 50)),
+            "p95_ms": ms(percentile(self.samples, 95)),
+            "p99_ms": ms(percentile(self.samples, 99)),
+        }
+
+
+class PoolMetrics:
+    """接続プールの計測値"""
+
+    def __init__(self):
+        self.pool = None
+        self.pool_class: Optional[str] = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.closes = 0
+        self.checkout_errors = 0
+        self.wait = TimeHistogram()
+        self.hold = TimeHistogram()
+        self.last_warning = 0.0
+
+    @property
+    def checked_out(self) -> int:
+        return self.checkouts - self.checkins
+
+    # ==========================================================================
+    # イベント
+    # ==========================================================================
+
+    def on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        connection_record.info["checkout_time"] = time.perf_counter()
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("checkout_time", None)
+        if started is None:
+            return
+        self.checkins += 1
+        self.hold.observe(time.perf_counter() - started)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def on_close(self, dbapi_connection, connection_record):
+        self.closes += 1
+
+    def observe_wait(self, seconds: float):
+        """取得待ち時間を記録し、p95 がしきい値を超えていれば警告"""
+        self.wait.observe(seconds)
+        now = time.monotonic()
+        if now - self.last_warning < DB_POOL_WARN_INTERVAL:
+            return
+        p95 = percentile(self.wait.samples, 95)
+        if p95 is not None and p95 * 1000 > DB_POOL_WAIT_WARN_MS:
+            self.last_warning = now
+            logger.warning(
+                f"DB接続の取得待ちが長くなっています: p95={p95 * 1000:.1f}ms "
+                f"(しきい値 {DB_POOL_WAIT_WARN_MS:.0f}ms) {self.pool_status()}"
+            )
+
+    # ==========================================================================
+    # 出力
+    # ==========================================================================
+
+    def pool_status(self) -> Dict[str, Any]:
+        """プール自体の状態（QueuePool 系のみ。NullPool では空）"""
+        status = {}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(self.pool, name, None)
+            if callable(method):
+                status[name] = method()
+        return status
+
+    def snapshot(self) -> Dict[str, Any]:
+        """管理用のスナップショット"""
+        return {
+            "pool_class": self.pool_class,
+            "pool": self.pool_status(),
+            "checked_out": self.checked_out,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "closes": self.closes,
+            "checkout_errors": self.checkout_errors,
+            "checkout_wait": self.wait.summary(),
+            "connection_hold": self.hold.summary(),
+            "wait_warn_ms": DB_POOL_WAIT_WARN_MS,
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus テキスト形式の出力"""
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, value):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+
+        def histogram(name: str, help_text: str, data: TimeHistogram):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for bound, count in zip(data.buckets, data.counts):
+                lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {data.count}')
+            lines.append(f"{name}_sum {data.total}")
+            lines.append(f"{name}_count {data.count}")
+
+        metric(
+            "db_pool_checked_out",
+            "gauge",
+            "Connections currently checked out",
+            self.checked_out,
+        )
+        for name, value in self.pool_status().items():
+            metric(f"db_pool_{name}", "gauge", f"Pool {name}", value)
+        metric(
+            "db_pool_connects_total",
+            "counter",
+            "New DBAPI connections",
+            self.connects,
+        )
+        metric(
+            "db_pool_checkouts_total", "counter", "Connection checkouts", self.checkouts
+        )
+        metric(
+            "db_pool_checkins_total", "counter", "Connection checkins", self.checkins
+        )
+        metric(
+            "db_pool_invalidations_total",
+            "counter",
+            "Invalidated connections",
+            self.invalidations,
+        )
+        metric("db_pool_closes_total", "counter", "Closed connections", self.closes)
+        metric(
+            "db_pool_checkout_errors_total",
+            "counter",
+            "Failed checkouts",
+            self.checkout_errors,
+        )
+        histogram(
+            "db_pool_checkout_wait_seconds",
+            "Time spent waiting for a connection",
+            self.wait,
+        )
+        histogram(
+            "db_pool_connection_hold_seconds",
+            "Time a connection stayed checked out",
+            self.hold,
+        )
+        return "\n".join(lines) + "\n"
+
+
+# アプリケーション全体で共有する計測値
+pool_metrics = PoolMetrics()
+
+
+def instrument_pool(engine, metrics: PoolMetrics = pool_metrics):
+    """エンジンのプールにイベントリスナーと取得待ち時間の計測を設定"""
+    pool = engine.sync_engine.pool if hasattr(engine, "sync_engine") else engine.pool
+    metrics.pool = pool
+    metrics.pool_class = type(pool).__name__
+
+    event.listen(pool, "connect", metrics.on_connect)
+    event.listen(pool, "checkout", metrics.on_checkout)
+    event.listen(pool, "checkin", metrics.on_checkin)
+    event.listen(pool, "invalidate", metrics.on_invalidate)
+    event.listen(pool, "close", metrics.on_close)
+
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        except Exception:
+            metrics.checkout_errors += 1
+            raise
+        finally:
+            metrics.observe_wait(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+    return metrics
@@ -0,0 +1,235 @@
+"""
+データ保持期間（リテンション）管理
+
+このモジュールは以下の機能を提供します：
+- テーブルごとの保持ポリシー（保持日数は環境変数で変更可能）
+- 保持期間を過ぎた行のキーセット順・小バッチでのアーカイブと削除
+- Parquet（zstd圧縮）での Blob コンテナ / ローカルディレクトリへの保存
+- アーカイブ台帳（retention_archives）への記録とアーカイブの読み出し
+
+各バッチは「Parquet の書き込み → 台帳登録と削除を1トランザクションでコミット」の
+順で処理するため、ロックはバッチ単位の短時間しか保持しません。
+台帳登録前に失敗した場合も、次回実行時に同じファイル名で上書きされます。
+"""
+
+import asyncio
+import io
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select, tuple_
+
+from blob_clients import get_service_client
+from database import db_manager, transaction
+from db_crud import RetentionArchiveCRUD
+from db_models import BlobLog, Notice
+import logging
+
+# Parquet の読み書きには pyarrow が必要
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# テーブルごとの保持ポリシー（保持日数を過ぎた行をアーカイブして削除）
+RETENTION_POLICIES = {
+    "blob_logs": {
+        "model": BlobLog,
+        "time_column": "operation_time",
+        "days": int(os.getenv("RETENTION_DAYS_BLOB_LOGS", "90")),
+    },
+    "notices": {
+        "model": Notice,
+        "time_column": "created_at",
+        "days": int(os.getenv("RETENTION_DAYS_NOTICES", "90")),
+    },
+}
+
+# 1バッチ（1ファイル）あたりの行数と、バッチ間の待機秒数
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+RETENTION_BATCH_PAUSE = float(os.getenv("RETENTION_BATCH_PAUSE", "0.1"))
+
+# アーカイブの保存先（接続文字列があれば Blob、なければローカル）
+AZURE_STORAGE_CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+ARCHIVE_CONTAINER = os.getenv("RETENTION_ARCHIVE_CONTAINER", "archive")
+ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", "archive")
+
+
+def archive_storage() -> str:
+    """アーカイブの保存先の種類"""
+    return "blob" if AZURE_STORAGE_CONNECTION_STRING else "local"
+
+
+def archive_path(table_name: str, rows: List[Dict[str, Any]], time_column: str) -> str:
+    """アーカイブのパス（<テーブル>/<年>/<月>/<テーブル>_<先頭ID>_<末尾ID>.parquet）"""
+    oldest = rows[0][time_column]
+    return (
+        f"{table_name}/{oldest:%Y}/{oldest:%m}/"
+        f"{table_name}_{rows[0]['id']}_{rows[-1]['id']}.parquet"
+    )
+
+
+# ==============================================================================
+# Parquet 変換・保存
+# ==============================================================================
+
+
+def encode_parquet(rows: List[Dict[str, Any]]) -> bytes:
+    """行のリストを zstd 圧縮の Parquet に変換"""
+    if pa is None:
+        raise RuntimeError("pyarrow がインストールされていません")
+    # dict / list の値は JSON 文字列として保存する
+    rows = [
+        {
+            key: (
+                json.dumps(value, ensure_ascii=False)
+                if isinstance(value, (dict, list))
+                else value
+            )
+            for key, value in row.items()
+        }
+        for row in rows
+    ]
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pylist(rows), buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+def decode_parquet(data: bytes) -> List[Dict[str, Any]]:
+    """Parquet を行のリストに変換"""
+    if pa is None:
+        raise RuntimeError("pyarrow がインストールされていません")
+    return pq.read_table(pa.BufferReader(data)).to_pylist()
+
+
+def write_archive_sync(storage: str, path: str, data: bytes) -> None:
+    """アーカイブを保存（同期処理）"""
+    if storage == "blob":
+        from azure.core.exceptions import ResourceExistsError
+
+        service = get_service_client(AZURE_STORAGE_CONNECTION_STRING)
+        container = service.get_container_client(ARCHIVE_CONTAINER)
+        try:
+            container.create_container()
+        except ResourceExistsError:
+            pass
+        container.upload_blob(path, data, overwrite=True)
+        return
+
+    full_path = os.path.join(ARCHIVE_DIR, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "wb") as f:
+        f.write(data)
+
+
+def read_archive_sync(storage: str, path: str) -> bytes:
+    """アーカイブを読み出し（同期処理）"""
+    if storage == "blob":
+        service = get_service_client(AZURE_STORAGE_CONNECTION_STRING)
+        return (
+            service.get_blob_client(ARCHIVE_CONTAINER, path).download_blob().readall()
+        )
+
+    with open(os.path.join(ARCHIVE_DIR, path), "rb") as f:
+        return f.read()
+
+
+async def write_archive(storage: str, path: str, data: bytes) -> None:
+    """アーカイブを保存（イベントループを止めないようスレッドで実行）"""
+    await asyncio.to_thread(write_archive_sync, storage, path, data)
+
+
+async def read_archive(storage: str, path: str) -> List[Dict[str, Any]]:
+    """アーカイブを読み出して行のリストに変換"""
+    data = await asyncio.to_thread(read_archive_sync, storage, path)
+    return decode_parquet(data)
+
+
+# ==============================================================================
+# 保持ポリシーの適用
+# ==============================================================================
+
+
+async def apply_policy(
+    table_name: str,
+    now: Optional[datetime] = None,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    pause: float = RETENTION_BATCH_PAUSE,
+    max_batches: Optional[int] = None,
+) -> Dict[str, Any]:
+    """1テーブルの保持期間切れの行をアーカイブして削除"""
+    policy = RETENTION_POLICIES[table_name]
+    model = policy["model"]
+    time_column = getattr(model, policy["time_column"])
+    cutoff = (now or datetime.now()) - timedelta(days=policy["days"])
+    storage = archive_storage()
+
+    if not db_manager._initialized:
+        db_manager.initialize()
+
+    archived = 0
+    batches = 0
+    cursor = None
+    while max_batches is None or batches < max_batches:
+        async with db_manager.async_session_maker() as db:
+            # (日時, ID) 順のキーセットで古い行から読む
+            query = select(*model.__table__.columns).where(time_column < cutoff)
+            if cursor is not None:
+                query = query.where(tuple_(time_column, model.id) > cursor)
+            result = await db.execute(
+                query.order_by(time_column, model.id).limit(batch_size)
+            )
+            rows = [dict(row) for row in result.mappings()]
+            if not rows:
+                break
+
+            path = archive_path(table_name, rows, policy["time_column"])
+            await write_archive(storage, path, encode_parquet(rows))
+
+            # 台帳登録と削除を1バッチ1トランザクションで実行
+            async with transaction(db):
+                await RetentionArchiveCRUD.create_archive(
+                    db,
+                    commit=False,
+                    table_name=table_name,
+                    storage=storage,
+                    location=path,
+                    first_id=rows[0]["id"],
+                    last_id=rows[-1]["id"],
+                    row_count=len(rows),
+                    min_time=rows[0][policy["time_column"]],
+                    max_time=rows[-1][policy["time_column"]],
+                )
+                await db.execute(
+                    delete(model).where(model.id.in_([row["id"] for row in rows]))
+                )
+
+        archived += len(rows)
+        batches += 1
+        cursor = (rows[-1][policy["time_column"]], rows[-1]["id"])
+        if len(rows) < batch_size:
+            break
+        # 他の処理にロックを譲るためバッチ間で待機
+        await asyncio.sleep(pause)
+
+    logger.info(f"リテンション適用: {table_name} {archived}件 ({batches}バッチ)")
+    return {
+        "table": table_name,
+        "cutoff": cutoff,
+        "storage": storage,
+        "archived": archived,
+        "batches": batches,
+    }
+
+
+async def run_retention(
+    table_name: Optional[str] = None, max_batches: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """全テーブル（table_name 指定時はそのテーブル）に保持ポリシーを適用"""
+    table_names = [table_name] if table_name else list(RETENTION_POLICIES)
+    return [await apply_policy(name, max_batches=max_batches) for name in table_names]
@@ -0,0 +1,146 @@
+"""
+静的ページ（管理画面の HTML）の配信
+
+このモジュールは以下の機能を提供します：
+- static/ の HTML の読み込みとプロセス内でのキャッシュ
+- ビルド時に作成した圧縮済みファイル（.br / .gz）の読み込み
+  （ない場合は初回読み込み時にメモリ上で圧縮）
+- Accept-Encoding に応じた br / gzip / 無圧縮の選択
+- 強い ETag・Cache-Control・Vary の付与と If-None-Match による 304 応答
+
+圧縮済みファイルは build_static.py で作成します。
+"""
+
+import gzip
+import hashlib
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+# brotli はオプション（インストールされていなければ gzip のみ）
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 静的ページのディレクトリ
+STATIC_DIR = os.getenv(
+    "STATIC_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+)
+
+# ブラウザ・CDN でのキャッシュ秒数（ETag で再検証できるため長めにする）
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "86400"))
+
+# 優先する順の圧縮方式と、圧縮済みファイルの拡張子
+STATIC_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+MEDIA_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+}
+
+
+def compress(data: bytes, encoding: str) -> Optional[bytes]:
+    """data を encoding で圧縮（対応していない場合は None）"""
+    if encoding == "gzip":
+        # mtime を固定し、同じ内容からは常に同じ圧縮結果にする
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Accept-Encoding のうち q=0 でない圧縮方式"""
+    accepted = []
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+class StaticAsset:
+    """1つの静的ファイルと、その圧縮済みの表現"""
+
+    def __init__(self, name: str, data: bytes, variants: Dict[str, bytes]):
+        self.name = name
+        self.media_type = MEDIA_TYPES.get(
+            os.path.splitext(name)[1], "application/octet-stream"
+        )
+        self.digest = hashlib.sha256(data).hexdigest()[:32]
+        # 圧縮方式ごとに別の表現のため、ETag も圧縮方式ごとに分ける
+        self.representations: Dict[str, Tuple[bytes, str]] = {
+            "identity": (data, f'"{self.digest}"')
+        }
+        for encoding, body in variants.items():
+            self.representations[encoding] = (body, f'"{self.digest}-{encoding}"')
+
+    def select(self, accept_encoding: str) -> Tuple[str, bytes, str]:
+        """クライアントが受け付ける最も小さい表現（圧縮方式・本文・ETag）"""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, _ in STATIC_ENCODINGS:
+            if encoding in self.representations and (
+                encoding in accepted or "*" in accepted
+            ):
+                body, etag = self.representations[encoding]
+                return encoding, body, etag
+        body, etag = self.representations["identity"]
+        return "identity", body, etag
+
+
+@lru_cache(maxsize=None)
+def load_asset(name: str) -> StaticAsset:
+    """静的ファイルを読み込む（プロセス内で1回だけ）"""
+    path = os.path.join(STATIC_DIR, name)
+    with open(path, "rb") as f:
+        data = f.read()
+    variants = {}
+    for encoding, suffix in STATIC_ENCODINGS:
+        try:
+            with open(path + suffix, "rb") as f:
+                variants[encoding] = f.read()
+            continue
+        except FileNotFoundError:
+            pass
+        body = compress(data, encoding)
+        if body is not None:
+            variants[encoding] = body
+    return StaticAsset(name, data, variants)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match が ETag に一致するか（W/ 付きも同じ値として比較）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def static_page(request: Request, name: str) -> Response:
+    """静的ファイルを Accept-Encoding に応じて返す（ETag が一致すれば 304）"""
+    asset = load_asset(name)
+    encoding, body, etag = asset.select(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={STATIC_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=asset.media_type, headers=headers)
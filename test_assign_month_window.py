@@ -0,0 +1,214 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+
+from assignkun_endpoints import assign_user_total_to_dict
+from db_crud import (
+    ASSIGN_CATEGORY_COLUMNS,
+    MONTH_DATA_SLOTS,
+    assign_month_window_query,
+    month_slot_total,
+    shift_month,
+)
+from db_models import AssignData, Base
+
+
+class JsonArrayAgg:
+    """MySQL の JSON_ARRAYAGG の代わり（SQLite の集約関数）"""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        self.values.append(json.loads(value))
+
+    def finalize(self):
+        return json.dumps(self.values)
+
+
+def register_mysql_functions(conn, _):
+    """集計クエリが使う MySQL の関数を SQLite に登録"""
+    conn.create_function("json_unquote", 1, lambda value: value)
+    conn.create_function("now", 0, lambda: datetime.now().isoformat(" "))
+    conn.create_aggregate("json_arrayagg", 1, JsonArrayAgg)
+
+
+def run_month_window(rows, year, month):
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", register_mysql_functions)
+    Base.metadata.create_all(engine, tables=[AssignData.__table__])
+    with Session(engine) as db:
+        db.add_all(AssignData(**row) for row in rows)
+        db.commit()
+        result = db.execute(assign_month_window_query(year, month)).all()
+    engine.dispose()
+    return [assign_user_total_to_dict(row, with_month=True) for row in result]
+
+
+def python_month_window(rows, year, month):
+    """SQL 化する前の Python 側の集計（月別合計は同じ照合規則で加算）"""
+    windows = {
+        "previous_month": shift_month(year, month, -1),
+        "current_month": (year, month),
+        "next_month": shift_month(year, month, 1),
+    }
+    user_totals = {}
+    for row in rows:
+        totals = user_totals.setdefault(
+            row["user_name"],
+            {
+                "user_name": row["user_name"],
+                **{f"{column}_total": 0.0 for column in ASSIGN_CATEGORY_COLUMNS},
+                "month_totals": {
+                    window: {"month": window_month, "total_assin": 0.0}
+                    for window, (_, window_month) in windows.items()
+                },
+                "projects": [],
+            },
+        )
+        for column in ASSIGN_CATEGORY_COLUMNS:
+            totals[f"{column}_total"] += row.get(column, 0.0)
+        for slot in MONTH_DATA_SLOTS:
+            data = (row.get("month_data") or {}).get(slot) or {}
+            for window, (window_year, window_month) in windows.items():
+                if data.get("month") == window_month and data.get("year") in (
+                    None,
+                    window_year,
+                ):
+                    totals["month_totals"][window]["total_assin"] += (
+                        data.get("total_assin") or 0.0
+                    )
+        totals["projects"].append(
+            {
+                "assin_project_code": row["assin_project_code"],
+                "assin_execution": row.get("assin_execution", 0.0),
+                "assin_directly": row.get("assin_directly", 0.0),
+            }
+        )
+    return [user_totals[name] for name in sorted(user_totals)]
+
+
+def assign(user_name, project_code, month_data, **columns):
+    return {
+        "user_name": user_name,
+        "assin_project_code": project_code,
+        "month_data": month_data,
+        **columns,
+    }
+
+
+def test_month_window_wraps_year_boundary():
+    """1月基準の前月は前年12月、12月基準の翌月は翌年1月として集計すること"""
+    rows = [
+        assign(
+            "田中",
+            1,
+            {
+                "previous_month": {"year": 2024, "month": 12, "total_assin": 10.0},
+                "current_month": {"year": 2025, "month": 1, "total_assin": 20.0},
+                "next_month": {"year": 2025, "month": 2, "total_assin": 30.0},
+            },
+        ),
+        # 同じ月でも年が違うスロットは含めない
+        assign(
+            "田中",
+            2,
+            {"previous_month": {"year": 2025, "month": 12, "total_assin": 99.0}},
+        ),
+    ]
+
+    (january,) = run_month_window(rows, 2025, 1)
+    assert january["month_totals"] == {
+        "previous_month": {"month": 12, "total_assin": 10.0},
+        "current_month": {"month": 1, "total_assin": 20.0},
+        "next_month": {"month": 2, "total_assin": 30.0},
+    }
+
+    (december,) = run_month_window(rows, 2024, 12)
+    assert december["month_totals"] == {
+        "previous_month": {"month": 11, "total_assin": 0.0},
+        "current_month": {"month": 12, "total_assin": 10.0},
+        "next_month": {"month": 1, "total_assin": 20.0},
+    }
+
+
+def test_month_window_ignores_missing_and_null_keys():
+    """キーがない・null のスロットは 0 として扱い、年がなければ月のみで照合すること"""
+    rows = [
+        assign("田中", 1, None),
+        assign("田中", 2, {}),
+        assign("田中", 3, {"current_month": {"month": None, "total_assin": 5.0}}),
+        assign("田中", 4, {"current_month": {"month": 5, "total_assin": None}}),
+        assign("田中", 5, {"current_month": {"month": 5}}),
+        assign(
+            "田中",
+            6,
+            {"current_month": {"year": None, "month": 5, "total_assin": 7.5}},
+        ),
+        assign("田中", 7, {"next_month": {"month": 6, "total_assin": 2.5}}),
+    ]
+
+    (tanaka,) = run_month_window(rows, 2025, 5)
+
+    assert tanaka["month_totals"] == {
+        "previous_month": {"month": 4, "total_assin": 0.0},
+        "current_month": {"month": 5, "total_assin": 7.5},
+        "next_month": {"month": 6, "total_assin": 2.5},
+    }
+    assert len(tanaka["projects"]) == 7
+
+
+def test_month_window_matches_python_aggregation():
+    """SQL の集計が Python 側の集計と一致すること"""
+    rows = [
+        assign(
+            "田中",
+            1,
+            {
+                "previous_month": {"month": 4, "total_assin": 150.5},
+                "current_month": {"month": 5, "total_assin": 160.0},
+                "next_month": {"month": 6, "total_assin": 155.8},
+            },
+            assin_execution=120.0,
+            assin_maintenance=20.0,
+            assin_directly=140.0,
+        ),
+        assign(
+            "田中",
+            2,
+            {
+                "previous_month": {"year": 2025, "month": 5, "total_assin": 12.25},
+                "current_month": {"year": 2025, "month": 6, "total_assin": 8.0},
+            },
+            assin_execution=30.0,
+            assin_common=4.5,
+        ),
+        assign(
+            "鈴木",
+            1,
+            {
+                "previous_month": {"month": 4, "total_assin": 90.5},
+                "current_month": {"month": 5, "total_assin": 99.0},
+                "next_month": {"month": 6, "total_assin": 95.8},
+            },
+            assin_execution=80.0,
+            assin_sales_sup=1.5,
+        ),
+    ]
+
+    assert run_month_window(rows, 2025, 5) == python_month_window(rows, 2025, 5)
+    assert run_month_window(rows, 2025, 6) == python_month_window(rows, 2025, 6)
+
+
+def test_month_slot_total_treats_json_null_as_missing():
+    """MySQL では JSON の null も SQL の NULL として照合すること"""
+    sql = str(
+        month_slot_total("current_month", 2025, 5).compile(dialect=mysql.dialect())
+    )
+
+    # month・year（2回）・total_assin のいずれも NULLIF で JSON の null を除く
+    assert sql.count("nullif(json_unquote(json_extract(") == 4
+    assert "CAST(" in sql and "AS SIGNED" in sql
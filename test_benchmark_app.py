@@ -0,0 +1,18 @@
+from benchmark_app import AZURITE_CONNECTION_STRING, blob_endpoint, summarize
+
+
+def test_summarize_reports_percentiles():
+    summary = summarize([float(value) for value in range(1, 101)])
+
+    assert summary["count"] == 100
+    assert summary["mean_ms"] == 50.5
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (50, 95, 99)
+    assert summarize([])["p50_ms"] is None
+
+
+def test_blob_endpoint_from_connection_string():
+    assert (
+        blob_endpoint(AZURITE_CONNECTION_STRING)
+        == "http://127.0.0.1:10000/devstoreaccount1"
+    )
+    assert blob_endpoint("AccountName=x;EndpointSuffix=core.windows.net") is None
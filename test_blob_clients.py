@@ -0,0 +1,17 @@
+import blob_clients
+
+CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=https;AccountName=devaccount;"
+    "AccountKey=ZGV2a2V5;EndpointSuffix=core.windows.net"
+)
+
+
+def test_service_client_is_shared_until_closed():
+    client = blob_clients.get_service_client(CONNECTION_STRING)
+
+    assert blob_clients.get_service_client(CONNECTION_STRING) is client
+
+    blob_clients.close_clients()
+
+    assert blob_clients.get_service_client(CONNECTION_STRING) is not client
+    blob_clients.close_clients()
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import blob_endpoints
+import csv_processor
+from blob_log_writer import BLOB_LOG_FIELDS, BlobLogWriter, blob_log_record
+
+
+def test_blob_log_record_fills_every_field():
+    """全ての行が同じ列を持ち、操作日時とエラーメッセージが補われること"""
+    record = blob_log_record(
+        "upload", "container", "a.csv", "error", error_message=ValueError("boom")
+    )
+
+    assert tuple(record) == BLOB_LOG_FIELDS
+    assert record["status"] == "error"
+    assert record["error_message"] == "boom"
+    assert record["file_size"] is None
+    assert isinstance(record["operation_time"], datetime)
+
+
+def test_enqueue_before_start_is_counted_as_dropped():
+    """開始前の登録はDBに触れず破棄件数として数えること"""
+    writer = BlobLogWriter()
+
+    writer.log("read", "container", "a.csv")
+
+    stats = writer.stats()
+    assert stats["running"] is False
+    assert stats["dropped"] == 1
+    assert stats["enqueued"] == 0
+
+
+class RecordingWriter:
+    """登録されたログを記録する blob_log_writer の代わり"""
+
+    def __init__(self):
+        self.records = []
+
+    def log(self, operation_type, container_name, blob_name, status="success", **kw):
+        self.records.append(
+            blob_log_record(operation_type, container_name, blob_name, status, **kw)
+        )
+
+
+class FakeBlobClient:
+    def __init__(self, content=None):
+        self.content = content
+
+    def exists(self):
+        return self.content is not None
+
+    def download_blob(self):
+        if self.content is None:
+            raise FileNotFoundError("BlobNotFound")
+        return SimpleNamespace(readall=lambda: self.content)
+
+
+def fake_service_client(content=None):
+    return SimpleNamespace(get_blob_client=lambda **_: FakeBlobClient(content))
+
+
+def test_missing_blob_is_audited(monkeypatch):
+    """存在しない Blob への操作も 404 とともにエラーとして記録すること"""
+    writer = RecordingWriter()
+    monkeypatch.setattr(blob_endpoints, "blob_log_writer", writer)
+    monkeypatch.setattr(
+        blob_endpoints, "get_blob_service_client", lambda: fake_service_client()
+    )
+
+    for endpoint in (
+        blob_endpoints.read_blob,
+        blob_endpoints.delete_blob,
+        blob_endpoints.download_blob,
+    ):
+        with pytest.raises(HTTPException) as error:
+            endpoint("missing.txt")
+        assert error.value.status_code == 404
+
+    assert [(r["operation_type"], r["status"]) for r in writer.records] == [
+        ("read", "error"),
+        ("delete", "error"),
+        ("download", "error"),
+    ]
+    assert {r["blob_name"] for r in writer.records} == {"missing.txt"}
+    assert writer.records[0]["error_message"] == "Blob 'missing.txt' not found"
+
+
+def test_csv_download_is_audited(monkeypatch):
+    """CSV 取り込みの Blob ダウンロードも成功・失敗を記録すること"""
+    writer = RecordingWriter()
+    monkeypatch.setattr(csv_processor, "blob_log_writer", writer)
+    content = "\ufeffa,b\n1,2\n".encode("utf-8")
+    monkeypatch.setattr(
+        csv_processor, "get_blob_service_client", lambda: fake_service_client(content)
+    )
+
+    assert asyncio.run(csv_processor.download_csv_from_blob("a.csv")) == "a,b\n1,2\n"
+
+    monkeypatch.setattr(
+        csv_processor, "get_blob_service_client", lambda: fake_service_client()
+    )
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(csv_processor.download_csv_from_blob("b.csv"))
+
+    assert [
+        (r["operation_type"], r["blob_name"], r["status"], r["file_size"])
+        for r in writer.records
+    ] == [
+        ("csv_download", "a.csv", "success", len(content)),
+        ("csv_download", "b.csv", "error", None),
+    ]
@@ -0,0 +1,206 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from bulk_endpoints import (
+    CONSTRAINT_ERROR,
+    MAX_BULK_ITEMS,
+    NOT_FOUND_ERROR,
+    REFERENCED_ERROR,
+    bulk_create_assignments,
+    bulk_create_projects,
+    bulk_create_users,
+    bulk_delete_projects,
+    bulk_update_assignments,
+    check_batch_size,
+)
+from db_crud import BulkCRUD
+from db_models import Assignment, Base, Project, User
+from models import (
+    AssignmentBulkUpdate,
+    AssignmentCreate,
+    BulkDeleteRequest,
+    ProjectCreate,
+    UserCreate,
+)
+
+
+async def run_with_session(func):
+    """外部キーを有効にした SQLite（メモリ）のセッションで func を実行"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    event.listen(
+        engine.sync_engine,
+        "connect",
+        lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"),
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, Project.__table__, Assignment.__table__],
+        )
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            return await func(db)
+    finally:
+        await engine.dispose()
+
+
+def assignment(name, project_id):
+    return AssignmentCreate(
+        name=name, project_id=project_id, difficulty_level="easy", max_score=100
+    )
+
+
+def test_check_batch_size_limit():
+    """空のバッチと MAX_BULK_ITEMS を超えるバッチは 400 になること"""
+    check_batch_size([0] * MAX_BULK_ITEMS)
+    for items in ([], [0] * (MAX_BULK_ITEMS + 1)):
+        with pytest.raises(HTTPException) as error:
+            check_batch_size(items)
+        assert error.value.status_code == 400
+
+
+def test_bulk_create_maps_ids_to_request_order():
+    """エラーの行を飛ばしても、作成した行のIDが要素の位置と一致すること"""
+
+    async def scenario(db):
+        await bulk_create_projects(
+            [ProjectCreate(name="A"), ProjectCreate(name="B")], db
+        )
+        response = await bulk_create_assignments(
+            [assignment("課題1", 2), assignment("課題2", 99), assignment("課題3", 1)],
+            db,
+        )
+        rows = await db.execute(select(Assignment.id, Assignment.name))
+        return response, dict(rows.all())
+
+    response, names = asyncio.run(run_with_session(scenario))
+
+    assert (response.succeeded, response.failed) == (2, 1)
+    first, missing, third = response.results
+    assert missing.success is False and missing.id is None
+    assert names[first.id] == "課題1"
+    assert names[third.id] == "課題3"
+
+
+def test_bulk_delete_reports_referenced_rows_per_item():
+    """参照されている行・存在しない行のみ失敗にし、残りは削除すること"""
+
+    async def scenario(db):
+        await bulk_create_projects(
+            [ProjectCreate(name="A"), ProjectCreate(name="B")], db
+        )
+        await bulk_create_assignments([assignment("課題1", 1)], db)
+        response = await bulk_delete_projects(BulkDeleteRequest(ids=[1, 2, 3]), db)
+        remaining = await db.execute(select(Project.id))
+        return response, remaining.scalars().all()
+
+    response, remaining = asyncio.run(run_with_session(scenario))
+
+    assert [(r.id, r.success, r.error) for r in response.results] == [
+        (1, False, REFERENCED_ERROR),
+        (2, True, None),
+        (3, False, NOT_FOUND_ERROR),
+    ]
+    assert remaining == [1]
+
+
+class MySQLReadBackSession:
+    """複数行INSERT後にIDを読み直す MySQL セッションの代わり"""
+
+    bind = SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+
+    def __init__(self, lastrowid, read_back_ids):
+        self.lastrowid = lastrowid
+        self.read_back_ids = read_back_ids
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=mysql.dialect())))
+        if len(self.statements) == 2:
+            return SimpleNamespace(lastrowid=self.lastrowid)
+        ids = self.read_back_ids
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: ids))
+
+
+def test_insert_rows_reads_back_ids_of_multi_row_insert():
+    """MySQL では複数行INSERTの1文で作成し、先頭行のID以降を読み直すこと"""
+    rows = [{"name": "A"}, {"name": "B"}, {"name": "C"}]
+    # innodb_autoinc_lock_mode=2 で他の INSERT と採番が混ざった場合
+    db = MySQLReadBackSession(lastrowid=11, read_back_ids=[11, 12, 14])
+
+    ids = asyncio.run(BulkCRUD.insert_rows(db, Project, rows))
+
+    assert ids == [11, 12, 14]
+    snapshot, inserted, read_back = db.statements
+    assert snapshot.startswith("SELECT projects.id")
+    # 3行を1文の VALUES で作成
+    assert inserted.startswith("INSERT INTO projects") and inserted.count("), (") == 2
+    assert "WHERE projects.id >= %s ORDER BY projects.id" in read_back
+    assert "LIMIT %s" in read_back
+
+    # 読み直した件数が合わない（他の行が見える）場合は対応づけない
+    db = MySQLReadBackSession(lastrowid=11, read_back_ids=[11, 12, 13, 14])
+    with pytest.raises(RuntimeError):
+        asyncio.run(BulkCRUD.insert_rows(db, Project, rows))
+
+
+def test_bulk_create_reports_constraint_violations_per_item():
+    """一意制約に違反した行のみ失敗にし、残りは作成すること"""
+
+    async def scenario(db):
+        response = await bulk_create_users(
+            [
+                UserCreate(name="田中", email="a@example.com"),
+                UserCreate(name="鈴木", email="a@example.com"),
+                UserCreate(name="佐藤", email="b@example.com"),
+            ],
+            db,
+        )
+        names = await db.execute(select(User.name).order_by(User.id))
+        return response, names.scalars().all()
+
+    response, names = asyncio.run(run_with_session(scenario))
+
+    assert [(r.success, r.error) for r in response.results] == [
+        (True, None),
+        (False, CONSTRAINT_ERROR),
+        (True, None),
+    ]
+    assert names == ["田中", "佐藤"]
+
+
+def test_bulk_update_reports_constraint_violations_per_item():
+    """外部キーに違反した更新のみ失敗にし、残りは更新すること"""
+
+    async def scenario(db):
+        await bulk_create_projects([ProjectCreate(name="A")], db)
+        await bulk_create_assignments(
+            [assignment("課題1", 1), assignment("課題2", 1)], db
+        )
+        response = await bulk_update_assignments(
+            [
+                AssignmentBulkUpdate(id=1, project_id=99),
+                AssignmentBulkUpdate(id=2, name="課題2改"),
+                AssignmentBulkUpdate(id=3, name="なし"),
+            ],
+            db,
+        )
+        rows = await db.execute(
+            select(Assignment.name, Assignment.project_id).order_by(Assignment.id)
+        )
+        return response, rows.all()
+
+    response, rows = asyncio.run(run_with_session(scenario))
+
+    assert [(r.id, r.success, r.error) for r in response.results] == [
+        (1, False, CONSTRAINT_ERROR),
+        (2, True, None),
+        (3, False, NOT_FOUND_ERROR),
+    ]
+    assert rows == [("課題1", 1), ("課題2改", 1)]
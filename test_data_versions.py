@@ -0,0 +1,214 @@
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from data_versions import (
+    DataVersionCache,
+    DataVersionMiddleware,
+    data_version_cache,
+    make_etag,
+    matching_etag,
+)
+from database import BUMPED_DATASETS_KEY
+from db_crud import AssignDataCRUD, DataVersionCRUD
+from db_models import AssignData, Base
+from lazy_routers import route_table_hash
+
+
+def loaded_cache(versions):
+    """指定のバージョンを読み込み済みのキャッシュ（TTL 内はデータベースを使わない）"""
+    cache = DataVersionCache(ttl=60)
+    cache.versions = versions
+    cache.loaded_at = time.monotonic()
+    return cache
+
+
+def test_make_etag_changes_with_version_and_query():
+    etag = make_etag(["assign"], {"assign": 3}, "/assign-kun/assigns", b"month=5")
+
+    assert etag.startswith('"assign.3-') and etag.endswith('"')
+    assert etag == make_etag(
+        ["assign"], {"assign": 3}, "/assign-kun/assigns", b"month=5"
+    )
+    assert etag != make_etag(
+        ["assign"], {"assign": 4}, "/assign-kun/assigns", b"month=5"
+    )
+    assert etag != make_etag(
+        ["assign"], {"assign": 3}, "/assign-kun/assigns", b"month=6"
+    )
+
+
+def test_make_etag_includes_effective_year():
+    """年の指定がない場合に使う当年が変われば ETag も変わること"""
+    etag = make_etag(["assign"], {"assign": 3}, "/assign-kun/informations", year=2025)
+
+    assert etag != make_etag(
+        ["assign"], {"assign": 3}, "/assign-kun/informations", year=2026
+    )
+
+
+def test_matching_etag_accepts_compressed_representation():
+    etag = '"assign.3-abc"'
+
+    assert matching_etag(etag, etag, "") == etag
+    assert matching_etag('"assign.3-abc-gzip"', etag, "gzip") == '"assign.3-abc-gzip"'
+    # gzip を受け付けないクライアントには圧縮した表現の ETag は一致しない
+    assert matching_etag('"assign.3-abc-gzip"', etag, "identity") is None
+    assert matching_etag('"assign.2-abc"', etag, "gzip") is None
+    assert matching_etag(None, etag, "gzip") is None
+
+
+def test_middleware_returns_304_without_calling_endpoint():
+    calls = []
+
+    async def assigns(request):
+        calls.append(request.url.path)
+        return JSONResponse({"assigns": []})
+
+    cache = loaded_cache({"assign": 1})
+    app = DataVersionMiddleware(
+        Starlette(routes=[Route("/assign-kun/assigns", assigns)]), cache=cache
+    )
+    client = TestClient(app)
+
+    response = client.get("/assign-kun/assigns")
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    not_modified = client.get("/assign-kun/assigns", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert calls == ["/assign-kun/assigns"]
+
+    # バージョンが上がると ETag が変わり、エンドポイントが呼ばれる
+    cache.versions = {"assign": 2}
+    changed = client.get("/assign-kun/assigns", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert len(calls) == 2
+
+
+def test_cache_is_invalidated_after_commit_of_bump():
+    data_version_cache.versions = {"assign": 1}
+    data_version_cache.loaded_at = time.monotonic()
+
+    with Session(create_engine("sqlite://")) as session:
+        session.info[BUMPED_DATASETS_KEY] = {"assign"}
+        session.rollback()
+        assert data_version_cache.fresh() == {"assign": 1}
+
+        session.info[BUMPED_DATASETS_KEY] = {"assign"}
+        session.commit()
+        assert data_version_cache.fresh() is None
+        assert BUMPED_DATASETS_KEY not in session.info
+
+
+def test_cache_discards_value_loaded_before_invalidation():
+    cache = DataVersionCache(ttl=60)
+
+    async def load():
+        # 読み込み中にコミット（破棄）が起きた場合
+        cache.invalidate()
+        return {"assign": 1}
+
+    cache.load = load
+    assert asyncio.run(cache.get()) == {"assign": 1}
+    assert cache.fresh() is None
+
+
+def test_conditional_request_does_not_import_routers(monkeypatch):
+    """304 はルーターを読み込む前に返すこと（ETag のミドルウェアが最も外側）"""
+    import function_app
+
+    for entry in function_app.lazy_routers.entries:
+        monkeypatch.setitem(entry, "loaded", False)
+    monkeypatch.setattr(data_version_cache, "versions", {"assign": 1, "histogram": 1})
+    monkeypatch.setattr(data_version_cache, "loaded_at", time.monotonic())
+    etag = make_etag(
+        ["assign", "histogram"],
+        data_version_cache.versions,
+        "/assign-kun/informations",
+        salt=route_table_hash(function_app.fastapi_app, function_app.lazy_routers),
+        year=datetime.now().year,
+    )
+
+    client = TestClient(function_app.fastapi_app)
+    response = client.get("/assign-kun/informations", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert not any(entry["loaded"] for entry in function_app.lazy_routers.entries)
+
+
+def test_demo_route_answers_304_without_loading_versions():
+    """固定のデモデータのエンドポイントはバージョンを読み込まずに 304 を返すこと"""
+
+    async def users(request):
+        return JSONResponse([{"user_id": 1}])
+
+    cache = DataVersionCache(ttl=60)
+
+    async def load():
+        raise AssertionError("バージョンを読み込んではいけない")
+
+    cache.load = load
+    app = DataVersionMiddleware(
+        Starlette(routes=[Route("/assign-kun/users", users)]), cache=cache, salt="v1"
+    )
+    client = TestClient(app)
+
+    etag = client.get("/assign-kun/users").headers["etag"]
+    assert etag.startswith('"static-')
+    not_modified = client.get("/assign-kun/users", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    # salt（ルーター構成のハッシュ）が変われば一致しない
+    redeployed = DataVersionMiddleware(app.app, cache=cache, salt="v2")
+    changed = TestClient(redeployed).get(
+        "/assign-kun/users", headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+
+
+def test_month_data_update_invalidates_assign_etag(monkeypatch):
+    """month_data のみの更新でも assign のバージョンが上がり、ETag が変わること"""
+    bumped = []
+
+    async def record_bump(db, datasets, commit=True):
+        # 実際の bump は MySQL の upsert のため、記録と session.info の更新のみ行う
+        bumped.extend(datasets)
+        db.info.setdefault(BUMPED_DATASETS_KEY, set()).update(datasets)
+
+    monkeypatch.setattr(DataVersionCRUD, "bump", record_bump)
+    data_version_cache.versions = {"assign": 1}
+    data_version_cache.loaded_at = time.monotonic()
+    etag = make_etag(["assign"], {"assign": 1}, "/assign-kun/assigns", b"month=5")
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[AssignData.__table__])
+        async with AsyncSession(engine) as db:
+            db.add(AssignData(id=1, user_name="田中", assin_project_code=1))
+            await db.commit()
+            await AssignDataCRUD.update_assign_data(
+                db, 1, month_data={"current_month": {"month": 5, "total_assin": 1}}
+            )
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+    assert bumped == ["assign"]
+    assert data_version_cache.fresh() is None
+    assert etag != make_etag(
+        ["assign"], {"assign": 2}, "/assign-kun/assigns", b"month=5"
+    )
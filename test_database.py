@@ -0,0 +1,26 @@
+from database import alembic_head
+
+
+def write_revision(directory, file_name, revision, down_revision):
+    (directory / file_name).write_text(
+        f"revision: str = '{revision}'\ndown_revision = {down_revision!r}\n",
+        encoding="utf-8",
+    )
+
+
+def test_alembic_head_follows_revision_chain(tmp_path):
+    write_revision(tmp_path, "a_init.py", "aaa111", None)
+    write_revision(tmp_path, "b_next.py", "bbb222", "aaa111")
+    write_revision(tmp_path, "c_last.py", "ccc333", "bbb222")
+    (tmp_path / "README").write_text("revision = 'zzz999'\n", encoding="utf-8")
+
+    assert alembic_head(str(tmp_path)) == "ccc333"
+
+
+def test_alembic_head_is_none_for_branches_or_missing_dir(tmp_path):
+    write_revision(tmp_path, "a_init.py", "aaa111", None)
+    write_revision(tmp_path, "b_left.py", "bbb222", "aaa111")
+    write_revision(tmp_path, "c_right.py", "ccc333", "aaa111")
+
+    assert alembic_head(str(tmp_path)) is None
+    assert alembic_head(str(tmp_path / "missing")) is None
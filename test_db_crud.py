@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from db_crud import UserCRUD
+from db_models import Base, BlobLog, User
+
+
+async def run_with_session(func, update_returning=True):
+    """外部キーを有効にした SQLite（メモリ）のセッションで func を実行
+
+    update_returning=False では MySQL と同じく RETURNING なしの経路を通る。
+    """
+    engine = create_async_engine("sqlite+aiosqlite://")
+    engine.dialect.update_returning = update_returning
+    event.listen(
+        engine.sync_engine,
+        "connect",
+        lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"),
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all, tables=[User.__table__, BlobLog.__table__]
+        )
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            return await func(db)
+    finally:
+        await engine.dispose()
+
+
+def test_delete_user_keeps_blob_logs():
+    """Blob操作ログのあるユーザーも削除でき、ログのユーザーIDは NULL になること"""
+
+    async def scenario(db):
+        user = await UserCRUD.create_user(db, name="田中", email="tanaka@example.com")
+        db.add(
+            BlobLog(
+                operation_type="upload",
+                container_name="csv",
+                blob_name="a.csv",
+                status="success",
+                user_id=user.id,
+            )
+        )
+        await db.commit()
+
+        deleted = await UserCRUD.delete_user(db, user.id)
+        users = (await db.execute(select(User))).scalars().all()
+        log_user_ids = (await db.execute(select(BlobLog.user_id))).scalars().all()
+        return deleted, users, log_user_ids
+
+    deleted, users, log_user_ids = asyncio.run(run_with_session(scenario))
+
+    assert deleted is True
+    assert users == []
+    assert log_user_ids == [None]
+
+
+@pytest.mark.parametrize("update_returning", [True, False])
+def test_update_and_delete_missing_user(update_returning):
+    """存在しないIDの更新は None、削除は False になること（エンドポイントでは 404）"""
+
+    async def scenario(db):
+        user = await UserCRUD.create_user(db, name="田中")
+        updated = await UserCRUD.update_user(db, user.id, score=80)
+        missing_update = await UserCRUD.update_user(db, user.id + 1, score=80)
+        missing_delete = await UserCRUD.delete_user(db, user.id + 1)
+        return updated, missing_update, missing_delete
+
+    updated, missing_update, missing_delete = asyncio.run(
+        run_with_session(scenario, update_returning)
+    )
+
+    assert (updated.name, updated.score) == ("田中", 80)
+    assert missing_update is None
+    assert missing_delete is False
@@ -0,0 +1,89 @@
+import asyncio
+
+import pymysql
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import db_retry
+from db_retry import (
+    RetryBudget,
+    RetryTokenBucket,
+    classify_error,
+    current_retry_budget,
+    retry_transaction,
+)
+
+
+def mysql_error(code: int) -> OperationalError:
+    """aiomysql と同じ形の MySQL エラー"""
+    return OperationalError(
+        "UPDATE users", {}, pymysql.err.OperationalError(code, "error")
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(db_retry, "backoff_delay", lambda attempt: 0)
+    monkeypatch.setattr(db_retry, "retry_tokens", RetryTokenBucket(capacity=10))
+
+
+def flaky(codes):
+    """codes のエラーを順に送出した後に成功する関数"""
+    calls = []
+
+    async def func():
+        calls.append(len(calls))
+        if len(calls) <= len(codes):
+            raise mysql_error(codes[len(calls) - 1])
+        return "ok"
+
+    return func, calls
+
+
+def test_classify_error():
+    """デッドロック・ロック待ち・接続断のみ再試行対象になること"""
+    assert classify_error(mysql_error(1213)) == "deadlock"
+    assert classify_error(mysql_error(1205)) == "lock_wait_timeout"
+    assert classify_error(mysql_error(2013)) == "lost_connection"
+    assert classify_error(mysql_error(1062)) is None
+    assert classify_error(ValueError("x")) is None
+
+
+def test_retries_transient_errors_until_success():
+    """一時的なエラーは最大試行回数まで再試行すること"""
+    func, calls = flaky([1213, 2006])
+
+    assert asyncio.run(retry_transaction(func, max_attempts=3)()) == "ok"
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_attempts_and_on_other_errors():
+    """試行回数を超えた場合と再試行対象外のエラーはそのまま送出すること"""
+    func, calls = flaky([1213, 1213, 1213])
+    with pytest.raises(OperationalError):
+        asyncio.run(retry_transaction(func, max_attempts=3)())
+    assert len(calls) == 3
+
+    func, calls = flaky([1062])
+    with pytest.raises(OperationalError):
+        asyncio.run(retry_transaction(func)())
+    assert len(calls) == 1
+
+
+def test_request_budget_and_tokens_limit_retries(monkeypatch):
+    """リクエストの上限や全体のトークンが尽きると再試行しないこと"""
+
+    async def with_budget(func):
+        current_retry_budget.set(RetryBudget(limit=1))
+        return await retry_transaction(func, max_attempts=5)()
+
+    func, calls = flaky([1213, 1213])
+    with pytest.raises(OperationalError):
+        asyncio.run(with_budget(func))
+    assert len(calls) == 2
+
+    monkeypatch.setattr(db_retry, "retry_tokens", RetryTokenBucket(capacity=0))
+    func, calls = flaky([1205])
+    with pytest.raises(OperationalError):
+        asyncio.run(retry_transaction(func)())
+    assert len(calls) == 1
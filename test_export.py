@@ -0,0 +1,42 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from export_endpoints import encode_csv, encode_ndjson, gzip_chunks
+
+
+def test_encode_ndjson():
+    """Decimal・datetime を含む行が1行1JSONで出力されること"""
+    rows = [
+        {"id": 1, "value": Decimal("1.50"), "at": datetime(2025, 7, 24, 10, 0)},
+        {"id": 2, "value": None, "at": None},
+    ]
+    lines = encode_ndjson(rows).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"id": 1, "value": 1.5, "at": "2025-07-24T10:00:00"},
+        {"id": 2, "value": None, "at": None},
+    ]
+
+
+def test_encode_csv():
+    """datetime が ISO 形式で CSV に出力されること"""
+    data = encode_csv([[1, "名前", datetime(2025, 7, 24, 10, 0)]])
+    assert data.decode("utf-8") == "1,名前,2025-07-24T10:00:00\r\n"
+
+
+def test_gzip_chunks_round_trip():
+    """逐次圧縮したチャンクを連結すると元データに戻ること"""
+
+    async def source():
+        for i in range(5):
+            yield f"chunk-{i}\n".encode("utf-8")
+
+    async def collect():
+        return b"".join([chunk async for chunk in gzip_chunks(source())])
+
+    compressed = asyncio.run(collect())
+    assert gzip.decompress(compressed) == b"".join(
+        f"chunk-{i}\n".encode("utf-8") for i in range(5)
+    )
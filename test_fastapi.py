@@ -87,3 +87,26 @@ def test_create_user():
     assert data["name"] == new_user["name"]
     assert data["email"] == new_user["email"]
     assert "id" in data
+
+
+def test_worker_startup_runs_once(monkeypatch):
+    """同時に届いた lifespan の開始でも起動処理が1回だけ実行されるテスト"""
+    import asyncio
+    import function_app
+
+    calls = []
+
+    async def fake_startup():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(function_app, "_startup", fake_startup)
+    monkeypatch.setitem(function_app.worker_state, "started", False)
+
+    async def main():
+        await asyncio.gather(*[function_app.startup_worker() for _ in range(5)])
+
+    asyncio.run(main())
+
+    assert calls == [1]
+    assert function_app.worker_state["started"] is True
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql
+
+from db_models import Project
+from fieldsets import InvalidFieldsetError, loader_options, parse_names
+
+
+def test_parse_names():
+    """カンマ区切りの指定が空要素を除いて分割されること"""
+    assert parse_names("id, name,,score") == ["id", "name", "score"]
+    assert parse_names(None) == []
+
+
+def test_fields_limit_selected_columns():
+    """fields 指定時は指定列と必須列のみを SELECT すること"""
+    options = loader_options(Project, ["name"], required=("id", "created_at"))
+    sql = str(select(Project).options(*options).compile(dialect=mysql.dialect())).split(
+        "FROM"
+    )[0]
+    assert "projects.name" in sql
+    assert "projects.created_at" in sql
+    assert "projects.description" not in sql
+
+
+def test_unknown_field_or_relationship():
+    """存在しない列・関連は InvalidFieldsetError になること"""
+    with pytest.raises(InvalidFieldsetError):
+        loader_options(Project, ["bogus"])
+    with pytest.raises(InvalidFieldsetError):
+        loader_options(Project, include=["bogus"])
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from histogram_engine import HistogramEngineError, compute_histograms, validate_spec
+from models import HistogramGenerateRequest
+
+
+def test_fixed_bins_match_numpy_per_group():
+    """等幅方式のグループ別件数が np.histogram と一致すること"""
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, 50, size=5000)
+    values = rng.normal(100, 20, size=5000)
+
+    results = compute_histograms(keys, values, "fixed", bins=8)
+
+    assert [key for key, _, _ in results] == sorted(set(keys.tolist()))
+    for key, edges, counts in results:
+        expected, expected_edges = np.histogram(values[keys == key], bins=8)
+        assert counts.tolist() == expected.tolist()
+        assert np.allclose(edges, expected_edges)
+
+
+def test_quantile_and_explicit_edges():
+    """分位点方式は np.quantile の境界、境界指定方式は範囲外を除外すること"""
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0])
+    keys = np.zeros(len(values), dtype=np.int64)
+
+    [(_, edges, counts)] = compute_histograms(keys, values, "quantile", bins=4)
+    assert np.allclose(edges, np.quantile(values, [0, 0.25, 0.5, 0.75, 1]))
+    assert counts.sum() == len(values)
+
+    [(_, edges, counts)] = compute_histograms(
+        keys, values, "edges", edges=[2.0, 4.0, 6.0]
+    )
+    assert counts.tolist() == [2, 3]
+
+
+def test_invalid_spec():
+    """数値列以外・整数列以外のグループ列・降順の境界はエラーになること"""
+    with pytest.raises(HistogramEngineError):
+        validate_spec(
+            HistogramGenerateRequest(source="assign_data", column="user_name")
+        )
+    with pytest.raises(HistogramEngineError):
+        validate_spec(
+            HistogramGenerateRequest(
+                source="assign_data", column="assin_execution", group_by="assin_common"
+            )
+        )
+    with pytest.raises(HistogramEngineError):
+        validate_spec(
+            HistogramGenerateRequest(
+                source="histogram_data",
+                column="histogram_1month",
+                method="edges",
+                edges=[3, 1],
+            )
+        )
@@ -0,0 +1,172 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import MetaData, delete, event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from db_crud import DataVersionCRUD, HistogramDataCRUD
+from db_models import Base, HistogramData, HistogramMonthValue, HistogramRollup
+
+MONTH_COLUMNS = [f"histogram_{month}month" for month in range(1, 13)]
+
+
+async def record_bump(db, datasets, commit=True):
+    db.info.setdefault("bumped", []).extend(datasets)
+
+
+async def run_with_histogram_tables(func):
+    """ヒストグラム関連のテーブルを作成した SQLite（メモリ）のセッションで func を実行"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    # 事前集計の集計日時に使う MySQL の NOW()
+    event.listen(
+        engine.sync_engine,
+        "connect",
+        lambda conn, _: conn.create_function(
+            "now", 0, lambda: datetime.now().isoformat(" ")
+        ),
+    )
+    # SQLite は複合主キーの自動採番ができないため、id を採番しない定義で作成する
+    histogram_data = HistogramData.__table__.to_metadata(MetaData())
+    histogram_data.c.id.autoincrement = False
+    async with engine.begin() as conn:
+        await conn.run_sync(histogram_data.create)
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[HistogramMonthValue.__table__, HistogramRollup.__table__],
+        )
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            return await func(db)
+    finally:
+        await engine.dispose()
+
+
+def histogram_row(row_id, year, pj_br_num, ac_code, values, contract_form="請負"):
+    """月列に values（1月から順）を持つ histogram_data の行"""
+    return {
+        "id": row_id,
+        "histogram_ac_code": ac_code,
+        "histogram_ac_name": f"{ac_code}名称",
+        "histogram_pj_br_num": pj_br_num,
+        "histogram_pj_name": f"{pj_br_num}名称",
+        "histogram_pj_contract_form": contract_form,
+        "histogram_costs_unit": 1,
+        "histogram_year": year,
+        **dict(zip(MONTH_COLUMNS, values)),
+    }
+
+
+async def month_values_by_key(db):
+    """histogram_month_values を (PJ枝番, ACコード, 年, 月) → 値 にする"""
+    result = await db.execute(
+        select(
+            HistogramMonthValue.pj_br_num,
+            HistogramMonthValue.ac_code,
+            HistogramMonthValue.year,
+            HistogramMonthValue.month,
+            HistogramMonthValue.value,
+        )
+    )
+    return {tuple(row[:4]): row.value for row in result}
+
+
+async def month_columns_by_key(db):
+    """histogram_data の月列を同じ形に展開する"""
+    result = await db.execute(select(HistogramData))
+    return {
+        (
+            data.histogram_pj_br_num,
+            data.histogram_ac_code,
+            data.histogram_year,
+            month,
+        ): (getattr(data, f"histogram_{month}month") or Decimal("0"))
+        for data in result.scalars().all()
+        for month in range(1, 13)
+    }
+
+
+def test_month_values_follow_year_replacement(monkeypatch):
+    """年の置き換え後も月別値が histogram_data の月列と一致し、他の年は残ること"""
+    monkeypatch.setattr(DataVersionCRUD, "bump", record_bump)
+
+    async def scenario(db):
+        await HistogramDataCRUD.replace_years(
+            db,
+            [
+                histogram_row(1, 2024, "PJ1", "AC1", [1.5] * 12),
+                histogram_row(2, 2025, "PJ1", "AC1", [2.25] * 12),
+                histogram_row(3, 2025, "PJ2", "AC1", [3] * 12),
+            ],
+        )
+        # 2025年を取り込み直す（PJ2 はなくなり PJ3 が増える、月の値も変わる）
+        await HistogramDataCRUD.replace_years(
+            db,
+            [
+                histogram_row(4, 2025, "PJ1", "AC1", [0.5, 0, 10.75]),
+                histogram_row(5, 2025, "PJ3", "AC2", [4] * 12),
+            ],
+        )
+        return await month_columns_by_key(db), await month_values_by_key(db)
+
+    columns, values = asyncio.run(run_with_histogram_tables(scenario))
+
+    assert values == columns
+    assert {key[:3] for key in values} == {
+        ("PJ1", "AC1", 2024),
+        ("PJ1", "AC1", 2025),
+        ("PJ3", "AC2", 2025),
+    }
+    assert values[("PJ1", "AC1", 2024, 6)] == Decimal("1.50")
+    assert values[("PJ1", "AC1", 2025, 3)] == Decimal("10.75")
+    # 取り込みデータにない月は 0
+    assert values[("PJ1", "AC1", 2025, 12)] == Decimal("0")
+
+
+def test_month_values_follow_exchanged_partitions(monkeypatch):
+    """パーティション交換で差し替えた年も月別値が新しい月列と一致すること"""
+    monkeypatch.setattr(DataVersionCRUD, "bump", record_bump)
+    old = [histogram_row(1, 2025, "PJ1", "AC1", [1] * 12)]
+    new = [histogram_row(2, 2025, "PJ1", "AC1", [7.25] * 12)]
+
+    async def scenario(db):
+        await HistogramDataCRUD.replace_years(db, old)
+        # EXCHANGE PARTITION の代わりに histogram_data のみを差し替える
+        await db.execute(delete(HistogramData))
+        await db.execute(insert(HistogramData), new)
+        await HistogramDataCRUD.replace_years(db, new, exchanged_years=[2025])
+        return await month_columns_by_key(db), await month_values_by_key(db)
+
+    columns, values = asyncio.run(run_with_histogram_tables(scenario))
+
+    assert values == columns
+    assert set(values.values()) == {Decimal("7.25")}
+
+
+def test_month_values_follow_reimport(monkeypatch):
+    """全件削除して取り込み直しても月別値が重複せず月列と一致すること"""
+    monkeypatch.setattr(DataVersionCRUD, "bump", record_bump)
+
+    async def scenario(db):
+        await HistogramDataCRUD.bulk_create_histogram_data(
+            db, [histogram_row(1, 2025, "PJ1", "AC1", [1] * 12)]
+        )
+        await HistogramDataCRUD.clear_histogram_data(db)
+        await HistogramDataCRUD.bulk_create_histogram_data(
+            db,
+            [
+                histogram_row(2, 2025, "PJ1", "AC1", [2] * 12),
+                histogram_row(3, 2026, "PJ1", "AC1", [3] * 12),
+            ],
+        )
+        rows = await db.execute(select(HistogramMonthValue.id))
+        return (
+            await month_columns_by_key(db),
+            await month_values_by_key(db),
+            len(rows.all()),
+        )
+
+    columns, values, row_count = asyncio.run(run_with_histogram_tables(scenario))
+
+    assert values == columns
+    assert row_count == 24
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from histogram_partitions import year_partition_exchange
+
+
+class RecordingResult:
+    def __init__(self, rows=(), scalar=None):
+        self.rows = list(rows)
+        self.value = scalar
+
+    def scalar(self):
+        return self.value
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class RecordingConnection:
+    """実行した SQL を記録する MySQL 接続の代わり"""
+
+    dialect = SimpleNamespace(name="mysql")
+
+    def __init__(self, partition_years, max_id=10, lock=1):
+        self.partition_years = partition_years
+        self.max_id = max_id
+        self.lock = lock
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append((sql, params))
+        if "GET_LOCK" in sql:
+            return RecordingResult(scalar=self.lock)
+        if "information_schema.PARTITIONS" in sql:
+            names = [f"p{year}" for year in self.partition_years] + ["p_max"]
+            return RecordingResult(rows=[(name,) for name in names])
+        if sql.startswith("SELECT max("):
+            return RecordingResult(scalar=self.max_id)
+        return RecordingResult()
+
+    def sql(self, keyword):
+        return [sql for sql, _ in self.statements if keyword in sql]
+
+
+def histogram_rows(year, count):
+    return [
+        {"histogram_year": year, "histogram_ac_code": f"AC{i}"} for i in range(count)
+    ]
+
+
+async def run_import(conn, rows, fail=False):
+    async with year_partition_exchange(conn, rows) as exchanged:
+        if fail:
+            raise RuntimeError("import failed")
+        return exchanged
+
+
+def test_exchange_keeps_old_rows_until_import_succeeds():
+    """成功時は交換を1回だけ行い、ブロックを抜けてから作業テーブルを削除すること"""
+    conn = RecordingConnection({2024, 2025})
+    rows = histogram_rows(2025, 2) + histogram_rows(2020, 1)
+
+    exchanged = asyncio.run(run_import(conn, rows))
+
+    # パーティションのない 2020 年は DELETE + INSERT に任せる
+    assert exchanged == {2025}
+    assert len(conn.sql("EXCHANGE PARTITION p2025")) == 1
+    # ID はロックした上で予約した範囲（11, 12）から割り当てる
+    assert conn.sql("LOCK TABLES histogram_data WRITE")
+    assert conn.sql("AUTO_INCREMENT = 13")
+    inserted = [
+        params
+        for sql, params in conn.statements
+        if sql.startswith("INSERT INTO histogram_data_stage_2025")
+    ]
+    assert [row["id"] for row in inserted[0]] == [11, 12]
+    sqls = [sql for sql, _ in conn.statements]
+    assert sqls[-2] == "DROP TABLE IF EXISTS histogram_data_stage_2025"
+    assert "RELEASE_LOCK" in sqls[-1]
+
+
+def test_failed_import_restores_exchanged_partition():
+    """取り込みが失敗した場合は作業テーブルの旧データと交換し直すこと"""
+    conn = RecordingConnection({2024, 2025})
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_import(conn, histogram_rows(2025, 2), fail=True))
+
+    # 差し替えと元に戻す交換の2回
+    assert len(conn.sql("EXCHANGE PARTITION p2025")) == 2
+    sqls = [sql for sql, _ in conn.statements]
+    assert sqls[-2] == "DROP TABLE IF EXISTS histogram_data_stage_2025"
+    assert "RELEASE_LOCK" in sqls[-1]
+
+
+def test_no_exchange_without_import_lock():
+    """他の取り込みがロックを持っている場合は交換しないこと"""
+    conn = RecordingConnection({2025}, lock=0)
+
+    assert asyncio.run(run_import(conn, histogram_rows(2025, 1))) == set()
+    assert not conn.sql("EXCHANGE")
@@ -0,0 +1,244 @@
+import asyncio
+import json
+from collections import defaultdict
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from assignkun_endpoints import get_information, get_rollups
+from db_crud import (
+    ROLLUP_GRAINS,
+    DataVersionCRUD,
+    HistogramRollupCRUD,
+    rollup_dimensions,
+)
+from db_models import Base, HistogramMonthValue, HistogramRollup, TeamAssignTotal
+
+# (PJ枝番, ACコード, 年, 月, 値, 契約形態)
+MONTH_VALUES = [
+    ("PJ1", "AC1", 2025, 3, 10, "請負"),
+    ("PJ1", "AC1", 2025, 4, 20, "請負"),
+    ("PJ1", "AC2", 2025, 4, 2.5, "請負"),
+    ("PJ2", "AC1", 2025, 7, 5, "準委任"),
+    ("PJ2", "AC2", 2026, 1, 1.5, None),
+]
+
+
+async def record_bump(db, datasets, commit=True):
+    db.info.setdefault("bumped", []).extend(datasets)
+
+
+async def run_with_month_values(func):
+    """月別値を登録した SQLite（メモリ）のセッションで func を実行"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    # 事前集計の集計日時に使う MySQL の NOW()
+    event.listen(
+        engine.sync_engine,
+        "connect",
+        lambda conn, _: conn.create_function(
+            "now", 0, lambda: datetime.now().isoformat(" ")
+        ),
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[
+                HistogramMonthValue.__table__,
+                HistogramRollup.__table__,
+                TeamAssignTotal.__table__,
+            ],
+        )
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add_all(
+                HistogramMonthValue(
+                    pj_br_num=pj_br_num,
+                    ac_code=ac_code,
+                    year=year,
+                    month=month,
+                    value=value,
+                    contract_form=contract_form,
+                )
+                for pj_br_num, ac_code, year, month, value, contract_form in MONTH_VALUES
+            )
+            await db.commit()
+            return await func(db)
+    finally:
+        await engine.dispose()
+
+
+def expected_rollups(month_values, grain, dimension):
+    """月別値から Python で求めた (期間の年, 期間の番号, 軸の値) → (合計, 行数)"""
+    totals = defaultdict(lambda: [0.0, 0])
+    for pj_br_num, ac_code, year, month, value, contract_form in month_values:
+        # 年度は4月始まり（1〜3月は前年度）
+        fiscal_year = year - 1 if month < 4 else year
+        period = {
+            "month": (year, month),
+            "quarter": (fiscal_year, (month - 4) % 12 // 3 + 1),
+            "fiscal_year": (fiscal_year, 0),
+        }[grain]
+        dimension_value = {
+            "total": "",
+            "ac_code": ac_code,
+            "pj_br_num": pj_br_num,
+            "contract_form": contract_form or "",
+        }[dimension]
+        entry = totals[(*period, dimension_value)]
+        entry[0] += value
+        entry[1] += 1
+    return {key: tuple(entry) for key, entry in totals.items()}
+
+
+async def rollups_by_key(db):
+    """(粒度, 集計軸) → 事前集計の (期間の年, 期間の番号, 軸の値) → (合計, 行数)"""
+    return {
+        (grain, dimension): {
+            (r.period_year, r.period_index, r.dimension_value): (
+                float(r.total_value),
+                r.row_count,
+            )
+            for r in await HistogramRollupCRUD.get_rollups(db, grain, dimension)
+        }
+        for grain in ROLLUP_GRAINS
+        for dimension in rollup_dimensions()
+    }
+
+
+def all_expected_rollups(month_values):
+    return {
+        (grain, dimension): expected_rollups(month_values, grain, dimension)
+        for grain in ROLLUP_GRAINS
+        for dimension in rollup_dimensions()
+    }
+
+
+def test_rebuild_rolls_up_every_grain_and_dimension(monkeypatch):
+    """月・四半期・年度 × 全体・ACコード・PJ枝番・契約形態の全組み合わせを集計すること"""
+    monkeypatch.setattr(DataVersionCRUD, "bump", record_bump)
+
+    async def scenario(db):
+        await HistogramRollupCRUD.rebuild(db)
+        return await rollups_by_key(db), db.info["bumped"]
+
+    rollups, bumped = asyncio.run(run_with_month_values(scenario))
+
+    assert rollups == all_expected_rollups(MONTH_VALUES)
+    # 1〜3月は前年度の第4四半期、4月は当年度の第1四半期
+    assert rollups[("quarter", "total")] == {
+        (2024, 4, ""): (10.0, 1),
+        (2025, 1, ""): (22.5, 2),
+        (2025, 2, ""): (5.0, 1),
+        (2025, 4, ""): (1.5, 1),
+    }
+    assert rollups[("fiscal_year", "contract_form")] == {
+        (2024, 0, "請負"): (10.0, 1),
+        (2025, 0, "請負"): (22.5, 2),
+        (2025, 0, "準委任"): (5.0, 1),
+        (2025, 0, ""): (1.5, 1),
+    }
+    assert bumped == ["histogram"]
+
+
+def test_rebuild_years_refreshes_fiscal_years_across_calendar_years(monkeypatch):
+    """年を指定した再計算でも、前年4月からの年度・四半期を全ての月から集計し直すこと"""
+    monkeypatch.setattr(DataVersionCRUD, "bump", record_bump)
+    changed = [
+        (*row[:4], 4.0, row[5]) if row[2:4] == (2026, 1) else row
+        for row in MONTH_VALUES
+    ]
+
+    async def scenario(db):
+        await HistogramRollupCRUD.rebuild(db)
+        await db.execute(
+            update(HistogramMonthValue)
+            .where(HistogramMonthValue.year == 2026)
+            .values(value=4.0)
+        )
+        await HistogramRollupCRUD.rebuild(db, years=[2026])
+        return await rollups_by_key(db)
+
+    rollups = asyncio.run(run_with_month_values(scenario))
+
+    assert rollups == all_expected_rollups(changed)
+    assert rollups[("fiscal_year", "total")][(2025, 0, "")] == (31.5, 4)
+
+
+@pytest.mark.parametrize(
+    "grain, dimension, year, value, expected",
+    [
+        (
+            "month",
+            "total",
+            2025,
+            None,
+            [(2025, 3, "", 10.0), (2025, 4, "", 22.5), (2025, 7, "", 5.0)],
+        ),
+        (
+            "quarter",
+            "pj_br_num",
+            2025,
+            "PJ2",
+            [(2025, 2, "PJ2", 5.0), (2025, 4, "PJ2", 1.5)],
+        ),
+        (
+            "fiscal_year",
+            "ac_code",
+            None,
+            "AC1",
+            [(2024, 0, "AC1", 10.0), (2025, 0, "AC1", 25.0)],
+        ),
+    ],
+)
+def test_rollups_endpoint(monkeypatch, grain, dimension, year, value, expected):
+    """/assign-kun/rollups が粒度・集計軸・年・値で絞った事前集計を期間順に返すこと"""
+    monkeypatch.setattr(DataVersionCRUD, "bump", record_bump)
+
+    async def scenario(db):
+        await HistogramRollupCRUD.rebuild(db)
+        response = await get_rollups(
+            grain=grain, dimension=dimension, year=year, value=value, db=db
+        )
+        return json.loads(response.body)
+
+    body = asyncio.run(run_with_month_values(scenario))
+
+    assert (body["grain"], body["dimension"]) == (grain, dimension)
+    assert [
+        (r["period_year"], r["period_index"], r["value"], r["total"])
+        for r in body["rollups"]
+    ] == expected
+
+
+def test_informations_keeps_year_month_keys(monkeypatch):
+    """/informations の totals が従来の total_year・total_month と集計範囲を返すこと"""
+    monkeypatch.setattr(DataVersionCRUD, "bump", record_bump)
+
+    async def scenario(db):
+        await HistogramRollupCRUD.rebuild(db)
+        db.add_all(
+            [
+                TeamAssignTotal(team="A", assin_execution_total=10),
+                TeamAssignTotal(team="B", assin_execution_total=5),
+            ]
+        )
+        await db.commit()
+        response = await get_information(month=4, year=2025, team="A", db=db)
+        return json.loads(response.body)
+
+    body = asyncio.run(run_with_month_values(scenario))
+
+    assert body["month_totals"] == {
+        "previous_month": {"month": 3, "total_amount": 10.0},
+        "current_month": {"month": 4, "total_amount": 22.5},
+        "next_month": {"month": 5, "total_amount": 0.0},
+    }
+    (totals,) = body["totals"]
+    assert {key: totals[key] for key in ("total_year", "total_month")} == {
+        "total_year": "2025",
+        "total_month": 4,
+    }
+    assert (totals["total_scope"], totals["team"]) == ("all", "A")
+    assert totals["total_execution"] == 10.0
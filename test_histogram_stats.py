@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from db_crud import HistogramCRUD
+from db_models import Base, Histogram
+from models import HistogramResourceKey, HistogramStatsBatchRequest
+from mysql_endpoints import (
+    MAX_STATS_RESOURCES,
+    get_histogram_stats,
+    get_histogram_stats_batch,
+)
+
+HISTOGRAMS = [
+    ("user", 1, "0-10", 5, 3),
+    ("user", 1, "10-20", 15, 7),
+    ("user", 1, "20-30", 25, 0),
+    ("project", 2, "0-50", 40, 4),
+    ("user", 2, "0-10", 1, 1),
+]
+
+
+async def run_with_histograms(func):
+    """ヒストグラムを登録した SQLite（メモリ）のセッションで func を実行"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[Histogram.__table__])
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add_all(
+                Histogram(
+                    resource_type=resource_type,
+                    resource_id=resource_id,
+                    bin_label=label,
+                    bin_value=value,
+                    count=count,
+                )
+                for resource_type, resource_id, label, value, count in HISTOGRAMS
+            )
+            await db.commit()
+            return await func(db)
+    finally:
+        await engine.dispose()
+
+
+def batch_request(resources, include_bins=False):
+    return HistogramStatsBatchRequest(
+        resources=[
+            HistogramResourceKey(resource_type=t, resource_id=i) for t, i in resources
+        ],
+        include_bins=include_bins,
+    )
+
+
+def test_histogram_stats_aggregates_known_data():
+    """合計・ビン数・平均・最小・最大を1リソース分のビンのみから集計すること"""
+
+    async def scenario(db):
+        return await get_histogram_stats("user", 1, include_bins=True, db=db)
+
+    stats = asyncio.run(run_with_histograms(scenario))
+
+    assert {key: value for key, value in stats.items() if key != "histograms"} == {
+        "resource_type": "user",
+        "resource_id": 1,
+        "total_count": 10,
+        "bin_count": 3,
+        "average_value": 15.0,
+        "min_value": 5,
+        "max_value": 25,
+    }
+    assert sorted(h.bin_label for h in stats["histograms"]) == [
+        "0-10",
+        "10-20",
+        "20-30",
+    ]
+
+
+def test_histogram_stats_not_found():
+    """ビンのないリソースは 404 になること"""
+
+    async def scenario(db):
+        with pytest.raises(HTTPException) as error:
+            await get_histogram_stats("user", 99, include_bins=True, db=db)
+        return error.value
+
+    assert asyncio.run(run_with_histograms(scenario)).status_code == 404
+
+
+def test_histogram_stats_batch_keeps_request_order():
+    """指定順に返し、重複は1件にまとめ、該当なしのリソースは除外すること"""
+
+    async def scenario(db):
+        return await get_histogram_stats_batch(
+            batch_request([("project", 2), ("user", 99), ("user", 1), ("project", 2)]),
+            db,
+        )
+
+    stats = asyncio.run(run_with_histograms(scenario))
+
+    assert [
+        (s["resource_type"], s["resource_id"], s["total_count"], s["histograms"])
+        for s in stats
+    ] == [("project", 2, 4, None), ("user", 1, 10, None)]
+
+
+def test_histogram_stats_batch_resource_limit():
+    """MAX_STATS_RESOURCES 件までは取得でき、超えると 400 になること"""
+    resources = [("user", i) for i in range(1, MAX_STATS_RESOURCES + 1)]
+
+    async def scenario(db):
+        stats = await get_histogram_stats_batch(batch_request(resources), db)
+        with pytest.raises(HTTPException) as error:
+            await get_histogram_stats_batch(
+                batch_request(resources + [("user", 0)]), db
+            )
+        return stats, error.value
+
+    stats, error = asyncio.run(run_with_histograms(scenario))
+
+    assert [(s["resource_id"], s["bin_count"]) for s in stats] == [(1, 3), (2, 1)]
+    assert error.status_code == 400
+
+
+def test_histogram_stats_many_empty():
+    """リソースの指定がなければ問い合わせずに空で返すこと"""
+    assert asyncio.run(HistogramCRUD.get_histogram_stats_many(None, [])) == []
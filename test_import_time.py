@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+# function_app のインポート時間の上限（ミリ秒、-X importtime の累積値）
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+# コールドスタートでは読み込まないモジュール（初回リクエスト時に読み込む）
+DEFERRED_MODULES = (
+    "azure.storage.blob",
+    "httpx",
+    "models",
+    "numpy",
+    "pyarrow",
+    "db_models",
+    "db_crud",
+    "blob_endpoints",
+    "mysql_endpoints",
+    "csv_processor",
+)
+
+# コールドスタートで読み込むモジュール
+# （起動処理で DB エンジンを作成するため、SQLAlchemy の読み込みは遅らせない）
+EAGER_MODULES = ("sqlalchemy.ext.asyncio", "database")
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(stderr: str):
+    """-X importtime の出力をモジュール名 → 累積マイクロ秒に変換"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # 見出し行
+        cumulative[fields[2].strip()] = int(fields[1])
+    return cumulative
+
+
+def import_function_app():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import function_app"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return parse_importtime(result.stderr)
+
+
+def test_parse_importtime():
+    stderr = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   json.decoder",
+            "import time:       300 |        420 | json",
+            "INFO:function_app:unrelated log line",
+        ]
+    )
+
+    assert parse_importtime(stderr) == {"json.decoder": 120, "json": 420}
+
+
+def test_function_app_import_time_budget():
+    # 1回目はバイトコードの生成を含むため、2回のうち速い方で判定
+    runs = [import_function_app() for _ in range(2)]
+    elapsed_ms = min(run["function_app"] for run in runs) / 1000
+
+    assert elapsed_ms < IMPORT_TIME_BUDGET_MS, f"{elapsed_ms:.0f}ms"
+    for module in DEFERRED_MODULES:
+        assert (
+            module not in runs[-1]
+        ), f"{module} がコールドスタートで読み込まれています"
+    for module in EAGER_MODULES:
+        assert module in runs[-1], f"{module} がコールドスタートで読み込まれていません"
@@ -0,0 +1,59 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+from db_models import Histogram
+from json_response import FastJSONResponse, dumps, model_response
+from models import CursorPage, HistogramResponse
+
+
+def make_histogram(histogram_id):
+    now = datetime(2025, 7, 24, 10, 0)
+    return Histogram(
+        id=histogram_id,
+        resource_type="project",
+        resource_id=1,
+        bin_label="0-10",
+        bin_value=10,
+        count=3,
+        percentage="12.5",
+        additional_data={"note": "テスト"},
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def test_dumps_decimal_datetime_and_int_keys():
+    """DECIMAL・日時・int のキーを既存の JSON と同じ形式で出力すること"""
+    content = {
+        "total": Decimal("120.50"),
+        "created_at": datetime(2025, 7, 24, 10, 0),
+        "months": {4: 1.5},
+        "name": "田中太郎",
+    }
+    assert json.loads(dumps(content)) == {
+        "total": 120.5,
+        "created_at": "2025-07-24T10:00:00",
+        "months": {"4": 1.5},
+        "name": "田中太郎",
+    }
+    assert FastJSONResponse(content).body == dumps(content)
+
+
+def test_model_response_validates_orm_objects():
+    """ORM オブジェクトの一覧・カーソルページを response_model と同じ JSON にすること"""
+    histograms = [make_histogram(1), make_histogram(2)]
+
+    response = model_response(List[HistogramResponse], histograms)
+
+    assert response.media_type == "application/json"
+    body = json.loads(response.body)
+    assert [item["id"] for item in body] == [1, 2]
+    assert body[0]["percentage"] == 12.5
+    assert body[0]["created_at"] == "2025-07-24T10:00:00"
+
+    page = model_response(
+        CursorPage[HistogramResponse], {"items": histograms, "next_cursor": "abc"}
+    )
+    assert json.loads(page.body)["next_cursor"] == "abc"
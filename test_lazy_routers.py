@@ -0,0 +1,39 @@
+import json
+
+from fastapi import FastAPI
+
+from lazy_routers import (
+    ROUTE_TABLE_HASH_KEY,
+    LazyRouters,
+    read_openapi,
+    route_table_hash,
+)
+
+
+def make_routers():
+    app = FastAPI(version="1.0.0")
+    routers = LazyRouters(app)
+    routers.add("assignkun_endpoints", "/assign-kun", ["Assign-Kun"])
+    return app, routers
+
+
+def test_route_table_hash_changes_with_routers():
+    """ルーターの登録内容・バージョンが変わるとハッシュが変わること"""
+    app, routers = make_routers()
+    route_hash = route_table_hash(app, routers)
+
+    assert route_hash == route_table_hash(*make_routers())
+    routers.add("csv_endpoints", "/csv", ["CSV"])
+    assert route_table_hash(app, routers) != route_hash
+    app.version = "1.0.1"
+    assert route_table_hash(*make_routers()) != route_table_hash(app, routers)
+
+
+def test_read_openapi_rejects_stale_schema(tmp_path):
+    """ルーター構成のハッシュが一致しない openapi.json は使わないこと"""
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps({"openapi": "3.1.0", ROUTE_TABLE_HASH_KEY: "abc"}))
+
+    assert read_openapi(str(path), "abc")[ROUTE_TABLE_HASH_KEY] == "abc"
+    assert read_openapi(str(path), "def") is None
+    assert read_openapi(str(tmp_path / "missing.json"), "abc") is None
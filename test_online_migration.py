@@ -0,0 +1,69 @@
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+from online_migration import (
+    STATE_TABLE,
+    add_shadow_columns_sql,
+    backfill,
+    cutover_sql,
+    ensure_state_table,
+    get_state,
+    trigger_sql,
+    with_percent,
+)
+
+
+def test_shadow_trigger_and_cutover_sql():
+    """影の列・二重書き込みトリガー・列の入れ替えの SQL が組み立てられること"""
+    columns = [sa.Column("assin_execution", sa.DECIMAL(12, 2), comment="実行")]
+
+    assert add_shadow_columns_sql("assign_data", columns, mysql.dialect()) == (
+        "ALTER TABLE assign_data ADD COLUMN assin_execution__new DECIMAL(12, 2) "
+        "COMMENT '実行', ALGORITHM=INSTANT"
+    )
+    assert trigger_sql(
+        "assign_data",
+        ["assin_execution"],
+        {"assin_execution": "ROUND({}, 2)"},
+        "UPDATE",
+    ) == (
+        "CREATE TRIGGER assign_data_online_upd BEFORE UPDATE ON assign_data "
+        "FOR EACH ROW SET NEW.assin_execution__new = ROUND(NEW.assin_execution, 2)"
+    )
+    assert cutover_sql("assign_data", ["assin_execution"]) == (
+        "ALTER TABLE assign_data "
+        "RENAME COLUMN assin_execution TO assin_execution__old, "
+        "RENAME COLUMN assin_execution__new TO assin_execution"
+    )
+
+
+def test_backfill_resumes_from_recorded_position():
+    """記録した位置から再開し、開始時点の最大IDまで小バッチで複写すること"""
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as bind:
+        bind.execute(
+            sa.text("CREATE TABLE t (id INTEGER PRIMARY KEY, a INT, a__new INT)")
+        )
+        bind.execute(
+            sa.text("INSERT INTO t (id, a) VALUES (:id, :a)"),
+            [{"id": i, "a": i * 10} for i in range(1, 11)],
+        )
+        ensure_state_table(bind)
+        # id 4 まで処理済みの状態から再開する
+        bind.execute(
+            sa.text(
+                f"INSERT INTO {STATE_TABLE} (name, table_name, phase, last_id) "
+                "VALUES ('m', 't', 'backfill', 4)"
+            )
+        )
+
+        backfill(bind, "m", "t", ["a"], {}, batch_size=3, pause=0, sleep_ratio=0)
+
+        rows = bind.execute(sa.text("SELECT id, a__new FROM t ORDER BY id")).all()
+        state = get_state(bind, "m")
+
+    assert [value for _, value in rows] == [None] * 4 + [i * 10 for i in range(5, 11)]
+    assert state["last_id"] == state["max_id"] == 10
+    assert state["rows_done"] == 6
+    assert state["batches"] == 2
+    assert with_percent(state)["percent"] == 100.0
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from db_models import Base, User
+from pagination import (
+    InvalidCursorError,
+    apply_keyset,
+    decode_cursor,
+    encode_cursor,
+    fetch_keyset_page,
+)
+
+
+def test_cursor_round_trip():
+    """カーソルのエンコード・デコードが往復で一致すること"""
+    created_at = datetime(2025, 7, 24, 10, 30, 15, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+def test_invalid_cursor():
+    """不正なカーソルは InvalidCursorError になること"""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor")
+
+
+def test_apply_keyset_first_page():
+    """先頭ページは条件なしで limit + 1 件を降順取得すること"""
+    query = apply_keyset(select(User), User.created_at, User.id, "", 10)
+    sql = str(query.compile(dialect=mysql.dialect()))
+    assert "WHERE" not in sql
+    assert "ORDER BY users.created_at DESC, users.id DESC" in sql
+    assert "LIMIT" in sql
+
+
+def test_apply_keyset_next_page():
+    """次ページは (created_at, id) のキー条件で取得し OFFSET を使わないこと"""
+    cursor = encode_cursor(datetime(2025, 7, 24), 42)
+    query = apply_keyset(select(User), User.created_at, User.id, cursor, 10)
+    sql = str(query.compile(dialect=mysql.dialect()))
+    assert "users.created_at <= " in sql
+    assert "users.id < " in sql
+    assert "OFFSET" not in sql
+
+
+def test_cursor_with_null_sort_value():
+    """時刻列が NULL の行のカーソルも往復し、NULL の行のみを続きとして取得すること"""
+    cursor = encode_cursor(None, 7)
+    assert decode_cursor(cursor) == (None, 7)
+
+    query = apply_keyset(select(User), User.created_at, User.id, cursor, 10)
+    sql = str(query.compile(dialect=mysql.dialect()))
+    assert "users.created_at IS NULL AND users.id < " in sql
+
+
+def test_fetch_keyset_page_includes_null_rows():
+    """時刻列が NULL の行も欠けず重複せずに末尾のページで取得できること"""
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[User.__table__])
+        async with AsyncSession(engine) as db:
+            db.add_all(
+                User(id=i, name=f"user{i}", created_at=datetime(2025, 7, day))
+                for i, day in [(1, 1), (2, 1), (3, 2), (4, 1), (5, 2)]
+            )
+            await db.flush()
+            # None を指定すると既定値（現在時刻）になるため、作成後に NULL にする
+            await db.execute(
+                update(User).where(User.id.in_([2, 4])).values(created_at=None)
+            )
+            await db.commit()
+
+            ids, cursor = [], None
+            for _ in range(10):  # カーソルが進まない場合に終わらせる
+                rows, cursor = await fetch_keyset_page(
+                    db, select(User), User.created_at, User.id, cursor, 2
+                )
+                ids.extend(row.id for row in rows)
+                if cursor is None:
+                    break
+        await engine.dispose()
+        return ids
+
+    assert asyncio.run(scenario()) == [5, 3, 1, 4, 2]
@@ -0,0 +1,39 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from pool_metrics import PoolMetrics, TimeHistogram, instrument_pool, percentile
+
+
+def test_percentile_and_histogram_buckets():
+    """パーセンタイルと累積バケットが正しく計算されること"""
+    samples = [i / 1000 for i in range(1, 101)]
+    assert percentile(samples, 50) == 0.05
+    assert percentile(samples, 95) == 0.095
+    assert percentile([], 95) is None
+
+    histogram = TimeHistogram(buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.5):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2]
+    assert histogram.count == 3
+
+
+def test_instrumented_pool_counts_checkouts():
+    """計測したプールで取得・返却・待ち時間が記録されること"""
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=1)
+    metrics = instrument_pool(engine, PoolMetrics())
+
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["pool_class"] == "QueuePool"
+    assert snapshot["connects"] == 1
+    assert snapshot["checkouts"] == snapshot["checkins"] == 3
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkout_wait"]["count"] == 3
+    assert 'db_pool_checkout_wait_seconds_bucket{le="+Inf"} 3' in (
+        metrics.render_prometheus()
+    )
+    engine.dispose()
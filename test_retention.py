@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import retention
+
+ROWS = [
+    {
+        "id": 3,
+        "operation_time": datetime(2024, 1, 5, 9, 30),
+        "file_name": "a.csv",
+        "details": {"size": 10},
+    },
+    {
+        "id": 7,
+        "operation_time": datetime(2024, 1, 6, 18, 0),
+        "file_name": "b.csv",
+        "details": None,
+    },
+]
+
+
+def test_parquet_round_trip():
+    """Parquet に変換して読み戻すと値が保たれ、dict は JSON 文字列になること"""
+    rows = retention.decode_parquet(retention.encode_parquet(ROWS))
+
+    assert [row["id"] for row in rows] == [3, 7]
+    assert rows[0]["operation_time"] == datetime(2024, 1, 5, 9, 30)
+    assert rows[0]["details"] == '{"size": 10}'
+    assert rows[1]["details"] is None
+
+
+def test_archive_path_uses_oldest_month_and_id_range():
+    """アーカイブのパスが最古の行の年月と先頭・末尾IDから作られること"""
+    path = retention.archive_path("blob_logs", ROWS, "operation_time")
+
+    assert path == "blob_logs/2024/01/blob_logs_3_7.parquet"
+
+
+def test_local_archive_write_and_read(tmp_path, monkeypatch):
+    """ローカル保存先に書き込んだアーカイブを読み出せること"""
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path))
+    path = retention.archive_path("blob_logs", ROWS, "operation_time")
+
+    retention.write_archive_sync("local", path, retention.encode_parquet(ROWS))
+
+    assert (tmp_path / path).exists()
+    rows = retention.decode_parquet(retention.read_archive_sync("local", path))
+    assert [row["file_name"] for row in rows] == ["a.csv", "b.csv"]
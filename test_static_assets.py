@@ -0,0 +1,63 @@
+import gzip
+
+from starlette.requests import Request
+
+import static_assets
+from static_assets import (
+    StaticAsset,
+    accepted_encodings,
+    etag_matches,
+    load_asset,
+    static_page,
+)
+
+
+def make_request(headers):
+    raw = [(key.lower().encode(), value.encode()) for key, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_accepted_encodings_skips_q_zero():
+    assert accepted_encodings("gzip, br;q=0, deflate;q=0.5") == ["gzip", "deflate"]
+    assert accepted_encodings("") == []
+
+
+def test_select_prefers_brotli_then_gzip():
+    asset = StaticAsset("page.html", b"<html></html>", {"br": b"b", "gzip": b"g"})
+
+    assert asset.select("gzip, br")[0] == "br"
+    assert asset.select("gzip")[:2] == ("gzip", b"g")
+    assert asset.select("identity")[:2] == ("identity", b"<html></html>")
+    # 圧縮方式ごとに ETag が異なる
+    assert len({asset.select(value)[2] for value in ("br", "gzip", "")}) == 3
+
+
+def test_etag_matches():
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches(None, '"b"')
+    assert not etag_matches('"a"', '"b"')
+
+
+def test_static_page_compresses_and_revalidates(tmp_path, monkeypatch):
+    (tmp_path / "page.html").write_text("<html>" + "x" * 2000 + "</html>")
+    monkeypatch.setattr(static_assets, "STATIC_DIR", str(tmp_path))
+    load_asset.cache_clear()
+
+    response = static_page(make_request({"Accept-Encoding": "gzip"}), "page.html")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.body).startswith(b"<html>")
+
+    not_modified = static_page(
+        make_request(
+            {"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]}
+        ),
+        "page.html",
+    )
+
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    load_asset.cache_clear()
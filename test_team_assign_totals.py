@@ -0,0 +1,61 @@
+import asyncio
+from decimal import Decimal
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from db_crud import UNASSIGNED_TEAM, DataVersionCRUD, TeamAssignTotalCRUD
+from db_models import AssignUserTotal, Base, TeamAssignTotal, UserData
+
+
+async def record_bump(db, datasets, commit=True):
+    db.info.setdefault("bumped", []).extend(datasets)
+
+
+def test_refresh_users_recomputes_only_affected_teams(monkeypatch):
+    """変更したユーザーの所属チームの集計行のみを再計算すること"""
+    # バージョンの更新は MySQL の upsert を使うため記録のみにする
+    monkeypatch.setattr(DataVersionCRUD, "bump", record_bump)
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[
+                    AssignUserTotal.__table__,
+                    TeamAssignTotal.__table__,
+                    UserData.__table__,
+                ],
+            )
+        async with AsyncSession(engine) as db:
+            db.add_all(
+                [
+                    UserData(user_code="U1", user_name="田中", user_team="A"),
+                    UserData(user_code="U2", user_name="鈴木", user_team="B"),
+                    AssignUserTotal(user_name="田中", assin_execution_total=10),
+                    AssignUserTotal(user_name="鈴木", assin_execution_total=20),
+                    AssignUserTotal(user_name="佐藤", assin_execution_total=5),
+                ]
+            )
+            await TeamAssignTotalCRUD.rebuild(db)
+
+            # 3人とも集計が変わったが、再計算するのは田中・佐藤のチームのみ
+            await db.execute(update(AssignUserTotal).values(assin_execution_total=100))
+            await TeamAssignTotalCRUD.refresh_users(db, ["田中", "佐藤"])
+            result = await db.execute(
+                select(TeamAssignTotal.team, TeamAssignTotal.assin_execution_total)
+            )
+            totals = dict(result.all())
+            bumped = db.info["bumped"]
+        await engine.dispose()
+        return totals, bumped
+
+    totals, bumped = asyncio.run(scenario())
+
+    assert totals == {
+        "A": Decimal("100"),
+        "B": Decimal("20"),
+        UNASSIGNED_TEAM: Decimal("100"),
+    }
+    assert bumped == ["assign", "assign"]